@@ -5,9 +5,11 @@ from django.utils.html import mark_safe
 
 #your files
 from .models import User, HomeImage
+from .authentication import invalidate_user
+from core.admin import PrefixAutocompleteMixin
 
 
-class AccountsUserAdmin(UserAdmin):
+class AccountsUserAdmin(PrefixAutocompleteMixin, UserAdmin):
     # نمایش تصویر در لیست کاربران
     list_display = (
         'image_tag',
@@ -39,6 +41,8 @@ class AccountsUserAdmin(UserAdmin):
         'last_name',
         'phone_number'
     )
+    # ویجت‌های autocomplete (مشتری، کارمند، مدیر) فقط روی ایندکس پیشوندی جستجو می‌کنند
+    autocomplete_search_fields = ('^username', '^email')
 
     ordering = ('-date_joined',)
     list_per_page = 25
@@ -96,6 +100,8 @@ class AccountsUserAdmin(UserAdmin):
 
     def activate_users(self, request, queryset):
         updated = queryset.update(is_active=True)
+        # update() سیگنال post_save نمی‌فرستد؛ کش کاربران را دستی باطل می‌کنیم
+        invalidate_user(*queryset.values_list('pk', flat=True))
         self.message_user(
             request,
             f'{updated} کاربر با موفقیت فعال شدند.',
@@ -106,6 +112,7 @@ class AccountsUserAdmin(UserAdmin):
 
     def deactivate_users(self, request, queryset):
         updated = queryset.update(is_active=False)
+        invalidate_user(*queryset.values_list('pk', flat=True))
         self.message_user(
             request,
             f'{updated} کاربر با موفقیت غیرفعال شدند.',
@@ -0,0 +1,143 @@
+# django files
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+
+# rest files
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+# your files
+from .models import User
+from core import metrics
+
+# package files
+from collections import OrderedDict
+import copy
+import threading
+import time
+
+
+# user_id -> (expires_at, cached_at, user)؛ به ترتیب آخرین استفاده
+_user_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+# فیلدهایی که از claim های توکن خوانده می‌شوند؛ بقیه فیلدها deferred هستند
+CLAIM_FIELDS = ('username', 'role', 'is_active', 'is_staff', 'is_superuser')
+
+
+def invalidation_cache():
+    return caches[getattr(settings, 'USER_INVALIDATION_CACHE', 'default')]
+
+
+def invalidation_key(user_id):
+    return f'accounts:user_invalidated:{user_id}'
+
+
+def get_invalidated_at(user_id):
+    """Time of the user's last invalidate_user() in any worker, or None."""
+    return invalidation_cache().get(invalidation_key(user_id))
+
+
+def get_cached_user(user_id, invalidated_at=None):
+    """
+    User row cached per process for USER_CACHE_TTL seconds, at most
+    USER_CACHE_MAX_SIZE users (least recently used are dropped). An entry
+    cached before `invalidated_at` is reloaded. A copy is returned so one
+    request can never mutate another request's user.
+    """
+    now = time.monotonic()
+    with _cache_lock:
+        entry = _user_cache.get(user_id)
+        hit = entry is not None and entry[0] > now and (invalidated_at is None or entry[1] > invalidated_at)
+        if hit:
+            _user_cache.move_to_end(user_id)
+    metrics.record_cache('user', hit)
+    if hit:
+        return copy.copy(entry[2])
+
+    cached_at = time.time()
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return None
+    with _cache_lock:
+        _user_cache[user_id] = (now + getattr(settings, 'USER_CACHE_TTL', 60), cached_at, user)
+        _user_cache.move_to_end(user_id)
+        while len(_user_cache) > getattr(settings, 'USER_CACHE_MAX_SIZE', 10_000):
+            _user_cache.popitem(last=False)
+    return copy.copy(user)
+
+
+def invalidate_user(*user_ids):
+    """
+    Makes tokens issued before now fall back to the database and reloads
+    the user in every worker's cache, so role and is_active changes apply
+    immediately. The timestamp is kept in USER_INVALIDATION_CACHE (shared
+    between workers) for as long as a token or cache entry can outlive it.
+    """
+    now = time.time()
+    with _cache_lock:
+        for user_id in user_ids:
+            _user_cache.pop(user_id, None)
+    timeout = max(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds(), getattr(settings, 'USER_CACHE_TTL', 60)) + 1
+    invalidation_cache().set_many({invalidation_key(user_id): now for user_id in user_ids}, timeout=int(timeout))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication without a per-request user query.
+
+    Tokens issued by ClaimsRefreshToken carry role, staff flags and salon
+    ids; the user is rebuilt from those claims with every other field
+    deferred. Tokens without claims, or issued before the user was last
+    invalidated, go through the short-TTL per-process user cache instead.
+    Invalidation times come from the shared cache: one cache read and no
+    query per request.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        # simplejwt شناسه را به صورت رشته در توکن می‌گذارد
+        user_id = User._meta.pk.to_python(user_id)
+
+        invalidated_at = get_invalidated_at(user_id)
+        if 'role' in validated_token and not self.is_stale(validated_token, invalidated_at):
+            user = self.user_from_claims(user_id, validated_token)
+        else:
+            user = get_cached_user(user_id, invalidated_at)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
+
+    def is_stale(self, validated_token, invalidated_at):
+        return invalidated_at is not None and validated_token.get('iat', 0) <= invalidated_at
+
+    def user_from_claims(self, user_id, validated_token):
+        claims = {'id': user_id, **{name: validated_token.get(name) for name in CLAIM_FIELDS}}
+        # توکن‌های قدیمی‌تر claim is_active ندارند؛ غیرفعال شدن کاربر آن‌ها را stale می‌کند
+        if claims['is_active'] is None:
+            claims['is_active'] = True
+        # from_db مقادیر را به ترتیب فیلدهای مدل انتظار دارد
+        field_names = [f.attname for f in User._meta.concrete_fields if f.attname in claims]
+        user = User.from_db(DEFAULT_DB_ALIAS, field_names, [claims[name] for name in field_names])
+        user.claimed_salon_ids = frozenset(validated_token.get('salon_ids', ()))
+        # توکن‌های قدیمی‌تر این claim را ندارند؛ get_salon_ids آن را از دیتابیس می‌خواند
+        managed = validated_token.get('managed_salon_ids')
+        user.claimed_managed_salon_ids = frozenset(managed) if managed is not None else None
+        return user
+
+
+def get_full_user(request):
+    """کاربر با همه فیلدها؛ برای endpoint هایی که پروفایل را می‌خوانند یا ذخیره می‌کنند"""
+    user = request.user
+    if user.get_deferred_fields():
+        return User.objects.get(pk=user.pk)
+    return user
@@ -0,0 +1,29 @@
+# django files
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+# your files
+from accounts.models import RevokedToken
+from accounts.revocation import revoked_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete revoked refresh tokens that have expired anyway and signal every worker to rebuild its filter; run periodically (e.g. hourly cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = RevokedToken.objects.filter(expires_at__lte=now)
+
+        deleted = 0
+        while True:
+            # حذف دسته‌ای تا تراکنش و قفل‌ها روی جدول بزرگ طولانی نشوند
+            batch = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            deleted += RevokedToken.objects.filter(pk__in=batch).delete()[0]
+
+        revoked_tokens.reset()
+        self.stdout.write(self.style.SUCCESS(f"{deleted} revoked tokens purged"))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='homeimage',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:10
+
+from django.db import migrations
+
+from core.operations import AddPrefixSearchIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0009_homeimage_image_variants'),
+    ]
+
+    operations = [
+        # جستجوی پیشوندی ویجت‌های autocomplete ادمین
+        AddPrefixSearchIndex(model_name='user', field_name='username', name='accounts_user_username_prefix'),
+        AddPrefixSearchIndex(model_name='user', field_name='email', name='accounts_user_email_prefix'),
+    ]
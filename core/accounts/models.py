@@ -3,8 +3,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 
-#packages
-from PIL import Image
+#your files
+from core.images import ImageDerivativesModel, DerivativeSpec
 
 class User(AbstractUser):
     phone_regex = RegexValidator(
@@ -21,45 +21,52 @@ class User(AbstractUser):
     email = models.EmailField(unique=True)
     phone_number = models.CharField(max_length=11, unique=True, validators=[phone_regex], blank=True, null=True)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='CUSTOMER')
-    image = models.ImageField(default='profile_pics/default.png', upload_to='profile_pics', blank=True, null=True)
+    DEFAULT_IMAGE = 'profile_pics/default.png'
+    image = models.ImageField(default=DEFAULT_IMAGE, upload_to='profile_pics', blank=True, null=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # نام تصویر هنگام خواندن؛ فقط در صورت تغییر فایل پردازش انجام می‌شود
+        instance._loaded_image_name = instance.__dict__.get('image')
+        return instance
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
 
-        if self.image and self.image.name != 'default.png':
-            img_path = self.image.path
-
-            img = Image.open(img_path)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'image' not in update_fields:
+            return
+        if 'image' in self.get_deferred_fields():
+            return
 
-            img.thumbnail((300, 300))
+        name = self.image.name if self.image else None
+        if name and name != self.DEFAULT_IMAGE and name != getattr(self, '_loaded_image_name', None):
+            from core.background import submit_on_commit
+            from .tasks import make_profile_thumbnail
 
-            img.save(img_path, optimize=True, quality=85)
+            # تصویر کوچک در worker پس‌زمینه ساخته می‌شود، نه داخل درخواست
+            submit_on_commit(make_profile_thumbnail, self.pk, name)
+        self._loaded_image_name = name
 
     def __str__(self):
         return self.username
-class HomeImage(models.Model):
+class HomeImage(ImageDerivativesModel):
     name = models.CharField(max_length=100)
     image = models.ImageField(upload_to="images/")
-    def save(self, *args, **kwargs):
-        if self.pk:
-            orig = HomeImage.objects.filter(pk=self.pk).first()
-            orig_image = orig.image if orig else None
-        else:
-            orig_image = None
 
-        super().save(*args, **kwargs)
+    derivative_spec = DerivativeSpec(widths=(540, 1080), aspect=1080 / 945)
+
 
-        if self.image and (not orig_image or self.image.name != orig_image.name):
-            self.resize_image()
 
-    def resize_image(self):
-        image_path = self.image.path
-        try:
-            with Image.open(image_path) as img:
-                target_size = (1080, 945)
-                resized_img = img.resize(target_size, Image.LANCZOS)
-                format = img.format or 'JPEG'
-                resized_img.save(image_path, format=format, quality=95)
-        except Exception as e:
-            print(f"Error resizing image: {e}")
+class RevokedToken(models.Model):
+    """
+    توکن‌های refresh باطل‌شده؛ فقط تا زمان انقضای خود توکن نگه داشته می‌شوند
+    (purge_revoked_tokens) تا اندازه جدول به عمر توکن refresh محدود بماند.
+    """
+    jti = models.CharField(max_length=64, primary_key=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,110 @@
+# django files
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+# your files
+from .models import RevokedToken
+from core.bloom import BloomFilter
+
+# package files
+from datetime import timedelta
+import secrets
+import threading
+import time
+
+
+# رکوردهایی که دیرتر از created_at خود commit شده‌اند هم در همگام‌سازی بعدی دیده شوند
+SYNC_OVERLAP = timedelta(seconds=5)
+# با هر purge عوض می‌شود تا فیلتر همه worker ها در همگام‌سازی بعدی از نو ساخته شود
+GENERATION_KEY = 'accounts:revoked_tokens:generation'
+
+
+class RevocationList:
+    """
+    Per-process bloom filter in front of the RevokedToken table.
+
+    The filter is topped up with newly revoked jtis every
+    REVOKED_TOKEN_SYNC_INTERVAL seconds and rebuilt from the live rows every
+    REVOKED_TOKEN_REBUILD_INTERVAL seconds, so expired entries drop out.
+    `reset()` (run by purge_revoked_tokens) bumps a generation in the
+    default cache; every worker sees it at its next top-up and rebuilds
+    then. A jti the filter has never seen is accepted without a query; a
+    "maybe" is confirmed against the table.
+    """
+
+    def __init__(self):
+        self._bloom = None
+        self._built_at = 0
+        self._synced_at = 0
+        self._watermark = None
+        self._generation = None
+        self._lock = threading.Lock()
+
+    def _rebuild(self, generation=None):
+        watermark = timezone.now()
+        jtis = list(RevokedToken.objects.filter(expires_at__gt=watermark).values_list('jti', flat=True))
+        capacity = max(getattr(settings, 'REVOKED_TOKEN_BLOOM_CAPACITY', 100_000), len(jtis) * 2)
+        bloom = BloomFilter(capacity)
+        bloom.update(jtis)
+        self._bloom = bloom
+        self._built_at = self._synced_at = time.monotonic()
+        self._watermark = watermark
+        self._generation = generation
+
+    def _sync(self):
+        now = time.monotonic()
+        if self._bloom is not None and now - self._synced_at < getattr(settings, 'REVOKED_TOKEN_SYNC_INTERVAL', 1):
+            return
+
+        with self._lock:
+            if self._bloom is not None and now - self._synced_at < getattr(settings, 'REVOKED_TOKEN_SYNC_INTERVAL', 1):
+                return
+            generation = cache.get(GENERATION_KEY)
+            if (
+                self._bloom is None or generation != self._generation
+                or now - self._built_at >= getattr(settings, 'REVOKED_TOKEN_REBUILD_INTERVAL', 3600)
+            ):
+                self._rebuild(generation)
+                return
+
+            watermark = timezone.now()
+            self._bloom.update(
+                RevokedToken.objects
+                .filter(created_at__gte=self._watermark - SYNC_OVERLAP)
+                .values_list('jti', flat=True)
+            )
+            self._synced_at = now
+            self._watermark = watermark
+
+    def is_revoked(self, jti):
+        self._sync()
+        bloom = self._bloom
+        if bloom is not None and jti not in bloom:
+            return False
+        return RevokedToken.objects.filter(jti=jti, expires_at__gt=timezone.now()).exists()
+
+    def revoke(self, jti, expires_at):
+        """
+        Returns False if the jti was already revoked, so two concurrent
+        refreshes with the same token cannot both succeed.
+        """
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+        except IntegrityError:
+            return False
+
+        if self._bloom is not None:
+            self._bloom.add(jti)
+        return True
+
+    def reset(self):
+        """فیلتر همه worker ها (از طریق کش مشترک) در همگام‌سازی بعدی از روی جدول دوباره ساخته می‌شود"""
+        cache.set(GENERATION_KEY, secrets.token_hex(8), timeout=None)
+        with self._lock:
+            self._bloom = None
+
+
+revoked_tokens = RevocationList()
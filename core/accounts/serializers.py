@@ -1,13 +1,83 @@
 # django files
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.contrib.auth.password_validation import validate_password
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 
 # your files
 from .models import User, HomeImage
+from .tokens import ClaimsRefreshToken
+from core.fields import ImageVariantsField
+
+
+class UniqueUserFieldsMixin:
+    """
+    Checks username/email/phone_number uniqueness with one query instead of
+    one UniqueValidator query per field, and reports every conflicting
+    field at once. The unique indexes remain the real guard: an
+    IntegrityError from a concurrent insert is turned back into the same
+    field errors.
+    """
+    unique_messages = {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        for name in self.unique_messages:
+            if name in fields:
+                fields[name].validators = [
+                    validator for validator in fields[name].validators
+                    if not isinstance(validator, UniqueValidator)
+                ]
+        return fields
+
+    def get_unique_conflicts(self, attrs):
+        values = {name: attrs[name] for name in self.unique_messages if attrs.get(name)}
+        if 'email' in values:
+            values['email'] = User.objects.normalize_email(values['email'])
+        if not values:
+            return {}
+
+        query = Q()
+        for name, value in values.items():
+            query |= Q(**{name: value})
+        queryset = User.objects.filter(query)
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+
+        errors = {}
+        for row in queryset.values(*values):
+            for name, value in values.items():
+                if row[name] == value:
+                    errors[name] = [self.unique_messages[name]]
+        return errors
+
+    def validate_unique_fields(self, attrs):
+        errors = self.get_unique_conflicts(attrs)
+        if errors:
+            raise serializers.ValidationError(errors)
+
+    def save_unique(self, save, attrs):
+        try:
+            with transaction.atomic():
+                return save()
+        except IntegrityError:
+            # درخواست همزمان بین اعتبارسنجی و ذخیره همان مقدار را ثبت کرده است
+            errors = self.get_unique_conflicts(attrs)
+            if not errors:
+                raise
+            raise serializers.ValidationError(errors)
+
+
+class UserRegisterSerializer(UniqueUserFieldsMixin, serializers.ModelSerializer):
+    unique_messages = {
+        'username': 'این نام کاربری از قبل موجود می باشد',
+        'email': 'این ایمیل از قبل موجود می باشد',
+        'phone_number': 'این شماره تلفن از قبل موجود می باشد',
+    }
 
-
-class UserRegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     confirm_password = serializers.CharField(write_only=True)
 
@@ -34,36 +104,21 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         except DjangoValidationError as e:
             raise serializers.ValidationError({'password': list(e.messages)})
 
+        self.validate_unique_fields(data)
         return data
 
-    def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
-            raise serializers.ValidationError('این ایمیل از قبل موجود می باشد')
-        return value
-
-    def validate_username(self, value):
-        if User.objects.filter(username=value).exists():
-            raise serializers.ValidationError('این نام کاربری از قبل موجود می باشد')
-        return value
-
-    def validate_phone_number(self, value):
-        # Only validate if phone number is provided
-        if value and User.objects.filter(phone_number=value).exists():
-            raise serializers.ValidationError('این شماره تلفن از قبل موجود می باشد')
-        return value
     def create(self, validated_data):
         image = validated_data.get('image')
         if not image:
-            image = 'profile_pics/default.png'
-        user = User.objects.create_user(
+            image = User.DEFAULT_IMAGE
+        return self.save_unique(lambda: User.objects.create_user(
             username=validated_data['username'],
             email=validated_data['email'],
             password=validated_data['password'],
             phone_number=validated_data.get('phone_number'),
             role=validated_data.get('role', 'CUSTOMER'),
             image=image,
-        )
-        return user
+        ), validated_data)
 
 
 class UserProfileSerializer(serializers.ModelSerializer):
@@ -76,7 +131,13 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ['email', 'role', 'date_joined']
 
 
-class UserUpdateSerializer(serializers.ModelSerializer):
+class UserUpdateSerializer(UniqueUserFieldsMixin, serializers.ModelSerializer):
+    unique_messages = {
+        'username': 'This username is already taken.',
+        'email': 'این ایمیل قبلاً استفاده شده است.',
+        'phone_number': 'این شماره تلفن از قبل موجود می باشد',
+    }
+
     class Meta:
         model = User
         fields = ['username', 'phone_number', 'image', 'email']
@@ -86,22 +147,27 @@ class UserUpdateSerializer(serializers.ModelSerializer):
             'image': {'required': False},
         }
 
-    def validate_username(self, value):
-        """Check username uniqueness excluding current user"""
-        user = self.context['request'].user
-        if User.objects.filter(username=value).exclude(pk=user.pk).exists():
-            raise serializers.ValidationError("This username is already taken.")
-        return value
+    def validate(self, attrs):
+        # مقایسه با کاربر فعلی (instance) انجام می‌شود
+        self.validate_unique_fields(attrs)
+        return attrs
 
-    def validate_email(self, value):
-        user = self.context['request'].user
-        if User.objects.filter(email=value).exclude(pk=user.pk).exists():
-            raise serializers.ValidationError("این ایمیل قبلاً استفاده شده است.")
-        return value
+    def update(self, instance, validated_data):
+        return self.save_unique(lambda: super(UserUpdateSerializer, self).update(instance, validated_data), validated_data)
 
 
 class HomeImageSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = HomeImage
         fields = '__all__'
 
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
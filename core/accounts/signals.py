@@ -0,0 +1,20 @@
+# django files
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+# your files
+from .models import User
+from .authentication import invalidate_user
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, update_fields=None, **kwargs):
+    # ورود کاربر فقط last_login را تغییر می‌دهد و نیازی به باطل کردن کش نیست
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_user(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
@@ -0,0 +1,54 @@
+# django files
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+# your files
+from .models import User
+from .authentication import invalidate_user
+
+# package files
+from PIL import Image
+from io import BytesIO
+
+
+THUMBNAIL_SIZE = (300, 300)
+
+
+def build_thumbnail(source_name):
+    with default_storage.open(source_name, 'rb') as fh, Image.open(fh) as img:
+        if img.width <= THUMBNAIL_SIZE[0] and img.height <= THUMBNAIL_SIZE[1]:
+            # از قبل کوچک است (مثلاً همان تصویر کوچک دوباره آپلود شده)
+            return source_name
+        image_format = img.format or 'JPEG'
+        img.thumbnail(THUMBNAIL_SIZE)
+        buffer = BytesIO()
+        img.save(buffer, format=image_format, optimize=True, quality=85)
+
+    # ContentAddressedStorage نام را از محتوا می‌سازد؛ از نام منبع فقط پسوند آن استفاده می‌شود
+    return default_storage.save(source_name, ContentFile(buffer.getvalue()))
+
+
+def make_profile_thumbnail(user_id, source_name):
+    """
+    Thumbnails `source_name` into a new blob and points the user at it, but
+    only if the user still has `source_name`; a newer upload that landed
+    meanwhile wins. Thumbnails are remembered per source file, so a
+    duplicate upload is not resized again. Neither the replaced upload nor
+    an unused thumbnail is deleted here; gc_media_blobs reclaims blobs
+    nothing references.
+    """
+    cache_key = f'profile_thumbnail:{source_name}'
+    name = cache.get(cache_key)
+    if name is None or not default_storage.exists(name):
+        name = build_thumbnail(source_name)
+        cache.set(cache_key, name, timeout=None)
+    if name == source_name:
+        return name
+
+    updated = User.objects.filter(pk=user_id, image=source_name).update(image=name)
+    if not updated:
+        return None
+
+    invalidate_user(user_id)
+    return name
@@ -1,3 +1,228 @@
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from rest_framework import serializers
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from salons.models import Salon, SalonMembership, TimeSlot
+from . import authentication
+from .models import User, RevokedToken
+from .revocation import GENERATION_KEY, RevocationList, revoked_tokens
+from .serializers import UserRegisterSerializer, UserUpdateSerializer
+from .tokens import ClaimsRefreshToken
+
+from datetime import date, time, timedelta
+from io import BytesIO, StringIO
+from PIL import Image
+import tempfile
+import time as time_module
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='MANAGER')
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'pass', role='STAFF')
+        cls.salon = Salon.objects.create(name='گلچین', address='تهران', manager=cls.manager)
+        SalonMembership.objects.create(salon=cls.salon, user=cls.staff)
+        TimeSlot.objects.create(
+            salon=cls.salon, date=date(2025, 1, 1), start_time=time(10), end_time=time(11), max_capacity=3
+        )
+
+    def setUp(self):
+        # ابطال‌های setUpTestData با iat توکن‌های تازه در یک ثانیه قرار می‌گیرند
+        authentication._user_cache.clear()
+        authentication.invalidation_cache().clear()
+
+    def authenticate(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def test_claims_token_needs_no_user_or_membership_query(self):
+        client = self.authenticate(ClaimsRefreshToken.for_user(self.staff).access_token)
+        # فقط کوئری لیست تایم اسلات‌ها
+        with self.assertNumQueries(1):
+            response = client.get(reverse('salons:timeslot-list'))
+        self.assertEqual(len(response.json()), 1)
+
+    def test_plain_token_uses_user_cache(self):
+        client = self.authenticate(RefreshToken.for_user(self.staff).access_token)
+        self.assertEqual(client.get(reverse('salons:timeslot-list')).status_code, 200)
+        # کاربر از کش خوانده می‌شود؛ شناسه آرایشگاه‌ها + لیست
+        with self.assertNumQueries(2):
+            client.get(reverse('salons:timeslot-list'))
+
+    def test_role_change_invalidates_claims(self):
+        client = self.authenticate(ClaimsRefreshToken.for_user(self.staff).access_token)
+        self.staff.role = 'CUSTOMER'
+        self.staff.save()
+
+        self.assertEqual(client.get(reverse('salons:timeslot-list')).status_code, 403)
+
+    def test_deactivated_user_is_rejected(self):
+        client = self.authenticate(ClaimsRefreshToken.for_user(self.staff).access_token)
+        self.staff.is_active = False
+        self.staff.save()
+
+        self.assertEqual(client.get(reverse('salons:timeslot-list')).status_code, 401)
+
+    def test_invalidation_in_another_worker_reaches_user_cache(self):
+        client = self.authenticate(RefreshToken.for_user(self.staff).access_token)
+        self.assertEqual(client.get(reverse('salons:timeslot-list')).status_code, 200)
+
+        # کارگر دیگری کاربر را غیرفعال کرده است: فقط زمان ابطال در کش مشترک دیده می‌شود
+        User.objects.filter(pk=self.staff.pk).update(is_active=False)
+        authentication.invalidation_cache().set(authentication.invalidation_key(self.staff.pk), time_module.time())
+
+        self.assertEqual(client.get(reverse('salons:timeslot-list')).status_code, 401)
+
+    def test_inactive_claim_is_rejected(self):
+        token = ClaimsRefreshToken.for_user(self.staff).access_token
+        token['is_active'] = False
+        self.assertEqual(self.authenticate(token).get(reverse('salons:timeslot-list')).status_code, 401)
+
+    @override_settings(USER_CACHE_MAX_SIZE=1)
+    def test_user_cache_is_bounded(self):
+        authentication.get_cached_user(self.manager.pk)
+        authentication.get_cached_user(self.staff.pk)
+        self.assertEqual(list(authentication._user_cache), [self.staff.pk])
+
+    def test_profile_loads_full_user(self):
+        client = self.authenticate(ClaimsRefreshToken.for_user(self.staff).access_token)
+        response = client.get(reverse('accounts:users-profile'))
+        self.assertEqual(response.json()['email'], 'staff@example.com')
+
+
+class RevokedTokenTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('customer', 'customer@example.com', 'pass')
+
+    def setUp(self):
+        revoked_tokens.reset()
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': str(token)}, format='json')
+
+    def test_rotated_refresh_token_is_rejected(self):
+        token = ClaimsRefreshToken.for_user(self.user)
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(RevokedToken.objects.filter(jti=token['jti']).exists())
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(response.json()['refresh']).status_code, 200)
+
+    def test_unknown_jti_skips_table_lookup(self):
+        revoked_tokens.is_revoked('warm-up')
+        with self.assertNumQueries(0):
+            self.assertFalse(revoked_tokens.is_revoked(ClaimsRefreshToken.for_user(self.user)['jti']))
+
+    def test_purge_removes_only_expired_tokens(self):
+        now = timezone.now()
+        RevokedToken.objects.create(jti='expired', expires_at=now - timedelta(minutes=1))
+        RevokedToken.objects.create(jti='live', expires_at=now + timedelta(days=1))
+
+        call_command('purge_revoked_tokens', stdout=StringIO())
+
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
+        self.assertTrue(revoked_tokens.is_revoked('live'))
+
+    def test_purge_in_another_process_rebuilds_the_filter(self):
+        RevokedToken.objects.create(jti='purged', expires_at=timezone.now() + timedelta(days=1))
+        worker = RevocationList()
+        worker.is_revoked('warm-up')
+        self.assertIn('purged', worker._bloom)
+
+        # purge_revoked_tokens در پردازه‌ای دیگر فقط نسل مشترک را در کش عوض می‌کند
+        RevokedToken.objects.all().delete()
+        cache.set(GENERATION_KEY, 'purged', timeout=None)
+        with self.settings(REVOKED_TOKEN_SYNC_INTERVAL=0):
+            worker.is_revoked('warm-up')
+        self.assertNotIn('purged', worker._bloom)
+
+
+class UniqueUserFieldsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('ali', 'ali@example.com', 'pass', phone_number='09120000000')
+
+    def register_data(self, **overrides):
+        data = {
+            'username': 'reza', 'email': 'reza@example.com', 'phone_number': '09121111111',
+            'password': 'S3cure-pass!', 'confirm_password': 'S3cure-pass!',
+        }
+        data.update(overrides)
+        return data
+
+    def test_all_conflicts_reported_with_one_query(self):
+        serializer = UserRegisterSerializer(data=self.register_data(
+            username='ali', email='ali@EXAMPLE.com', phone_number='09120000000'
+        ))
+        with self.assertNumQueries(1):
+            self.assertFalse(serializer.is_valid())
+        self.assertEqual(set(serializer.errors), {'username', 'email', 'phone_number'})
+
+    def test_register_costs_two_statements(self):
+        serializer = UserRegisterSerializer(data=self.register_data())
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(serializer.is_valid())
+            serializer.save()
+        statements = [q['sql'] for q in ctx.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 2)
+
+    def test_integrity_error_maps_to_field_error(self):
+        serializer = UserRegisterSerializer(data=self.register_data())
+        self.assertTrue(serializer.is_valid())
+        # کاربر همزمان بین اعتبارسنجی و ذخیره ثبت می‌شود
+        User.objects.create_user('other', 'reza@example.com', 'pass')
+
+        with self.assertRaises(serializers.ValidationError) as cm:
+            serializer.save()
+        self.assertEqual(set(cm.exception.detail), {'email'})
+
+    def test_update_ignores_own_values(self):
+        serializer = UserUpdateSerializer(self.user, data={'username': 'ali', 'email': 'ali@example.com'}, partial=True)
+        self.assertTrue(serializer.is_valid())
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), BACKGROUND_TASKS_EAGER=True)
+class ProfileImageTests(TestCase):
+    def upload(self, size=(800, 600)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, format='PNG')
+        return SimpleUploadedFile('avatar.png', buffer.getvalue(), content_type='image/png')
+
+    def test_new_image_is_thumbnailed_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            user = User.objects.create_user('sara', 'sara@example.com', 'pass', image=self.upload())
+        self.assertEqual(len(callbacks), 1)
+        uploaded = user.image.name
+
+        user.refresh_from_db()
+        self.assertNotEqual(user.image.name, uploaded)
+        # فایل اصلی دیگر ارجاعی ندارد و با gc_media_blobs پاک می‌شود
+        call_command('gc_media_blobs', min_age=0, stdout=StringIO())
+        self.assertFalse(user.image.storage.exists(uploaded))
+        self.assertTrue(user.image.storage.exists(user.image.name))
+        with Image.open(user.image.path) as img:
+            self.assertLessEqual(max(img.size), 300)
+
+    def test_login_and_default_image_skip_processing(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            user = User.objects.create_user('sara', 'sara@example.com', 'pass', image=User.DEFAULT_IMAGE)
+            user = User.objects.get(pk=user.pk)
+            user.last_login = timezone.now()
+            user.save(update_fields=['last_login'])
+            user.first_name = 'Sara'
+            user.save()
+        self.assertEqual(callbacks, [])
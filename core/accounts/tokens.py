@@ -0,0 +1,62 @@
+# django files
+from django.utils.translation import gettext_lazy as _
+
+# rest files
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.settings import api_settings
+
+# your files
+from salons.models import Salon
+from .authentication import get_cached_user, get_invalidated_at
+from .models import User
+from .revocation import revoked_tokens
+
+# package files
+from datetime import datetime, timezone
+
+
+def add_user_claims(token, user):
+    """نقش و آرایشگاه‌های کاربر در توکن تا احراز هویت به دیتابیس نیاز نداشته باشد"""
+    token['username'] = user.username
+    token['role'] = user.role
+    token['is_active'] = user.is_active
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    if user.role in ('MANAGER', 'STAFF'):
+        salon_ids, managed_ids = Salon.access_for_user(user)
+        token['salon_ids'] = sorted(salon_ids)
+        token['managed_salon_ids'] = sorted(managed_ids)
+    else:
+        token['salon_ids'] = []
+        token['managed_salon_ids'] = []
+
+
+class ClaimsRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        add_user_claims(token, user)
+        return token
+
+    @property
+    def access_token(self):
+        # claim ها هنگام refresh دوباره از کاربر خوانده می‌شوند تا تغییر نقش دیر اعمال نشود
+        access = super().access_token
+        user_id = User._meta.pk.to_python(self[api_settings.USER_ID_CLAIM])
+        user = get_cached_user(user_id, get_invalidated_at(user_id))
+        if user is not None:
+            add_user_claims(access, user)
+        return access
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if revoked_tokens.is_revoked(self[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        """TokenRefreshSerializer هنگام چرخش توکن (BLACKLIST_AFTER_ROTATION) این متد را صدا می‌زند"""
+        expires_at = datetime.fromtimestamp(self['exp'], tz=timezone.utc)
+        if not revoked_tokens.revoke(self[api_settings.JTI_CLAIM], expires_at):
+            # همین توکن همزمان در درخواست دیگری چرخانده شده است
+            raise TokenError(_("Token is blacklisted"))
@@ -6,15 +6,17 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.permissions import IsAdminUser
 # your files
 from .models import User, HomeImage
+from .authentication import get_full_user
 from .serializers import (
     UserRegisterSerializer,
     UserProfileSerializer,
     UserUpdateSerializer, HomeImageSerializer
 )
+from core.throttling import RegisterThrottle
 
 
 class UserViewSet(viewsets.ViewSet):
-    @action(detail=False, methods=['post'], permission_classes=[AllowAny])
+    @action(detail=False, methods=['post'], permission_classes=[AllowAny], throttle_classes=[RegisterThrottle])
     def register(self, request):
         serializer = UserRegisterSerializer(data=request.data)
         if serializer.is_valid():
@@ -24,13 +26,14 @@ class UserViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def profile(self, request):
-        serializer = UserProfileSerializer(request.user)
+        serializer = UserProfileSerializer(get_full_user(request))
         return Response(serializer.data)
 
     @action(detail=False, methods=['put', 'patch'], permission_classes=[IsAuthenticated])
     def update_profile(self, request):
+        user = get_full_user(request)
         serializer = UserUpdateSerializer(
-            request.user,
+            user,
             data=request.data,
             partial=True,
             context={'request': request}
@@ -38,7 +41,7 @@ class UserViewSet(viewsets.ViewSet):
 
         if serializer.is_valid():
             serializer.save()
-            return Response(UserProfileSerializer(request.user).data)
+            return Response(UserProfileSerializer(user).data)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
@@ -1,38 +1,53 @@
 # django files
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 
 #your files
 from .models import Service, Appointment
+from core.admin import PrefixAutocompleteMixin, is_autocomplete
 
 
 @admin.register(Service)
-class ServiceAdmin(admin.ModelAdmin):
+class ServiceAdmin(PrefixAutocompleteMixin, admin.ModelAdmin):
     list_display = ('name', 'salon', 'duration', 'price', 'view_appointments_link', 'show')
     list_filter = ('salon',)
     search_fields = ('name', 'description', 'salon__name', 'show')
     list_editable = ('duration', 'price')
+    list_select_related = ('salon',)
+    autocomplete_search_fields = ('^name',)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if is_autocomplete(request):
+            return queryset.order_by('name')
+        return queryset.annotate(appointments_total=Count('appointments'))
 
     def view_appointments_link(self, obj):
-        count = obj.appointments.count()
+        count = obj.appointments_total
         if count == 0:
             return "بدون رزرو"
         url = reverse('admin:appointments_appointment_changelist') + f'?service__id__exact={obj.id}'
         return format_html('<a href="{}">مشاهده رزروها ({})</a>', url, count)
 
     view_appointments_link.short_description = "رزروها"
+    view_appointments_link.admin_order_field = 'appointments_total'
 
 
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
     list_display = (
     'customer_info', 'time_slot_info', 'service_info', 'staff_info', 'status', 'created_at', 'actions_buttons')
-    list_filter = ('status', 'time_slot__salon', 'time_slot__date', 'service', 'staff')
-    search_fields = ('customer__username', 'customer__email', 'notes', 'time_slot__salon__name')
+    list_filter = ('status', 'salon', 'date', 'service', 'staff')
+    search_fields = ('customer__username', 'customer__email', 'notes', 'salon__name')
     readonly_fields = ('created_at', 'customer_info', 'time_slot_info', 'service_info', 'staff_info')
-    date_hierarchy = 'time_slot__date'
+    date_hierarchy = 'date'
+    # ستون‌های *_info همه از همین join‌ها خوانده می‌شوند
+    list_select_related = ('customer', 'time_slot__salon', 'service', 'staff')
+    # به جای select با همه ردیف‌ها (به‌خصوص همه تایم اسلات‌ها)
+    autocomplete_fields = ('customer', 'time_slot', 'service', 'staff')
 
     fieldsets = (
         ('اطلاعات اصلی', {
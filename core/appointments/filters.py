@@ -0,0 +1,15 @@
+# django files
+import django_filters
+
+# your files
+from .models import Appointment
+
+
+class AppointmentFilter(django_filters.FilterSet):
+    # نام‌های قدیمی فیلترها حفظ شده‌اند اما روی ستون‌های کپی‌شده (بدون join) اجرا می‌شوند
+    time_slot__salon = django_filters.NumberFilter(field_name='salon_id')
+    time_slot__date = django_filters.DateFilter(field_name='date')
+
+    class Meta:
+        model = Appointment
+        fields = ['status', 'salon', 'date', 'service', 'staff']
@@ -0,0 +1,81 @@
+# django files
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+# rest files
+from rest_framework.renderers import JSONRenderer
+
+# your files
+from accounts.models import User
+from salons.models import Salon, TimeSlot
+from salons.serializers import TimeSlotSerializer
+from appointments.models import Service, Appointment
+from appointments.serializers import AppointmentListSerializer
+from core.renderers import FastJSONRenderer, MessagePackRenderer, msgpack
+
+# package files
+from datetime import date, time, timedelta
+from decimal import Decimal
+import time as timer
+
+
+class Command(BaseCommand):
+    help = "Compare render time and payload size of the API renderers on appointment and time slot lists"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        renderers = [('JSONRenderer', JSONRenderer()), ('FastJSONRenderer', FastJSONRenderer())]
+        if msgpack is not None:
+            renderers.append(('MessagePackRenderer', MessagePackRenderer()))
+        else:
+            self.stdout.write(self.style.WARNING("msgpack is not installed, skipping MessagePackRenderer"))
+
+        for size in options['sizes']:
+            appointments, time_slots = self.build_rows(size)
+            datasets = [
+                ('appointments', AppointmentListSerializer(appointments, many=True).data),
+                ('timeslots', TimeSlotSerializer(time_slots, many=True).data),
+            ]
+            for dataset_name, data in datasets:
+                for renderer_name, renderer in renderers:
+                    best = None
+                    for _ in range(options['repeat']):
+                        started = timer.perf_counter()
+                        payload = renderer.render(data, renderer.media_type, {})
+                        elapsed = timer.perf_counter() - started
+                        best = elapsed if best is None else min(best, elapsed)
+                    self.stdout.write(
+                        f"{dataset_name:<13} rows={size:<6} {renderer_name:<20} "
+                        f"{best * 1000:8.2f} ms {len(payload):>10} bytes"
+                    )
+
+    def build_rows(self, size):
+        """Unsaved model instances shaped like real list responses, so no database is needed."""
+        manager = User(id=1, username='manager', role='MANAGER')
+        staff = User(id=2, username='staff', role='STAFF')
+        customer = User(id=3, username='customer', role='CUSTOMER')
+        salon = Salon(id=1, name='آرایشگاه گلچین', address='تهران', manager=manager)
+        service = Service(
+            id=1, salon=salon, name='کوتاهی مو', description='',
+            duration=timedelta(minutes=45), price=Decimal('350000.00')
+        )
+        created_at = timezone.now()
+
+        appointments = []
+        time_slots = []
+        for i in range(size):
+            slot = TimeSlot(
+                id=i + 1, salon=salon,
+                date=date(2025, 1, 1) + timedelta(days=i // 10),
+                start_time=time(9 + i % 10, 0), end_time=time(10 + i % 10, 0),
+                max_capacity=3, booked_count=i % 4 if i % 4 < 3 else 3, is_active=True
+            )
+            time_slots.append(slot)
+            appointments.append(Appointment(
+                id=i + 1, customer=customer, staff=staff, service=service,
+                time_slot=slot, status='CONFIRMED', notes='', created_at=created_at
+            ))
+        return appointments, time_slots
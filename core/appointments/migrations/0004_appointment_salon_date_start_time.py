@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_time_slot_fields(apps, schema_editor):
+    Appointment = apps.get_model('appointments', 'Appointment')
+    TimeSlot = apps.get_model('salons', 'TimeSlot')
+    slots = TimeSlot.objects.filter(pk=OuterRef('time_slot_id'))
+    # یک UPDATE برای کل جدول
+    Appointment.objects.update(
+        salon_id=Subquery(slots.values('salon_id')[:1]),
+        date=Subquery(slots.values('date')[:1]),
+        start_time=Subquery(slots.values('start_time')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0003_service_image'),
+        ('salons', '0002_salonmembership'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='salon',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='appointments', to='salons.salon'),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='date',
+            field=models.DateField(editable=False, null=True, verbose_name='تاریخ'),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='start_time',
+            field=models.TimeField(editable=False, null=True, verbose_name='ساعت شروع'),
+        ),
+        migrations.RunPython(backfill_time_slot_fields, migrations.RunPython.noop),
+    ]
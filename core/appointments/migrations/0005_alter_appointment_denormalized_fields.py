@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_appointment_salon_date_start_time'),
+        ('salons', '0002_salonmembership'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='appointment',
+            name='salon',
+            field=models.ForeignKey(db_index=False, editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='appointments', to='salons.salon'),
+        ),
+        migrations.AlterField(
+            model_name='appointment',
+            name='date',
+            field=models.DateField(editable=False, verbose_name='تاریخ'),
+        ),
+        migrations.AlterField(
+            model_name='appointment',
+            name='start_time',
+            field=models.TimeField(editable=False, verbose_name='ساعت شروع'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['salon', 'date', 'start_time'], name='appt_salon_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['staff', 'date', 'start_time'], name='appt_staff_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['customer', 'date'], name='appt_customer_date_idx'),
+        ),
+    ]
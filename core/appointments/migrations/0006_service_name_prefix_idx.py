@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:10
+
+from django.db import migrations
+
+from core.operations import AddPrefixSearchIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0005_alter_appointment_denormalized_fields'),
+    ]
+
+    operations = [
+        # جستجوی پیشوندی ویجت‌های autocomplete ادمین
+        AddPrefixSearchIndex(model_name='service', field_name='name', name='appointments_service_name_prefix'),
+    ]
@@ -72,6 +72,29 @@ class Appointment(models.Model):
     notes = models.TextField(blank=True, verbose_name="یادداشت‌ها")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # کپی از تایم اسلات تا داشبوردها بدون join روی یک ایندکس اجرا شوند؛ در save همگام می‌شوند
+    salon = models.ForeignKey(
+        Salon,
+        on_delete=models.CASCADE,
+        related_name='appointments',
+        editable=False,
+        db_index=False
+    )
+    date = models.DateField(editable=False, verbose_name="تاریخ")
+    start_time = models.TimeField(editable=False, verbose_name="ساعت شروع")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['salon', 'date', 'start_time'], name='appt_salon_date_idx'),
+            models.Index(fields=['staff', 'date', 'start_time'], name='appt_staff_date_idx'),
+            models.Index(fields=['customer', 'date'], name='appt_customer_date_idx'),
+        ]
+
+    def sync_time_slot_fields(self):
+        self.salon_id = self.time_slot.salon_id
+        self.date = self.time_slot.date
+        self.start_time = self.time_slot.start_time
+
     def clean(self):
         if not self.time_slot.is_available():
             raise ValidationError("این بازه زمانی دیگر در دسترس نیست")
@@ -81,6 +104,13 @@ class Appointment(models.Model):
             if self.time_slot.available_capacity <= 0:
                 raise ValidationError("ظرفیت این بازه زمانی تکمیل شده است")
 
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.sync_time_slot_fields()
+        elif 'time_slot' in update_fields:
+            self.sync_time_slot_fields()
+            kwargs['update_fields'] = {*update_fields, 'salon', 'date', 'start_time'}
+
         super().save(*args, **kwargs)
 
         if self.pk is None:  # فقط برای رزروهای جدید
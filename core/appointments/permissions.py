@@ -1,6 +1,8 @@
 # appointments/permissions.py
 from rest_framework import permissions
 
+from salons.permissions import get_salon_ids
+
 class IsSalonManager(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.is_authenticated and request.user.role == 'MANAGER'
@@ -15,13 +17,12 @@ class IsCustomer(permissions.BasePermission):
 
 class IsAppointmentOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.customer == request.user
+        return obj.customer_id == request.user.pk
 
 class IsSalonStaff(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
+        # شناسه آرایشگاه‌ها از کش درخواست خوانده می‌شود؛ بدون کوئری اضافه
         return (
-            obj.time_slot.salon.managed_salons.filter(
-                manager=request.user
-            ).exists() or
-            obj.staff == request.user
+            obj.staff_id == request.user.pk or
+            obj.salon_id in get_salon_ids(request)
         )
\ No newline at end of file
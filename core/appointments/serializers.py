@@ -4,6 +4,7 @@ from django.utils import timezone
 from .models import Service, Appointment
 from accounts.serializers import UserProfileSerializer
 from salons.serializers import TimeSlotSerializer
+from core import metrics
 
 
 class ServiceSerializer(serializers.ModelSerializer):
@@ -36,15 +37,19 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
         ]
 
     def validate(self, data):
+        metrics.bookings_attempted.inc()
+
         # بررسی در دسترس بودن تایم اسلات
         time_slot = data.get('time_slot')
         if not time_slot.is_available():
+            metrics.bookings_rejected.labels(reason='unavailable').inc()
             raise serializers.ValidationError(
                 {"time_slot": "این بازه زمانی دیگر در دسترس نیست"}
             )
 
         # بررسی ظرفیت تایم اسلات
         if time_slot.available_capacity <= 0:
+            metrics.bookings_rejected.labels(reason='capacity').inc()
             raise serializers.ValidationError(
                 {"time_slot": "ظرفیت این بازه زمانی تکمیل شده است"}
             )
@@ -53,11 +58,12 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
         customer = data.get('customer')
         existing_appointments = Appointment.objects.filter(
             customer=customer,
-            time_slot__date=time_slot.date,
+            date=time_slot.date,
             status__in=['PENDING', 'CONFIRMED']
         ).exclude(pk=self.instance.pk if self.instance else None)
 
         if existing_appointments.exists():
+            metrics.bookings_rejected.labels(reason='conflict').inc()
             raise serializers.ValidationError(
                 {"time_slot": "شما در این تاریخ رزرو دیگری دارید"}
             )
@@ -69,6 +75,7 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
         # به‌روزرسانی شمارنده رزروهای تایم اسلات
         appointment.time_slot.booked_count += 1
         appointment.time_slot.save()
+        metrics.bookings_succeeded.inc()
         return appointment
 
 
@@ -89,9 +96,9 @@ class AppointmentDetailSerializer(serializers.ModelSerializer):
 
 
 class AppointmentListSerializer(serializers.ModelSerializer):
-    salon_name = serializers.CharField(source='time_slot.salon.name', read_only=True)
-    date = serializers.DateField(source='time_slot.date', read_only=True)
-    start_time = serializers.TimeField(source='time_slot.start_time', read_only=True)
+    salon_name = serializers.CharField(source='salon.name', read_only=True)
+    date = serializers.DateField(read_only=True)
+    start_time = serializers.TimeField(read_only=True)
     end_time = serializers.TimeField(source='time_slot.end_time', read_only=True)
     service_name = serializers.CharField(source='service.name', read_only=True)
     customer_name = serializers.CharField(source='customer.username', read_only=True)
@@ -1,3 +1,313 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.middleware import QueryBudgetExceeded
+from core.metrics import endpoint_snapshot
+from core import profiling
+from accounts import authentication
+
+from accounts.models import User
+from salons.models import Salon, SalonMembership, TimeSlot
+from .models import Service, Appointment
+
+from datetime import date, time, timedelta
+from decimal import Decimal
+import json
+import tempfile
+
+
+class AppointmentTestMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='MANAGER')
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'pass', role='STAFF')
+        cls.customer = User.objects.create_user('customer', 'customer@example.com', 'pass', role='CUSTOMER')
+        cls.salon = Salon.objects.create(name='گلچین', address='تهران', manager=cls.manager)
+        cls.service = Service.objects.create(
+            salon=cls.salon, name='کوتاهی مو', description='',
+            duration=timedelta(minutes=45), price=Decimal('350000.00')
+        )
+
+    @classmethod
+    def create_appointments(cls, count, start=0):
+        appointments = []
+        for i in range(start, start + count):
+            slot = TimeSlot.objects.create(
+                salon=cls.salon, date=date(2025, 1, 1) + timedelta(days=i),
+                start_time=time(10, 0), end_time=time(11, 0), max_capacity=3
+            )
+            appointments.append(Appointment.objects.create(
+                customer=cls.customer, staff=cls.staff, service=cls.service, time_slot=slot
+            ))
+        return appointments
+
+
+class AppointmentManagerAccessTests(AppointmentTestMixin, TestCase):
+    def test_staff_membership_does_not_grant_manager_access(self):
+        # مدیر آرایشگاه خودش است اما در «گلچین» فقط آرایشگر
+        other_manager = User.objects.create_user('other', 'other@example.com', 'pass', role='MANAGER')
+        Salon.objects.create(name='دیگر', address='شیراز', manager=other_manager)
+        SalonMembership.objects.create(salon=self.salon, user=other_manager, role='STAFF')
+        appointment = self.create_appointments(1)[0]
+
+        client = APIClient()
+        client.force_authenticate(other_manager)
+        self.assertEqual(client.get(reverse('appointments:appointment-list')).json(), [])
+        url = reverse('appointments:appointment-detail', args=[appointment.pk])
+        self.assertEqual(client.patch(url, {'notes': 'x'}, format='json').status_code, 404)
+        self.assertEqual(client.delete(url).status_code, 404)
+        self.assertTrue(Appointment.objects.filter(pk=appointment.pk).exists())
+
+        # رزرو اختصاص داده شده به خودش مثل کارمند دیده می‌شود
+        Appointment.objects.filter(pk=appointment.pk).update(staff=other_manager)
+        self.assertEqual(len(client.get(reverse('appointments:appointment-list')).json()), 1)
+
+
+class AppointmentStreamingTests(AppointmentTestMixin, TestCase):
+    def setUp(self):
+        self.create_appointments(3)
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def test_stream_matches_regular_list(self):
+        url = reverse('appointments:appointment-list')
+        regular = self.client.get(url).json()
+        response = self.client.get(url, {'stream': 'true'})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), regular)
+
+    def test_stream_my_appointments(self):
+        url = reverse('appointments:appointment-my-appointments')
+        response = self.client.get(url, {'stream': '1'})
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(len(json.loads(b''.join(response.streaming_content))), 3)
+
+
+@override_settings(QUERY_BUDGET_ENFORCE=True)
+class AppointmentQueryBudgetTests(AppointmentTestMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        token = RefreshToken.for_user(self.customer).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_list_stays_within_budget_as_rows_grow(self):
+        url = reverse('appointments:appointment-list')
+        self.create_appointments(2)
+        self.assertEqual(len(self.client.get(url).json()), 2)
+
+        self.create_appointments(20, start=2)
+        self.assertEqual(len(self.client.get(url).json()), 22)
+
+    def test_manager_with_plain_token_stays_within_budget(self):
+        # بدترین حالت: توکن بدون claim و کش کاربر سرد
+        authentication._user_cache.clear()
+        authentication.invalidation_cache().clear()
+        self.create_appointments(3)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.manager).access_token}')
+        for name in ('appointment-list', 'appointment-my-appointments'):
+            authentication._user_cache.clear()
+            self.assertEqual(len(client.get(reverse(f'appointments:{name}')).json()), 3)
+
+    @override_settings(QUERY_BUDGETS={'AppointmentViewSet.list': 0})
+    def test_exceeding_budget_fails(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('appointments:appointment-list'))
+
+    def test_endpoint_metrics_are_recorded(self):
+        self.client.get(reverse('appointments:appointment-list'))
+        stats = endpoint_snapshot()['AppointmentViewSet.list']
+        self.assertGreaterEqual(stats['queries']['count'], 1)
+        self.assertIn('serialize_seconds', stats)
+        self.assertIn('render_seconds', stats)
+
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.force_authenticate(admin)
+        self.assertIn('AppointmentViewSet.list', self.client.get(reverse('endpoint_metrics')).json())
+
+    def test_streamed_list_is_measured_when_consumed(self):
+        self.create_appointments(3)
+        url = reverse('appointments:appointment-my-appointments')
+        before = endpoint_snapshot().get('AppointmentViewSet.my_appointments', {})
+        response = self.client.get(url, {'stream': 'true'})
+        body = b''.join(response.streaming_content)
+
+        stats = endpoint_snapshot()['AppointmentViewSet.my_appointments']
+        self.assertEqual(stats['response_bytes']['sum'] - before.get('response_bytes', {}).get('sum', 0), len(body))
+        self.assertGreater(stats['queries']['sum'] - before.get('queries', {}).get('sum', 0), 0)
+        self.assertEqual(stats['serialize_seconds']['count'] - before.get('serialize_seconds', {}).get('count', 0), 1)
+
+    @override_settings(QUERY_BUDGETS={'AppointmentViewSet.list': 0})
+    def test_streamed_list_budget_is_checked_after_the_stream(self):
+        response = self.client.get(reverse('appointments:appointment-list'), {'stream': 'true'})
+        with self.assertRaises(QueryBudgetExceeded):
+            b''.join(response.streaming_content)
+
+
+class RequestProfilingTests(AppointmentTestMixin, TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(self.settings(PROFILING_DIR=directory.name, PROFILING_SAMPLE_RATE=0))
+
+    def test_signed_header_captures_profile(self):
+        url = reverse('appointments:appointment-list')
+        self.assertNotIn('X-Profile-Id', self.client.get(url, HTTP_X_PROFILE='forged'))
+
+        response = self.client.get(url, HTTP_X_PROFILE=profiling.make_profile_token())
+        self.assertIn('X-Profile-Id', response)
+
+        slowest = profiling.slowest_by_endpoint()
+        self.assertEqual(slowest['AppointmentViewSet.list'][0]['file'], response['X-Profile-Id'])
+
+    def test_profile_list_limit_is_validated(self):
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+        url = reverse('profiles')
+        for limit in ('abc', '0', '1000'):
+            self.assertEqual(self.client.get(url, {'limit': limit}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'limit': '3'}).status_code, 200)
+
+
+class AppointmentDenormalizationTests(AppointmentTestMixin, TestCase):
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            # روی جدول کوچک تست، برنامه‌ریز همیشه seq scan را ترجیح می‌دهد
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+    def test_fields_follow_time_slot_on_create_and_reschedule(self):
+        appointment, = self.create_appointments(1)
+        self.assertEqual(
+            (appointment.salon_id, appointment.date, appointment.start_time),
+            (self.salon.pk, date(2025, 1, 1), time(10, 0)),
+        )
+
+        other_salon = Salon.objects.create(name='دیگر', address='شیراز', manager=self.manager)
+        new_slot = TimeSlot.objects.create(
+            salon=other_salon, date=date(2025, 2, 1), start_time=time(15, 0), end_time=time(16, 0), max_capacity=3
+        )
+        appointment.time_slot = new_slot
+        appointment.save(update_fields=['time_slot'])
+        appointment.refresh_from_db()
+        self.assertEqual(
+            (appointment.salon_id, appointment.date, appointment.start_time),
+            (other_salon.pk, date(2025, 2, 1), time(15, 0)),
+        )
+
+        slot = TimeSlot.objects.get(pk=new_slot.pk)
+        slot.start_time = time(16, 0)
+        slot.end_time = time(17, 0)
+        slot.save()
+        appointment.refresh_from_db()
+        self.assertEqual(appointment.start_time, time(16, 0))
+
+    def test_manager_dashboard_is_single_table_index_scan(self):
+        self.create_appointments(3)
+        queryset = Appointment.objects.filter(
+            salon_id__in=[self.salon.pk], date__gte=date(2025, 1, 1)
+        ).order_by('date', 'start_time')
+
+        self.assertNotIn('JOIN', str(queryset.query))
+        self.assertIn('appt_salon_date_idx', self.explain(queryset))
+
+    def test_staff_dashboard_uses_staff_index(self):
+        self.create_appointments(3)
+        queryset = Appointment.objects.filter(staff=self.staff, date=date(2025, 1, 2)).order_by('start_time')
+
+        self.assertNotIn('JOIN', str(queryset.query))
+        self.assertIn('appt_staff_date_idx', self.explain(queryset))
+
+    def test_legacy_filter_names_use_denormalized_columns(self):
+        self.create_appointments(3)
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        response = client.get(reverse('appointments:appointment-list'), {'time_slot__date': '2025-01-02'})
+        self.assertEqual([row['date'] for row in response.json()], ['2025-01-02'])
+
+
+class AdminChangelistQueryTests(AppointmentTestMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+
+    def assertConstantQueries(self, url, add_rows):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        add_rows()
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_appointment_changelist(self):
+        self.create_appointments(2)
+        self.assertConstantQueries(
+            reverse('admin:appointments_appointment_changelist'), lambda: self.create_appointments(20, start=2)
+        )
+
+    def test_service_changelist(self):
+        self.create_appointments(2)
+
+        def add_services():
+            for i in range(10):
+                Service.objects.create(salon=self.salon, name=f'خدمت {i}', description='',
+                                       duration=timedelta(minutes=30), price=Decimal('100000.00'))
+            self.create_appointments(5, start=2)
+
+        self.assertConstantQueries(reverse('admin:appointments_service_changelist'), add_services)
+        response = self.client.get(reverse('admin:appointments_service_changelist'))
+        self.assertContains(response, 'مشاهده رزروها (7)')
+
+
+class AppointmentAdminAutocompleteTests(AppointmentTestMixin, TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+
+    def autocomplete(self, field_name, term):
+        response = self.client.get(reverse('admin:autocomplete'), {
+            'app_label': 'appointments', 'model_name': 'appointment', 'field_name': field_name, 'term': term,
+        })
+        return [item['text'] for item in response.json()['results']]
+
+    def test_change_form_does_not_load_every_time_slot(self):
+        appointment = self.create_appointments(2)[0]
+        url = reverse('admin:appointments_appointment_change', args=[appointment.pk])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertContains(response, 'class="admin-autocomplete"', count=4)
+
+        self.create_appointments(30, start=2)
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            self.client.get(url)
+
+    def test_time_slot_search_by_salon_and_date(self):
+        self.create_appointments(5)
+        Salon.objects.create(name='گلستان', address='تهران', manager=self.manager)
+
+        self.assertEqual(self.autocomplete('time_slot', 'گلچ 2025-01-03'), ['گلچین - 2025-01-03 10:00:00'])
+        # ۱۴۰۳/۱۰/۱۴ شمسی = 2025-01-03
+        self.assertEqual(self.autocomplete('time_slot', '۱۴۰۳/۱۰/۱۴'), ['گلچین - 2025-01-03 10:00:00'])
+        self.assertEqual(self.autocomplete('time_slot', 'گلستان'), [])
+
+    def test_time_slot_search_without_date_lists_upcoming_slots(self):
+        self.create_appointments(5)
+        today = timezone.localdate()
+        TimeSlot.objects.create(salon=self.salon, date=today, start_time=time(10), end_time=time(11), max_capacity=3)
+
+        self.assertEqual(self.autocomplete('time_slot', 'گلچین'), [f'گلچین - {today} 10:00:00'])
+        self.assertEqual(self.autocomplete('time_slot', ''), [f'گلچین - {today} 10:00:00'])
+
+    def test_user_search_is_prefix_and_respects_role(self):
+        self.assertEqual(self.autocomplete('customer', 'cust'), ['customer'])
+        self.assertEqual(self.autocomplete('customer', 'ustomer'), [])
+        self.assertEqual(self.autocomplete('staff', 'customer'), [])
+        self.assertEqual(self.autocomplete('service', 'کوتا'), ['کوتاهی مو'])
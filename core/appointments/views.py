@@ -6,8 +6,10 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 
 # django files
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import F, ExpressionWrapper, IntegerField
+from django.db.models import F, ExpressionWrapper, IntegerField, Q
 # your files
+from core.streaming import StreamingListMixin
+from core import metrics
 from .models import Service, Appointment
 from .serializers import (
     ServiceSerializer,
@@ -16,10 +18,12 @@ from .serializers import (
     AppointmentListSerializer,
     AppointmentUpdateSerializer
 )
+from .filters import AppointmentFilter
 from .permissions import (
     IsSalonManager, IsStaffMember, IsCustomer,
     IsAppointmentOwner, IsSalonStaff
 )
+from salons.permissions import get_salon_ids
 
 
 class ServiceViewSet(viewsets.ModelViewSet):
@@ -42,20 +46,19 @@ class ServiceViewSet(viewsets.ModelViewSet):
         serializer.save(salon=salon)
 
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = Appointment.objects.all()
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = [
-        'status', 'time_slot__salon', 'time_slot__date',
-        'service', 'staff'
-    ]
+    filterset_class = AppointmentFilter
     search_fields = [
         'customer__username', 'customer__email',
-        'notes', 'time_slot__salon__name'
+        'notes', 'salon__name'
     ]
-    ordering_fields = ['created_at', 'time_slot__date', 'time_slot__start_time']
+    ordering_fields = ['created_at', 'date', 'start_time', 'time_slot__date', 'time_slot__start_time']
     ordering = ['-created_at']
+    # احراز هویت + یک کوئری برای لیست؛ مدیر با توکن بدون claim شناسه آرایشگاه‌ها را هم می‌خواند
+    query_budgets = {'list': 3, 'my_appointments': 3}
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -80,6 +83,10 @@ class AppointmentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         user = self.request.user
         queryset = super().get_queryset()
+        if self.action in ['list', 'my_appointments']:
+            queryset = queryset.select_related('salon', 'time_slot', 'service', 'customer', 'staff')
+        else:
+            queryset = queryset.select_related('time_slot__salon', 'service__salon', 'customer', 'staff')
 
         # مشتری فقط رزروهای خود را می‌بیند
         if user.role == 'CUSTOMER':
@@ -89,9 +96,10 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         elif user.role == 'STAFF':
             return queryset.filter(staff=user)
 
-        # مدیر همه رزروهای آرایشگاه خود را می‌بیند
+        # مدیر همه رزروهای آرایشگاه‌هایی را می‌بیند که مدیر آن‌هاست؛ با عضویت STAFF در آرایشگاه دیگر
+        # فقط رزروهای اختصاص داده شده به خودش را، مثل کارمند
         elif user.role == 'MANAGER':
-            return queryset.filter(time_slot__salon__managed_salons__manager=user)
+            return queryset.filter(Q(salon_id__in=get_salon_ids(self.request, managed=True)) | Q(staff=user))
 
         return queryset
 
@@ -124,6 +132,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
 
         appointment.status = 'CANCELLED'
         appointment.save()
+        metrics.appointment_cancellations.inc()
         serializer = self.get_serializer(appointment)
         return Response(serializer.data)
 
@@ -145,8 +154,10 @@ class AppointmentViewSet(viewsets.ModelViewSet):
     def my_appointments(self, request):
         """رزروهای کاربر فعلی"""
         queryset = self.get_queryset()
+        if self.wants_stream(request):
+            return self.stream_queryset(queryset)
         serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response(self.serialize_data(serializer))
 
     @action(detail=False, methods=['get'])
     def available_slots(self, request):
@@ -1,8 +1,18 @@
 # admin.py
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models import Count
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect
 from django.utils.html import format_html
-from django.urls import reverse
+from django.urls import path, reverse
 from .models import ContactInfo, SocialLink, Honors, License, Location, CommunicationWithUs
+from . import counters, exports
+from .search import search_messages
+from core.text import normalize_persian
 
 class SocialLinkInline(admin.TabularInline):
     model = SocialLink
@@ -46,12 +56,16 @@ class ContactInfoAdmin(admin.ModelAdmin):
 
     logo_preview.short_description = "پیش‌نمایش لوگو"
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(social_links_total=Count('social_links'))
+
     def social_links_count(self, obj):
-        count = obj.social_links.count()
+        count = obj.social_links_total
         url = reverse('admin:contactUs_sociallink_changelist') + f'?contact__id__exact={obj.id}'
         return format_html('<a href="{}">{} لینک</a>', url, count)
 
     social_links_count.short_description = "شبکه‌های اجتماعی"
+    social_links_count.admin_order_field = 'social_links_total'
 
 
 @admin.register(SocialLink)
@@ -105,7 +119,12 @@ class LicenseAdmin(admin.ModelAdmin):
 admin.site.register(Location)
 
 
-
+class MessageChangeList(ChangeList):
+    def get_ordering(self, request, queryset):
+        # هنگام جستجو (بدون مرتب‌سازی دستی) نتایج مرتبط‌تر اول نمایش داده می‌شوند
+        if 'search_rank' in queryset.query.annotations and not self.params.get(ORDER_VAR):
+            return ['-search_rank', '-created_at', '-pk']
+        return super().get_ordering(request, queryset)
 
 
 @admin.register(CommunicationWithUs)
@@ -113,7 +132,7 @@ class CommunicationWithUsAdmin(admin.ModelAdmin):
     # فیلدهایی که در لیست نمایش داده می‌شوند
     list_display = ('full_name', 'email', 'phone', 'message_preview', 'is_read_status', 'created_at')
 
-    # فیلدهای قابل جستجو
+    # فیلدهای قابل جستجو؛ جستجو روی ایندکس تمام‌متن انجام می‌شود (get_search_results)
     search_fields = ('full_name', 'email', 'phone', 'message')
 
     # فیلترهای سمت راست صفحه
@@ -128,6 +147,14 @@ class CommunicationWithUsAdmin(admin.ModelAdmin):
     # فیلدهای فقط خواندنی
     readonly_fields = ('created_at',)
 
+    def get_search_results(self, request, queryset, search_term):
+        if not normalize_persian(search_term):
+            return queryset, False
+        return search_messages(queryset, search_term), False
+
+    def get_changelist(self, request, **kwargs):
+        return MessageChangeList
+
     # سفارشی‌سازی ستون‌ها
     def message_preview(self, obj):
         """نمایش پیش‌نمایش پیام با محدودیت کاراکتر"""
@@ -172,7 +199,7 @@ class CommunicationWithUsAdmin(admin.ModelAdmin):
     # سفارشی‌سازی هدر ادمین
     def changelist_view(self, request, extra_context=None):
         extra_context = extra_context or {}
-        extra_context['title'] = "مدیریت پیام‌های کاربران"
+        extra_context['title'] = f"مدیریت پیام‌های کاربران ({counters.unread_count()} خوانده نشده)"
         return super().changelist_view(request, extra_context=extra_context)
 
     # سفارشی‌سازی فرم ویرایش
@@ -193,11 +220,14 @@ class CommunicationWithUsAdmin(admin.ModelAdmin):
         return form
 
     # اضافه کردن دکمه‌های عملیات انبوه
-    actions = ['mark_as_read', 'mark_as_unread', 'export_to_excel']
+    actions = ['mark_as_read', 'mark_as_unread', 'export_to_excel', 'export_to_csv']
 
     def mark_as_read(self, request, queryset):
         """علامت‌گذاری پیام‌ها به عنوان خوانده شده"""
-        updated = queryset.update(is_read=True)
+        # فقط ردیف‌هایی که واقعاً تغییر می‌کنند شمرده می‌شوند
+        with transaction.atomic():
+            updated = queryset.filter(is_read=False).update(is_read=True)
+            counters.adjust_unread(-updated)
         self.message_user(
             request,
             f"{updated} پیام به عنوان خوانده شده علامت‌گذاری شدند.",
@@ -208,7 +238,9 @@ class CommunicationWithUsAdmin(admin.ModelAdmin):
 
     def mark_as_unread(self, request, queryset):
         """علامت‌گذاری پیام‌ها به عنوان خوانده نشده"""
-        updated = queryset.update(is_read=False)
+        with transaction.atomic():
+            updated = queryset.filter(is_read=True).update(is_read=False)
+            counters.adjust_unread(updated)
         self.message_user(
             request,
             f"{updated} پیام به عنوان خوانده نشده علامت‌گذاری شدند.",
@@ -217,97 +249,71 @@ class CommunicationWithUsAdmin(admin.ModelAdmin):
 
     mark_as_unread.short_description = "علامت‌گذاری به عنوان خوانده نشده"
 
+    def export(self, request, queryset, fmt):
+        """
+        خروجی کوچک مستقیم دانلود می‌شود؛ بالاتر از CONTACT_EXPORT_ASYNC_THRESHOLD
+        در پس‌زمینه ساخته می‌شود و لینک دانلود آن (فقط برای ادمین) نمایش داده می‌شود.
+        """
+        threshold = getattr(settings, 'CONTACT_EXPORT_ASYNC_THRESHOLD', 5000)
+        if queryset.count() > threshold:
+            name = exports.queue_export(queryset, fmt)
+            url = reverse('admin:contactUs_communicationwithus_export', args=[name])
+            self.message_user(
+                request,
+                format_html('خروجی در حال آماده‌سازی است؛ چند لحظه دیگر از <a href="{}">این لینک</a> دانلود کنید.', url),
+                'success'
+            )
+            return None
+
+        filename = f'messages.{fmt}'
+        if fmt == 'csv':
+            response = StreamingHttpResponse(exports.iter_csv(queryset), content_type=exports.CONTENT_TYPES['csv'])
+        else:
+            response = HttpResponse(content_type=exports.CONTENT_TYPES['xlsx'])
+            exports.write_xlsx(queryset, response)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
     def export_to_excel(self, request, queryset):
         """خروجی Excel از پیام‌های انتخاب شده"""
-        try:
-            from openpyxl import Workbook
-            from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
-            from openpyxl.utils import get_column_letter
-            from django.http import HttpResponse
-        except ImportError:
-            self.message_user(request, "برای خروجی اکسل باید کتابخانه openpyxl نصب شود: pip install openpyxl", 'error')
-            return
-
-        # ایجاد یک Workbook جدید
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "پیام‌های کاربران"
-
-        # تعریف استایل‌ها
-        header_font = Font(name='Arial', bold=True, size=12, color='FFFFFF')
-        header_fill = PatternFill(start_color='4F81BD', end_color='4F81BD', fill_type='solid')
-        header_alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-
-        # تعریف حاشیه‌ها
-        thin_border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
-        )
-
-        # نوشتن هدر جدول
-        headers = ['نام کامل', 'ایمیل', 'شماره تلفن', 'متن پیام', 'وضعیت خوانده شده', 'تاریخ ثبت']
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num)
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = header_alignment
-            cell.border = thin_border
-
-        # نوشتن داده‌ها
-        for row_num, message in enumerate(queryset, 2):
-            # نام کامل
-            cell = ws.cell(row=row_num, column=1, value=message.full_name)
-            cell.border = thin_border
-
-            # ایمیل
-            cell = ws.cell(row=row_num, column=2, value=message.email)
-            cell.border = thin_border
-
-            # شماره تلفن
-            cell = ws.cell(row=row_num, column=3, value=message.phone or "")
-            cell.border = thin_border
-
-            # متن پیام
-            cell = ws.cell(row=row_num, column=4, value=message.message)
-            cell.border = thin_border
-            cell.alignment = Alignment(horizontal='left', vertical='top', wrap_text=True)
-
-            # وضعیت خوانده شده
-            status = "خوانده شده" if message.is_read else "خوانده نشده"
-            cell = ws.cell(row=row_num, column=5, value=status)
-            cell.border = thin_border
-            cell.alignment = Alignment(horizontal='center')
-
-            # تاریخ ثبت
-            date_value = message.created_at.strftime("%Y/%m/%d %H:%M") if message.created_at else ""
-            cell = ws.cell(row=row_num, column=6, value=date_value)
-            cell.border = thin_border
-            cell.alignment = Alignment(horizontal='center')
-
-        # تنظیم عرض ستون‌ها
-        column_widths = [20, 25, 15, 50, 20, 20]
-        for i, width in enumerate(column_widths, 1):
-            ws.column_dimensions[get_column_letter(i)].width = width
-
-        # تنظیم ارتفاع ردیف هدر
-        ws.row_dimensions[1].height = 25
-
-        # ایجاد پاسخ HTTP
-        response = HttpResponse(
-            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        response['Content-Disposition'] = 'attachment; filename="messages.xlsx"'
-
-        # ذخیره Workbook در پاسخ
-        wb.save(response)
-
-        return response
+        return self.export(request, queryset, 'xlsx')
 
     export_to_excel.short_description = "خروجی Excel از پیام‌ها"
 
+    def export_to_csv(self, request, queryset):
+        """خروجی CSV از پیام‌های انتخاب شده"""
+        return self.export(request, queryset, 'csv')
+
+    export_to_csv.short_description = "خروجی CSV از پیام‌ها"
+
+    def get_urls(self):
+        urls = [
+            path(
+                'exports/<str:name>/',
+                self.admin_site.admin_view(self.download_export),
+                name='contactUs_communicationwithus_export',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def download_export(self, request, name):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        status = exports.get_export_status(name)
+        if status is None:
+            raise Http404("خروجی وجود ندارد یا منقضی شده است")
+        if status != 'ready':
+            if status == 'failed':
+                self.message_user(request, "ساخت خروجی با خطا متوقف شد؛ دوباره تلاش کنید.", 'error')
+            else:
+                self.message_user(request, "خروجی هنوز آماده نیست؛ چند لحظه دیگر دوباره تلاش کنید.", 'warning')
+            return redirect('admin:contactUs_communicationwithus_changelist')
+        export_path = exports.get_export_path(name)
+        return FileResponse(
+            open(export_path, 'rb'), as_attachment=True, filename=export_path.name,
+            content_type=exports.CONTENT_TYPES[export_path.suffix[1:]],
+        )
+
 
     # سفارشی‌سازی نمایش جزئیات
     fieldsets = (
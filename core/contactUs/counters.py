@@ -0,0 +1,64 @@
+# django files
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+# your files
+from .models import CommunicationWithUs, MessageCounter
+
+
+UNREAD = 'unread'
+UNREAD_CACHE_KEY = 'contactUs:unread_count'
+# هر اختلاف احتمالی بین کش و ردیف شمارنده حداکثر به این مدت باقی می‌ماند
+CACHE_TIMEOUT = 300
+
+
+def adjust_unread(delta):
+    """
+    Adds `delta` to the unread counter row inside the caller's transaction
+    (so it commits or rolls back with the messages) and refreshes the
+    cached value once the transaction commits.
+    """
+    if not delta:
+        return
+    updated = MessageCounter.objects.filter(key=UNREAD).update(value=F('value') + delta)
+    if not updated:
+        # ردیف شمارنده وجود ندارد؛ از روی جدول ساخته می‌شود
+        reconcile_unread()
+        return
+    transaction.on_commit(refresh_cache)
+
+
+def refresh_cache():
+    value = MessageCounter.objects.filter(key=UNREAD).values_list('value', flat=True).first()
+    if value is None:
+        cache.delete(UNREAD_CACHE_KEY)
+    else:
+        cache.set(UNREAD_CACHE_KEY, value, timeout=CACHE_TIMEOUT)
+    return value
+
+
+def unread_count():
+    count = cache.get(UNREAD_CACHE_KEY)
+    if count is None:
+        count = refresh_cache()
+    if count is None:
+        count = reconcile_unread()[1]
+    return count
+
+
+def reconcile_unread():
+    """
+    Recounts unread messages (over the partial index) and corrects the
+    counter row and the cache. Returns (previous, actual); previous is None
+    if the row did not exist.
+    """
+    with transaction.atomic():
+        counter, created = MessageCounter.objects.select_for_update().get_or_create(key=UNREAD)
+        previous = None if created else counter.value
+        actual = CommunicationWithUs.objects.filter(is_read=False).count()
+        if previous != actual:
+            counter.value = actual
+            counter.save(update_fields=['value'])
+    transaction.on_commit(refresh_cache)
+    return previous, actual
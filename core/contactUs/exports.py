@@ -0,0 +1,183 @@
+# django files
+from django.conf import settings
+from django.utils import timezone
+
+# your files
+from core import background
+
+# package files
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.utils import get_column_letter
+from pathlib import Path
+import csv
+import os
+import secrets
+import time
+
+
+HEADERS = ['نام کامل', 'ایمیل', 'شماره تلفن', 'متن پیام', 'وضعیت خوانده شده', 'تاریخ ثبت']
+FIELDS = ('full_name', 'email', 'phone', 'message', 'is_read', 'created_at')
+COLUMN_WIDTHS = [20, 25, 15, 50, 20, 20]
+CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# استایل‌ها یک بار ساخته می‌شوند و بین همه سلول‌ها مشترک هستند
+THIN = Side(style='thin')
+BORDER = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
+HEADER_FONT = Font(name='Arial', bold=True, size=12, color='FFFFFF')
+HEADER_FILL = PatternFill(start_color='4F81BD', end_color='4F81BD', fill_type='solid')
+CENTER_WRAP = Alignment(horizontal='center', vertical='center', wrap_text=True)
+TOP_LEFT_WRAP = Alignment(horizontal='left', vertical='top', wrap_text=True)
+CENTER = Alignment(horizontal='center')
+COLUMN_ALIGNMENTS = [None, None, None, TOP_LEFT_WRAP, CENTER, CENTER]
+
+
+def iter_rows(queryset):
+    """ردیف‌ها به صورت tuple و دسته‌ای از دیتابیس خوانده می‌شوند، نه به صورت شیء مدل"""
+    for full_name, email, phone, message, is_read, created_at in (
+        queryset.order_by('-created_at').values_list(*FIELDS).iterator(chunk_size=CHUNK_SIZE)
+    ):
+        yield (
+            full_name,
+            email,
+            phone or "",
+            message,
+            "خوانده شده" if is_read else "خوانده نشده",
+            timezone.localtime(created_at).strftime("%Y/%m/%d %H:%M") if created_at else "",
+        )
+
+
+def write_xlsx(queryset, fh):
+    """
+    Write-only workbook: rows are streamed to the zip file as they are
+    produced instead of being kept as cell objects in memory.
+    """
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("پیام‌های کاربران")
+    for i, width in enumerate(COLUMN_WIDTHS, 1):
+        ws.column_dimensions[get_column_letter(i)].width = width
+    ws.row_dimensions[1].height = 25
+
+    def styled(value, alignment=None, header=False):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.border = BORDER
+        if header:
+            cell.font = HEADER_FONT
+            cell.fill = HEADER_FILL
+        if alignment is not None:
+            cell.alignment = alignment
+        return cell
+
+    ws.append([styled(header, CENTER_WRAP, header=True) for header in HEADERS])
+    for row in iter_rows(queryset):
+        ws.append([styled(value, alignment) for value, alignment in zip(row, COLUMN_ALIGNMENTS)])
+    wb.save(fh)
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def iter_csv(queryset):
+    writer = csv.writer(Echo())
+    # BOM تا اکسل متن فارسی را درست نمایش دهد
+    yield '\ufeff' + writer.writerow(HEADERS)
+    for row in iter_rows(queryset):
+        yield writer.writerow(row)
+
+
+def write_csv(queryset, fh):
+    for line in iter_csv(queryset):
+        fh.write(line.encode('utf-8'))
+
+
+def get_export_dir():
+    return Path(getattr(settings, 'EXPORT_DIR', Path(settings.BASE_DIR) / 'exports'))
+
+
+def new_export_name(fmt):
+    return f"messages-{timezone.now():%Y%m%d-%H%M%S}-{secrets.token_hex(4)}.{fmt}"
+
+
+def get_export_path(name):
+    path = get_export_dir() / os.path.basename(name)
+    if path.suffix[1:] not in CONTENT_TYPES or not path.is_file():
+        return None
+    return path
+
+
+def get_marker_path(name, state):
+    """نشانه وضعیت خروجی پس‌زمینه (pending / failed)؛ فایل مخفی که دانلود نمی‌شود"""
+    return get_export_dir() / f'.{os.path.basename(name)}.{state}'
+
+
+def get_export_status(name):
+    """'ready', 'pending', 'failed' or None (unknown or already purged)"""
+    if get_export_path(name) is not None:
+        return 'ready'
+    for state in ('failed', 'pending'):
+        if get_marker_path(name, state).is_file():
+            return state
+    return None
+
+
+def queue_export(queryset, fmt):
+    """خروجی را در پس‌زمینه می‌سازد و نام فایل را برمی‌گرداند؛ خروجی‌های قدیمی همین‌جا پاک می‌شوند"""
+    purge_exports()
+    name = new_export_name(fmt)
+    get_export_dir().mkdir(parents=True, exist_ok=True)
+    get_marker_path(name, 'pending').touch()
+    background.submit(run_export, queryset, fmt, name)
+    return name
+
+
+def run_export(queryset, fmt, name):
+    """
+    Background job for large exports: written to a temporary file and
+    renamed, so the download link only ever serves a complete file. A
+    failure leaves a `failed` marker for the download view to report.
+    """
+    directory = get_export_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    tmp_path = directory / f'.{name}.tmp'
+    try:
+        with open(tmp_path, 'wb') as fh:
+            (write_xlsx if fmt == 'xlsx' else write_csv)(queryset, fh)
+        os.replace(tmp_path, directory / name)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        get_marker_path(name, 'failed').touch()
+        raise
+    finally:
+        get_marker_path(name, 'pending').unlink(missing_ok=True)
+
+
+def purge_exports(max_age=None):
+    """
+    Deletes exports (they hold names, emails and phone numbers), markers
+    and leftover temporary files older than CONTACT_EXPORT_MAX_AGE seconds.
+    Returns the number of files removed.
+    """
+    if max_age is None:
+        max_age = getattr(settings, 'CONTACT_EXPORT_MAX_AGE', 24 * 3600)
+    directory = get_export_dir()
+    if not directory.is_dir():
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for path in directory.iterdir():
+        try:
+            if path.is_file() and path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            # هم‌زمان توسط پروسه دیگری پاک شده است
+            pass
+    return removed
@@ -0,0 +1,18 @@
+# django files
+import django_filters
+
+# your files
+from .models import CommunicationWithUs
+from .search import search_messages
+
+
+class CommunicationWithUsFilter(django_filters.FilterSet):
+    # جستجوی تمام‌متن روی متن نرمال‌شده؛ نتایج بر اساس رتبه مرتب می‌شوند
+    search = django_filters.CharFilter(method='filter_search')
+
+    class Meta:
+        model = CommunicationWithUs
+        fields = ['is_read']
+
+    def filter_search(self, queryset, name, value):
+        return search_messages(queryset, value)
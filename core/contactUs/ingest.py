@@ -0,0 +1,67 @@
+# django files
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+# your files
+from .models import CommunicationWithUs
+from .counters import adjust_unread
+from core.batching import BulkCreateBuffer
+
+# package files
+from datetime import timedelta
+import hashlib
+
+
+def dedup_key(digest):
+    return f'contactUs:message:{digest}'
+
+
+buffer = BulkCreateBuffer(
+    CommunicationWithUs,
+    max_size=getattr(settings, 'CONTACT_BUFFER_SIZE', 200),
+    interval=getattr(settings, 'CONTACT_FLUSH_INTERVAL', 1.0),
+    # bulk_create متد save را صدا نمی‌زند؛ شمارنده خوانده نشده‌ها همراه درج دسته‌ای به‌روز می‌شود
+    on_flush=lambda batch: adjust_unread(sum(not message.is_read for message in batch)),
+    # پیامی که ذخیره نشد تکراری حساب نشود تا کاربر بتواند دوباره بفرستد
+    on_drop=lambda message: cache.delete(dedup_key(message.content_hash)),
+)
+
+
+def content_hash(data):
+    """هش نام، ایمیل، تلفن و متن پیام بعد از حذف فاصله‌های اضافه و یکسان‌سازی حروف"""
+    parts = [
+        ' '.join(str(data.get(name) or '').split()).lower()
+        for name in ('full_name', 'email', 'phone', 'message')
+    ]
+    return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+
+
+def is_duplicate(digest, now):
+    """
+    True if the same message was already accepted within
+    CONTACT_DEDUP_WINDOW seconds. The cache marker catches repeats still in
+    the insert buffer; the (content_hash, created_at) index catches repeats
+    accepted by other workers.
+    """
+    window = getattr(settings, 'CONTACT_DEDUP_WINDOW', 600)
+    if not cache.add(dedup_key(digest), 1, timeout=window):
+        return True
+    return CommunicationWithUs.objects.filter(
+        content_hash=digest, created_at__gte=now - timedelta(seconds=window)
+    ).exists()
+
+
+def submit(data):
+    """Returns False for a duplicate; otherwise the message is queued for bulk insert"""
+    now = timezone.now()
+    digest = content_hash(data)
+    if is_duplicate(digest, now):
+        return False
+
+    message = CommunicationWithUs(**data, content_hash=digest, created_at=now)
+    # bulk_create متد save را صدا نمی‌زند
+    message.search_document = message.build_search_document()
+    buffer.add(message)
+    return True
+
@@ -0,0 +1,16 @@
+# django files
+from django.core.management.base import BaseCommand
+
+# your files
+from contactUs.exports import purge_exports
+
+
+class Command(BaseCommand):
+    help = "Delete admin message exports older than CONTACT_EXPORT_MAX_AGE; run periodically (e.g. hourly cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=int, default=None, help="seconds; defaults to CONTACT_EXPORT_MAX_AGE")
+
+    def handle(self, *args, **options):
+        removed = purge_exports(options['max_age'])
+        self.stdout.write(self.style.SUCCESS(f"{removed} export files purged"))
@@ -0,0 +1,16 @@
+# django files
+from django.core.management.base import BaseCommand
+
+# your files
+from contactUs.counters import reconcile_unread
+
+
+class Command(BaseCommand):
+    help = "Recount unread contact messages and correct the counter row and cache; run periodically (e.g. daily cron)"
+
+    def handle(self, *args, **options):
+        previous, actual = reconcile_unread()
+        if previous == actual:
+            self.stdout.write(self.style.SUCCESS(f"unread counter is correct ({actual})"))
+        else:
+            self.stdout.write(self.style.WARNING(f"unread counter corrected: {previous} -> {actual}"))
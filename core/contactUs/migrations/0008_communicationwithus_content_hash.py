@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:55
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contactUs', '0007_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communicationwithus',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='communicationwithus',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='communicationwithus',
+            index=models.Index(fields=['content_hash', 'created_at'], name='contact_msg_hash_idx'),
+        ),
+    ]
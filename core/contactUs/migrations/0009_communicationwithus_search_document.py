@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:58
+
+from django.db import migrations, models
+
+from contactUs.search import create_search_index, drop_search_index
+from core.text import normalize_persian
+
+
+SEARCH_FIELDS = ('full_name', 'email', 'phone', 'message')
+
+
+def fill_search_document(apps, schema_editor):
+    CommunicationWithUs = apps.get_model('contactUs', 'CommunicationWithUs')
+    batch = []
+    for message in CommunicationWithUs.objects.only('id', *SEARCH_FIELDS).iterator(chunk_size=2000):
+        message.search_document = normalize_persian(
+            ' '.join(str(getattr(message, name) or '') for name in SEARCH_FIELDS)
+        )
+        batch.append(message)
+        if len(batch) >= 2000:
+            CommunicationWithUs.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    if batch:
+        CommunicationWithUs.objects.bulk_update(batch, ['search_document'])
+
+
+def create_index(apps, schema_editor):
+    create_search_index(schema_editor, apps.get_model('contactUs', 'CommunicationWithUs'))
+
+
+def drop_index(apps, schema_editor):
+    drop_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contactUs', '0008_communicationwithus_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communicationwithus',
+            name='search_document',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(fill_search_document, migrations.RunPython.noop),
+        # GIN روی PostgreSQL و جدول FTS5 روی SQLite؛ GIN در Meta.indexes روی SQLite ساخته نمی‌شود
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+def create_unread_counter(apps, schema_editor):
+    CommunicationWithUs = apps.get_model('contactUs', 'CommunicationWithUs')
+    MessageCounter = apps.get_model('contactUs', 'MessageCounter')
+    MessageCounter.objects.update_or_create(
+        key='unread', defaults={'value': CommunicationWithUs.objects.filter(is_read=False).count()}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contactUs', '0009_communicationwithus_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageCounter',
+            fields=[
+                ('key', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='communicationwithus',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['-created_at'], name='contact_msg_unread_idx'),
+        ),
+        migrations.RunPython(create_unread_counter, migrations.RunPython.noop),
+    ]
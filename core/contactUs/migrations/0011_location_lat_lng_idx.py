@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contactUs', '0010_unread_counter'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(fields=['latitude', 'longitude'], name='location_lat_lng_idx'),
+        ),
+    ]
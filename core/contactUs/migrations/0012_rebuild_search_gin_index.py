@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:10
+
+from django.db import migrations
+
+from contactUs.search import rebuild_pg_search_index
+
+
+def rebuild_index(apps, schema_editor):
+    rebuild_pg_search_index(schema_editor, apps.get_model('contactUs', 'CommunicationWithUs'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contactUs', '0011_location_lat_lng_idx'),
+    ]
+
+    operations = [
+        # ایندکس GIN قبلی با SQL دستی ساخته شده بود و ممکن بود با عبارت SearchVector جستجو یکی نباشد
+        migrations.RunPython(rebuild_index, migrations.RunPython.noop),
+    ]
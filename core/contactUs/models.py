@@ -1,18 +1,20 @@
 # django files
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import RegexValidator
+from django.utils import timezone
 
 # rest files
 
 # your files
+from core.images import ImageDerivativesModel, DerivativeSpec
+from core.text import normalize_persian
 
 # package files
-from PIL import Image
 
 
 
-class ContactInfo(models.Model):
+class ContactInfo(ImageDerivativesModel):
     NAME_CHOICES = [
         ('Head Office', 'شعبه اصلی'),
         ('Other Branches', 'سایر شعبه ها'),
@@ -25,21 +27,8 @@ class ContactInfo(models.Model):
     address = models.CharField(max_length=255, blank=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    def save(self, *args, **kwargs):
-        if self.pk:
-            orig = ContactInfo.objects.filter(pk=self.pk).first()
-            orig_image = orig.logo if orig else None
-        else:
-            orig_image = None
-
-        super().save(*args, **kwargs)
-
-        if self.logo and self.logo != orig_image:
-            image_path = self.logo.path
-            with Image.open(image_path) as img:
-                max_size = (300, 300)
-                img.thumbnail(max_size)
-                img.save(image_path, quality=85)
+    derivative_field = 'logo'
+    derivative_spec = DerivativeSpec(widths=(150, 300))
 
     def __str__(self):
         return "Contact information"
@@ -55,91 +44,34 @@ class SocialLink(models.Model):
         return f"{self.name} - {self.url}"
 
 
-class Honors(models.Model):
+class Honors(ImageDerivativesModel):
     name = models.CharField(max_length=50)
     image = models.ImageField(upload_to='aboutus/')
 
-    def save(self, *args, **kwargs):
-        if self.pk:
-            orig = Honors.objects.filter(pk=self.pk).first()
-            orig_image = orig.image if orig else None
-        else:
-            orig_image = None
-
-        super().save(*args, **kwargs)
-
-        if self.image and (not orig_image or self.image.name != orig_image.name):
-            self.resize_image()
-
-    def resize_image(self):
-        image_path = self.image.path
-        try:
-            with Image.open(image_path) as img:
-                target_size = (1200, 600)
-                resized_img = img.resize(target_size, Image.LANCZOS)
-                format = img.format or 'JPEG'
-                resized_img.save(image_path, format=format, quality=95)
-        except Exception as e:
-            print(f"Error resizing image: {e}")
-
-
-class License(models.Model):
+    derivative_spec = DerivativeSpec(widths=(400, 800, 1200), aspect=2)
+
+
+class License(ImageDerivativesModel):
     name = models.CharField(max_length=50)
     image = models.ImageField(upload_to='aboutus/')
 
-    def save(self, *args, **kwargs):
-        if self.pk:
-            orig = License.objects.filter(pk=self.pk).first()
-            orig_image = orig.image if orig else None
-        else:
-            orig_image = None
-
-        super().save(*args, **kwargs)
-
-        if self.image and (not orig_image or self.image.name != orig_image.name):
-            self.resize_image()
-
-    def resize_image(self):
-        image_path = self.image.path
-        try:
-            with Image.open(image_path) as img:
-                target_size = (600, 900)
-                resized_img = img.resize(target_size, Image.LANCZOS)
-                format = img.format or 'JPEG'
-                resized_img.save(image_path, format=format, quality=95)
-        except Exception as e:
-            print(f"Error resizing image: {e}")
-
-
-class Location(models.Model):
+    derivative_spec = DerivativeSpec(widths=(300, 600), aspect=2 / 3)
+
+
+class Location(ImageDerivativesModel):
     name = models.CharField(max_length=50)
     image = models.ImageField(upload_to='location/images', blank=True, null=True)
     description = models.TextField(verbose_name="description", blank=True, null=True)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, verbose_name="Latitude")
     longitude = models.DecimalField(max_digits=9, decimal_places=6, verbose_name="Longitude")
 
-    def save(self, *args, **kwargs):
-        if self.pk:
-            orig = Location.objects.filter(pk=self.pk).first()
-            orig_image = orig.image if orig else None
-        else:
-            orig_image = None
-
-        super().save(*args, **kwargs)
-
-        if self.image and (not orig_image or self.image.name != orig_image.name):
-            self.resize_image()
-
-    def resize_image(self):
-        image_path = self.image.path
-        try:
-            with Image.open(image_path) as img:
-                target_size = (220, 120)
-                resized_img = img.resize(target_size, Image.LANCZOS)
-                format = img.format or 'JPEG'
-                resized_img.save(image_path, format=format, quality=95)
-        except Exception as e:
-            print(f"Error resizing image: {e}")
+    derivative_spec = DerivativeSpec(widths=(220, 440), aspect=220 / 120)
+
+    class Meta:
+        indexes = [
+            # پیش‌فیلتر جعبه محدوده در جستجوی نزدیک‌ترین شعبه (core.geo)
+            models.Index(fields=['latitude', 'longitude'], name='location_lat_lng_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -153,8 +85,62 @@ class CommunicationWithUs(models.Model):
     email = models.EmailField()
     phone = models.CharField(max_length=11, validators=[phone_regex], blank=True, null=True)
     message = models.TextField(verbose_name="communicate with us", blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # زمان ارسال، نه زمان درج دسته‌ای (contactUs.ingest)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     is_read = models.BooleanField(default=False)
+    # هش محتوای نرمال‌شده برای حذف پیام‌های تکراری
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+    # متن نرمال‌شده برای جستجوی تمام‌متن (contactUs.search)؛ ایندکس آن در migration 0009 ساخته می‌شود
+    search_document = models.TextField(blank=True, editable=False)
+
+    SEARCH_FIELDS = ('full_name', 'email', 'phone', 'message')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['content_hash', 'created_at'], name='contact_msg_hash_idx'),
+            # فقط پیام‌های خوانده نشده (صندوق ورودی) ایندکس می‌شوند
+            models.Index(fields=['-created_at'], name='contact_msg_unread_idx', condition=models.Q(is_read=False)),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_read = instance.__dict__.get('is_read')
+        return instance
+
+    def build_search_document(self):
+        return normalize_persian(' '.join(str(getattr(self, name) or '') for name in self.SEARCH_FIELDS))
+
+    def save(self, *args, **kwargs):
+        self.search_document = self.build_search_document()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.SEARCH_FIELDS):
+            kwargs['update_fields'] = {*update_fields, 'search_document'}
+
+        # شمارنده پیام‌های خوانده نشده در همان تراکنش به‌روز می‌شود (contactUs.counters)
+        track_unread = (
+            (update_fields is None or 'is_read' in update_fields)
+            and 'is_read' not in self.get_deferred_fields()
+        )
+        was_unread = not self._state.adding and getattr(self, '_loaded_is_read', True) is False
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if track_unread:
+                from .counters import adjust_unread
+                adjust_unread(int(not self.is_read) - int(was_unread))
+                self._loaded_is_read = self.is_read
 
     def __str__(self):
         return f"{self.full_name} - {self.email} - {self.phone} - {self.message[:20]}"
+
+
+class MessageCounter(models.Model):
+    """
+    Counters kept next to CommunicationWithUs so the admin never has to
+    count the table; see contactUs.counters.
+    """
+    key = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key}: {self.value}"
@@ -0,0 +1,118 @@
+# django files
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+# your files
+from core.text import normalize_persian
+
+
+TABLE = 'contactUs_communicationwithus'
+FTS_TABLE = 'contactUs_communicationwithus_fts'
+PG_INDEX = 'contact_msg_search_gin'
+PG_CONFIG = 'simple'
+
+
+def fts5_query(terms):
+    # هر کلمه به صورت عبارت نقل‌قول‌شده و با جستجوی پیشوندی؛ نحو FTS5 از ورودی کاربر اجرا نمی‌شود
+    return ' '.join('"%s"*' % term.replace('"', '""') for term in terms)
+
+
+def pg_search_vector():
+    """The tsvector expression queried by search_messages and indexed by create_search_index."""
+    from django.contrib.postgres.search import SearchVector
+
+    return SearchVector('search_document', config=PG_CONFIG)
+
+
+def search_messages(queryset, query):
+    """
+    Filters CommunicationWithUs rows by the normalized search_document and
+    annotates `search_rank` (higher is better), ordered by it.
+
+    PostgreSQL uses the GIN index built from pg_search_vector(), SQLite the
+    FTS5 table kept in sync by triggers; other backends fall back to
+    icontains on the normalized document.
+    """
+    terms = normalize_persian(query).split()
+    if not terms:
+        return queryset
+
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        vector = pg_search_vector()
+        # هر کلمه به صورت lexeme نقل‌قول‌شده با جستجوی پیشوندی
+        raw = ' & '.join("'%s':*" % term.replace('\\', '\\\\').replace("'", "''") for term in terms)
+        search_query = SearchQuery(raw, config=PG_CONFIG, search_type='raw')
+        return (
+            queryset.annotate(search_vector=vector, search_rank=SearchRank(vector, search_query))
+            .filter(search_vector=search_query)
+            .order_by('-search_rank', '-created_at')
+        )
+
+    if vendor == 'sqlite':
+        match = fts5_query(terms)
+        return (
+            queryset.filter(id__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]))
+            .annotate(search_rank=RawSQL(
+                f'(SELECT -rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = {TABLE}.id)',
+                [match], output_field=FloatField(),
+            ))
+            .order_by('-search_rank', '-created_at')
+        )
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(search_document__icontains=term)
+    return queryset.filter(condition).annotate(search_rank=Value(0.0)).order_by('-created_at')
+
+
+# ---------------------------------------------------------------------------
+# schema (migrations 0009 and 0012)
+# ---------------------------------------------------------------------------
+
+def create_search_index(schema_editor, model):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+
+        # از همان عبارت جستجو ساخته می‌شود تا planner بتواند از ایندکس استفاده کند
+        schema_editor.add_index(model, GinIndex(pg_search_vector(), name=PG_INDEX))
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+            f'search_document, content="{TABLE}", content_rowid="id", tokenize="unicode61 remove_diacritics 2")'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON "{TABLE}" BEGIN '
+            f'INSERT INTO {FTS_TABLE}(rowid, search_document) VALUES (new.id, new.search_document); END'
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON "{TABLE}" BEGIN '
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) VALUES ('delete', old.id, old.search_document); END"
+        )
+        schema_editor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF search_document ON "{TABLE}" BEGIN '
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_document) VALUES ('delete', old.id, old.search_document); "
+            f'INSERT INTO {FTS_TABLE}(rowid, search_document) VALUES (new.id, new.search_document); END'
+        )
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def rebuild_pg_search_index(schema_editor, model):
+    # ایندکس‌هایی که پیش از این با SQL دستی ساخته شده بودند جایگزین می‌شوند
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+        create_search_index(schema_editor, model)
+
+
+def drop_search_index(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+    elif vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
@@ -3,37 +3,60 @@ from rest_framework import serializers
 
 # your files
 from .models import ContactInfo, SocialLink, Honors, License, Location, CommunicationWithUs
+from core.fields import ImageVariantsField
 
 
-class ContactInfoSerializer(serializers.ModelSerializer):
+class SocialLinkSerializer(serializers.ModelSerializer):
     class Meta:
-        model = ContactInfo
+        model = SocialLink
         fields = '__all__'
 
 
-class SocialLinkSerializer(serializers.ModelSerializer):
+class ContactInfoSerializer(serializers.ModelSerializer):
+    # queryset باید prefetch_related('social_links') داشته باشد
+    social_links = SocialLinkSerializer(many=True, read_only=True)
+    image_variants = ImageVariantsField()
+
     class Meta:
-        model = SocialLink
+        model = ContactInfo
         fields = '__all__'
 
 
 class HonorsSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Honors
         fields = '__all__'
 
 
 class LicenseSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = License
         fields = '__all__'
 
 class LocationSerializer(serializers.ModelSerializer):
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Location
         fields = '__all__'
 
+
+class NearestLocationSerializer(LocationSerializer):
+    # کیلومتر؛ توسط core.geo.nearest روی هر شعبه قرار داده می‌شود
+    distance = serializers.FloatField(read_only=True)
+
 class CommunicationWithUsSerializer(serializers.ModelSerializer):
     class Meta:
         model = CommunicationWithUs
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class CommunicationWithUsCreateSerializer(serializers.ModelSerializer):
+    """فرم عمومی ارسال پیام؛ اعتبارسنجی بدون کوئری"""
+    class Meta:
+        model = CommunicationWithUs
+        fields = ['full_name', 'email', 'phone', 'message']
\ No newline at end of file
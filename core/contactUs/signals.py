@@ -0,0 +1,25 @@
+# django files
+from django.db.models.signals import post_save, post_delete
+
+# your files
+from .models import ContactInfo, SocialLink, Honors, License, Location, CommunicationWithUs
+from . import counters, site_content
+from accounts.models import HomeImage
+from core.images import derivatives_ready
+
+
+SITE_CONTENT_MODELS = (ContactInfo, SocialLink, Honors, License, Location, HomeImage)
+
+for model in SITE_CONTENT_MODELS:
+    post_save.connect(site_content.invalidate, sender=model, dispatch_uid=f'site_content_save_{model.__name__}')
+    post_delete.connect(site_content.invalidate, sender=model, dispatch_uid=f'site_content_delete_{model.__name__}')
+    # تصاویر مشتق در پس‌زمینه و با update() ذخیره می‌شوند
+    derivatives_ready.connect(site_content.invalidate, sender=model, dispatch_uid=f'site_content_images_{model.__name__}')
+
+
+def message_deleted(sender, instance, **kwargs):
+    if not instance.is_read:
+        counters.adjust_unread(-1)
+
+
+post_delete.connect(message_deleted, sender=CommunicationWithUs, dispatch_uid='contact_message_unread_delete')
@@ -0,0 +1,59 @@
+# django files
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# your files
+from .models import ContactInfo, Honors, License, Location
+from .serializers import (
+    ContactInfoSerializer, HonorsSerializer, LicenseSerializer, LocationSerializer
+)
+from accounts.models import HomeImage
+from accounts.serializers import HomeImageSerializer
+from core import metrics
+from core.renderers import FastJSONRenderer
+
+# package files
+import hashlib
+
+
+CACHE_KEY = 'contactUs:site_content'
+
+
+def get_cache():
+    return caches[getattr(settings, 'SITE_CONTENT_CACHE', 'default')]
+
+
+def build():
+    """
+    Serializes the whole landing page content. Built without a request,
+    so file URLs are relative to the site (MEDIA_URL).
+    """
+    data = {
+        'contacts': ContactInfoSerializer(
+            ContactInfo.objects.prefetch_related('social_links'), many=True
+        ).data,
+        'honors': HonorsSerializer(Honors.objects.all(), many=True).data,
+        'licenses': LicenseSerializer(License.objects.all(), many=True).data,
+        'locations': LocationSerializer(Location.objects.all(), many=True).data,
+        'home_images': HomeImageSerializer(HomeImage.objects.all(), many=True).data,
+    }
+    content = FastJSONRenderer().render(data)
+    return content, '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+
+
+def get():
+    """(rendered JSON, strong ETag); rebuilt only after invalidate()"""
+    cache = get_cache()
+    cached = cache.get(CACHE_KEY)
+    metrics.record_cache('site_content', cached is not None)
+    if cached is None:
+        cached = build()
+        cache.set(CACHE_KEY, cached, timeout=getattr(settings, 'SITE_CONTENT_CACHE_TIMEOUT', 3600))
+    return cached
+
+
+def invalidate(**kwargs):
+    # بعد از commit هم پاک می‌شود تا درخواست همزمان داده قبل از commit را کش نکند
+    get_cache().delete(CACHE_KEY)
+    transaction.on_commit(lambda: get_cache().delete(CACHE_KEY))
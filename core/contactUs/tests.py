@@ -1,3 +1,496 @@
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.batching import BulkCreateBuffer
+from core.images import derivatives_ready
+from core.throttling import local_store
+from .models import ContactInfo, Honors, SocialLink, CommunicationWithUs, Location, MessageCounter
+from . import counters, exports, ingest, site_content
+from .search import PG_INDEX, search_messages
+from .serializers import HonorsSerializer
+
+from io import BytesIO, StringIO
+from openpyxl import load_workbook
+from PIL import Image, features
+from unittest import mock
+import os
+import tempfile
+import unittest
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), BACKGROUND_TASKS_EAGER=True)
+class ImageDerivativesTests(TestCase):
+    def upload(self, size=(1000, 600)):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'blue').save(buffer, format='JPEG')
+        return SimpleUploadedFile('honor.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def create_honor(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            honor = Honors.objects.create(name='جایزه', image=self.upload())
+        return honor
+
+    def test_widths_and_formats(self):
+        received = []
+        handler = lambda sender, **kwargs: received.append(kwargs['instance_pk'])
+        derivatives_ready.connect(handler, sender=Honors)
+        self.addCleanup(derivatives_ready.disconnect, handler, sender=Honors)
+
+        honor = self.create_honor()
+        honor.refresh_from_db()
+
+        items = honor.image_variants['items']
+        # 1200 از عرض تصویر اصلی بزرگ‌تر است
+        self.assertEqual(sorted({item['width'] for item in items}), [400, 800])
+        self.assertTrue(all(item['height'] * 2 == item['width'] for item in items))
+        expected_formats = {'jpeg', 'webp'} | ({'avif'} if features.check('avif') else set())
+        self.assertEqual({item['format'] for item in items}, expected_formats)
+        self.assertEqual(received, [honor.pk])
+
+        data = HonorsSerializer(honor).data['image_variants']
+        self.assertEqual(len(data['variants']), len(items))
+        self.assertRegex(data['srcset']['webp'], r'\.webp 400w, .+\.webp 800w$')
+
+    def test_other_changes_keep_derivatives(self):
+        honor = self.create_honor()
+        stale = Honors.objects.get(pk=honor.pk)
+        stale.image_variants = {}
+
+        with mock.patch('core.images.submit_on_commit') as submit:
+            stale.name = 'جایزه دوم'
+            stale.save()
+        submit.assert_not_called()
+
+        honor.refresh_from_db()
+        self.assertEqual(honor.name, 'جایزه دوم')
+        self.assertTrue(honor.image_variants['items'])
+
+    def test_save_of_deleted_or_copied_row_inserts(self):
+        honor = self.create_honor()
+        honor.delete()
+        honor.name = 'دوباره'
+        honor.save()
+        self.assertEqual(Honors.objects.get(pk=honor.pk).name, 'دوباره')
+
+        # کپی با کلید اصلی دستی
+        honor.pk = honor.pk + 100
+        honor.save()
+        self.assertEqual(Honors.objects.filter(name='دوباره').count(), 2)
+
+        honor.pk = None
+        honor.save()
+        self.assertEqual(Honors.objects.filter(name='دوباره').count(), 3)
+
+
+class SiteContentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.contact = ContactInfo.objects.create(name='Head Office', phone='02100000000')
+        SocialLink.objects.create(contact=cls.contact, name='instagram', url='https://instagram.com/salon')
+
+    def setUp(self):
+        site_content.get_cache().delete(site_content.CACHE_KEY)
+        self.client = APIClient()
+        self.url = reverse('contactUs:site-content')
+
+    def test_bundle_is_served_from_cache(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['contacts'][0]['social_links'][0]['name'], 'instagram')
+        self.assertIn('public', response['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).content, response.content)
+
+    def test_etag_revalidation(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('public', response['Cache-Control'])
+
+        for header in (f'"other", W/{etag}', '*'):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=header).status_code, 304)
+        # ETag ای که فقط بخشی از ETag فعلی است نباید 304 بگیرد
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag[1:9]).status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"x{etag[1:]}').status_code, 200)
+
+    def test_changes_rebuild_the_bundle(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            SocialLink.objects.create(contact=self.contact, name='telegram', url='https://t.me/salon')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['contacts'][0]['social_links']), 2)
+
+
+class ContactSocialLinksTests(TestCase):
+    def create_contacts(self, count, links=3):
+        for i in range(count):
+            contact = ContactInfo.objects.create(name='Other Branches', phone=f'021{i:08d}')
+            for j in range(links):
+                SocialLink.objects.create(contact=contact, name=f'link{j}', url=f'https://example.com/{i}/{j}')
+
+    def test_list_query_count_is_constant(self):
+        self.create_contacts(1)
+        client = APIClient()
+        with self.assertNumQueries(2):
+            response = client.get(reverse('contactUs:contact-list'))
+        self.assertEqual(len(response.json()[0]['social_links']), 3)
+
+        self.create_contacts(5)
+        with self.assertNumQueries(2):
+            response = client.get(reverse('contactUs:contact-list'))
+        self.assertEqual(len(response.json()), 6)
+
+    def test_admin_changelist_uses_annotated_count(self):
+        self.create_contacts(5)
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        self.client.force_login(admin)
+
+        url = reverse('admin:contactUs_contactinfo_changelist')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertContains(response, '3 لینک', count=5)
+
+        self.create_contacts(5)
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            self.client.get(url)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class CommunicationWithUsTests(TestCase):
+    data = {'full_name': 'مریم', 'email': 'maryam@example.com', 'phone': '09123334444', 'message': 'سلام'}
+
+    def setUp(self):
+        cache.clear()
+        local_store.clear()
+        self.client = APIClient()
+        self.url = reverse('contactUs:communication-with-us-list')
+
+    def test_submission_is_accepted_and_deduplicated(self):
+        self.assertEqual(self.client.post(self.url, self.data, format='json').status_code, 202)
+        repeated = dict(self.data, message='  سلام ', email='Maryam@example.com')
+        self.assertEqual(self.client.post(self.url, repeated, format='json').status_code, 202)
+
+        self.assertEqual(CommunicationWithUs.objects.count(), 1)
+        self.assertEqual(len(CommunicationWithUs.objects.get().content_hash), 64)
+
+    def test_duplicate_from_another_worker_is_found_by_hash(self):
+        self.client.post(self.url, self.data, format='json')
+        cache.clear()  # کش worker دیگر
+        self.client.post(self.url, self.data, format='json')
+        self.assertEqual(CommunicationWithUs.objects.count(), 1)
+
+    def test_only_admin_can_read_messages(self):
+        self.client.post(self.url, self.data, format='json')
+        self.assertIn(self.client.get(self.url).status_code, (401, 403))
+
+        self.client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'pass'))
+        self.assertEqual(len(self.client.get(self.url).json()), 1)
+
+    def test_unread_count_is_incremental(self):
+        self.assertEqual(counters.unread_count(), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url, self.data, format='json')
+        with self.assertNumQueries(0):
+            self.assertEqual(counters.unread_count(), 1)
+
+    @override_settings(BACKGROUND_TASKS_EAGER=False)
+    def test_buffer_inserts_in_one_batch(self):
+        buffer = BulkCreateBuffer(CommunicationWithUs, interval=3600)
+        for i in range(3):
+            buffer.add(CommunicationWithUs(**dict(self.data, message=f'پیام {i}')))
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(sum(query['sql'].startswith('INSERT') for query in ctx.captured_queries), 1)
+        self.assertEqual(CommunicationWithUs.objects.count(), 3)
+
+    @override_settings(BACKGROUND_TASKS_EAGER=False)
+    def test_failed_batch_is_retried(self):
+        buffer = BulkCreateBuffer(CommunicationWithUs, interval=3600)
+        for i in range(3):
+            buffer.add(CommunicationWithUs(**dict(self.data, message=f'پیام {i}')))
+
+        with mock.patch.object(CommunicationWithUs.objects, 'bulk_create', side_effect=DatabaseError):
+            with self.assertLogs('core.batching', 'ERROR'):
+                self.assertEqual(buffer.flush(), 0)
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(
+            list(CommunicationWithUs.objects.order_by('pk').values_list('message', flat=True)),
+            ['پیام 0', 'پیام 1', 'پیام 2'],
+        )
+
+    @override_settings(BACKGROUND_TASKS_EAGER=False)
+    def test_bad_row_is_dropped_alone_after_retries(self):
+        dropped = []
+        buffer = BulkCreateBuffer(CommunicationWithUs, interval=3600, max_retries=1, on_drop=dropped.append)
+        good = CommunicationWithUs(**self.data)
+        bad = CommunicationWithUs(**dict(self.data, full_name=None))
+        buffer.add(good)
+        buffer.add(bad)
+
+        with self.assertLogs('core.batching', 'ERROR'):
+            self.assertEqual(buffer.flush(), 0)
+            self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(dropped, [bad])
+        self.assertEqual(CommunicationWithUs.objects.count(), 1)
+
+    def test_dropped_message_can_be_sent_again(self):
+        self.assertEqual(self.client.post(self.url, self.data, format='json').status_code, 202)
+        message = CommunicationWithUs.objects.get()
+        message.delete()
+        ingest.buffer.on_drop(message)
+
+        self.client.post(self.url, self.data, format='json')
+        self.assertEqual(CommunicationWithUs.objects.count(), 1)
+
+
+class NearestLocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for name, lat, lng in [
+            ('ونک', '35.7575', '51.4100'), ('تجریش', '35.8040', '51.4340'), ('کرج', '35.8400', '50.9391'),
+            ('اصفهان', '32.6546', '51.6680'), ('مشهد', '36.2605', '59.6168'),
+        ]:
+            Location.objects.create(name=name, latitude=lat, longitude=lng)
+
+    def setUp(self):
+        self.url = reverse('contactUs:location-nearest')
+
+    def test_k_nearest(self):
+        response = self.client.get(self.url, {'lat': 35.7000, 'lng': 51.4000, 'k': 3})
+        data = response.json()
+        self.assertEqual([item['name'] for item in data], ['ونک', 'تجریش', 'کرج'])
+        self.assertAlmostEqual(data[0]['distance'], 6.45, delta=0.1)
+
+    def test_radius_limits_results(self):
+        response = self.client.get(self.url, {'lat': 35.7000, 'lng': 51.4000, 'radius': 20, 'k': 10})
+        self.assertEqual([item['name'] for item in response.json()], ['ونک', 'تجریش'])
+
+    def test_only_candidates_in_bounding_box_are_loaded(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url, {'lat': 35.7000, 'lng': 51.4000, 'k': 1})
+        # یک کوئری با جعبه محدوده
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertIn('latitude', ctx.captured_queries[0]['sql'].split('WHERE')[1])
+
+    def test_fewer_rows_than_k(self):
+        response = self.client.get(self.url, {'lat': 35.7000, 'lng': 51.4000, 'radius': 1000, 'k': 50})
+        self.assertEqual(len(response.json()), 5)
+
+    def test_default_radius_bounds_the_search(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'lat': 0, 'lng': 0, 'k': 5})
+        self.assertEqual(response.json(), [])
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_invalid_coordinates(self):
+        self.assertEqual(self.client.get(self.url, {'lat': 95, 'lng': 51}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'lng': 51}).status_code, 400)
+
+
+class UnreadCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        cls.messages = [
+            CommunicationWithUs.objects.create(full_name=f'کاربر {i}', email=f'u{i}@example.com', message='سلام')
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def stored_count(self):
+        return MessageCounter.objects.get(key=counters.UNREAD).value
+
+    def run_action(self, action, messages):
+        self.client.force_login(self.admin)
+        self.client.post(reverse('admin:contactUs_communicationwithus_changelist'), {
+            'action': action, '_selected_action': [message.pk for message in messages],
+        })
+
+    def test_counter_follows_saves_and_deletes(self):
+        self.assertEqual(self.stored_count(), 3)
+        message = CommunicationWithUs.objects.get(pk=self.messages[0].pk)
+        message.is_read = True
+        message.save()
+        message.save()
+        self.assertEqual(self.stored_count(), 2)
+
+        CommunicationWithUs.objects.filter(pk=self.messages[1].pk).delete()
+        message.delete()
+        self.assertEqual(self.stored_count(), 1)
+
+    def test_admin_actions_only_count_changed_rows(self):
+        self.run_action('mark_as_read', self.messages[:2])
+        self.run_action('mark_as_read', self.messages)
+        self.assertEqual(self.stored_count(), 0)
+        self.run_action('mark_as_unread', self.messages[:1])
+        self.assertEqual(self.stored_count(), 1)
+
+    def test_cached_count_is_refreshed_after_commit(self):
+        self.assertEqual(counters.unread_count(), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.run_action('mark_as_read', self.messages[:1])
+        with self.assertNumQueries(0):
+            self.assertEqual(counters.unread_count(), 2)
+
+    def test_reconcile_command_fixes_drift(self):
+        MessageCounter.objects.filter(key=counters.UNREAD).update(value=42)
+        out = StringIO()
+        call_command('reconcile_unread_count', stdout=out)
+        self.assertIn('42 -> 3', out.getvalue())
+        self.assertEqual(self.stored_count(), 3)
+
+        MessageCounter.objects.all().delete()
+        self.assertEqual(counters.unread_count(), 3)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class MessageSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        cls.cake = CommunicationWithUs.objects.create(
+            full_name='علی', email='ali@example.com', phone='09121234567', message='می‌خواهم کیک سفارش بدهم'
+        )
+        cls.cakes = CommunicationWithUs.objects.create(
+            full_name='سارا', email='sara@example.com', message='کیک تولد، کیک عروسی و کیک خامه‌ای'
+        )
+        cls.other = CommunicationWithUs.objects.create(
+            full_name='رضا', email='reza@example.com', message='ساعت کاری شعبه'
+        )
+
+    def search(self, query):
+        return list(search_messages(CommunicationWithUs.objects.all(), query))
+
+    def test_arabic_letters_and_zwnj_are_normalized(self):
+        self.assertEqual(set(self.search('كيك')), {self.cake, self.cakes})
+        self.assertEqual(self.search('ميخواهم'), [self.cake])
+
+    def test_persian_digits_and_prefix_match(self):
+        self.assertEqual(self.search('۰۹۱۲۱۲۳'), [self.cake])
+        self.assertEqual(self.search('شعب'), [self.other])
+
+    def test_results_are_ranked(self):
+        self.assertEqual(self.search('کیک'), [self.cakes, self.cake])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.other.message = 'کیک'
+        self.other.save()
+        self.assertIn(self.other, self.search('کیک'))
+        self.other.delete()
+        self.assertEqual(self.search('شعبه'), [])
+
+    def test_quotes_do_not_break_the_query(self):
+        self.assertEqual(self.search('"کیک OR'), [])
+
+    def test_buffered_messages_are_searchable(self):
+        ingest.submit({'full_name': 'نگار', 'email': 'negar@example.com', 'message': 'رزرو ناخن'})
+        self.assertEqual(len(self.search('ناخن')), 1)
+
+    def test_admin_and_api_search(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('admin:contactUs_communicationwithus_changelist'), {'q': 'كيك'})
+        self.assertEqual(list(response.context['cl'].result_list), [self.cakes, self.cake])
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get(reverse('contactUs:communication-with-us-list'), {'search': 'شعبه'})
+        self.assertEqual([item['id'] for item in response.json()], [self.other.id])
+
+    @unittest.skipUnless(connection.vendor == 'postgresql', 'GIN index exists only on PostgreSQL')
+    def test_postgres_search_uses_gin_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        plan = search_messages(CommunicationWithUs.objects.all(), 'کیک').explain()
+        self.assertIn(PG_INDEX, plan)
+
+
+@override_settings(EXPORT_DIR=tempfile.mkdtemp(), BACKGROUND_TASKS_EAGER=True)
+class MessageExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        CommunicationWithUs.objects.bulk_create([
+            CommunicationWithUs(full_name=f'کاربر {i}', email=f'u{i}@example.com', message='متن پیام')
+            for i in range(3)
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:contactUs_communicationwithus_changelist')
+
+    def run_action(self, action):
+        pks = CommunicationWithUs.objects.values_list('pk', flat=True)
+        return self.client.post(self.url, {'action': action, '_selected_action': list(pks)})
+
+    def test_excel_export(self):
+        response = self.run_action('export_to_excel')
+        workbook = load_workbook(BytesIO(response.content), read_only=True)
+        rows = list(workbook.active.iter_rows(values_only=True))
+        self.assertEqual(rows[0][0], 'نام کامل')
+        self.assertEqual(len(rows), 4)
+
+    def test_csv_export_is_streamed(self):
+        response = self.run_action('export_to_csv')
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn('u0@example.com', ''.join(lines))
+
+    @override_settings(CONTACT_EXPORT_ASYNC_THRESHOLD=1)
+    def test_large_export_runs_in_background(self):
+        self.export_dir()
+        response = self.run_action('export_to_csv')
+        self.assertEqual(response.status_code, 302)
+
+        name = os.listdir(exports.get_export_dir())[0]
+        download = reverse('admin:contactUs_communicationwithus_export', args=[name])
+        response = self.client.get(download)
+        self.assertEqual(b''.join(response.streaming_content).decode('utf-8-sig').count('\n'), 4)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(download).status_code, 302)
+
+    def export_dir(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(self.settings(EXPORT_DIR=directory.name))
+        return directory.name
+
+    @override_settings(CONTACT_EXPORT_ASYNC_THRESHOLD=1)
+    def test_failed_export_is_reported(self):
+        self.export_dir()
+        # در حالت eager خطای کار پس‌زمینه مستقیم بالا می‌آید
+        with mock.patch.object(exports, 'write_csv', side_effect=OSError('disk full')), self.assertRaises(OSError):
+            self.run_action('export_to_csv')
+        [marker] = [path for path in exports.get_export_dir().iterdir()]
+        name = marker.name[1:].removesuffix('.failed')
+        self.assertEqual(exports.get_export_status(name), 'failed')
+
+        response = self.client.get(reverse('admin:contactUs_communicationwithus_export', args=[name]), follow=True)
+        self.assertContains(response, 'ساخت خروجی با خطا متوقف شد')
+
+    def test_old_exports_are_purged(self):
+        directory = self.export_dir()
+        old = os.path.join(directory, 'messages-old.csv')
+        new = os.path.join(directory, 'messages-new.csv')
+        for path in (old, new):
+            open(path, 'w').close()
+        os.utime(old, (0, 0))
+
+        call_command('purge_exports', stdout=StringIO())
+        self.assertEqual(os.listdir(directory), ['messages-new.csv'])
+        self.assertEqual(self.client.get(reverse('admin:contactUs_communicationwithus_export', args=['messages-old.csv'])).status_code, 404)
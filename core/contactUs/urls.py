@@ -19,5 +19,6 @@ router.register(r'communication/with/us', views.CommunicationWithUsViewSet, base
 
 
 urlpatterns = [
+    path('site/content/', views.SiteContentView.as_view(), name='site-content'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
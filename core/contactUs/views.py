@@ -1,27 +1,54 @@
 # django files
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
 
 # rest files
 from rest_framework import status, viewsets, generics
 from rest_framework.decorators import action as Action
+from rest_framework.permissions import AllowAny, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
 # your files
 from .models import ContactInfo, SocialLink, Honors, License, Location,CommunicationWithUs
+from .filters import CommunicationWithUsFilter
 from .serializers import (
     ContactInfoSerializer,
-    SocialLinkSerializer, HonorsSerializer, LicenseSerializer, LocationSerializer,CommunicationWithUsSerializer
+    SocialLinkSerializer, HonorsSerializer, LicenseSerializer, LocationSerializer,CommunicationWithUsSerializer,
+    CommunicationWithUsCreateSerializer, NearestLocationSerializer
 )
+from core import geo
+from core.throttling import ContactThrottle
+from . import ingest, site_content
 
 
 
+class SiteContentView(APIView):
+    """
+    همه محتوای صفحه اصلی (تماس با ما و شبکه‌های اجتماعی، افتخارات، مجوزها، شعبه‌ها و
+    تصاویر صفحه اصلی) در یک درخواست؛ از کش خوانده می‌شود و با ETag قابل اعتبارسنجی است.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        content, etag = site_content.get()
+        response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=getattr(settings, 'SITE_CONTENT_MAX_AGE', 60))
+        # If-None-Match طبق RFC 9110 تجزیه و مقایسه می‌شود (لیست ETag ها، W/ و *)
+        return get_conditional_response(request, etag=etag, response=response)
+
+
 class ContactViewSet(viewsets.ModelViewSet):
-    queryset = ContactInfo.objects.all()
+    queryset = ContactInfo.objects.prefetch_related('social_links')
     serializer_class = ContactInfoSerializer
 
     @Action(detail=True, methods=['get'])
     def get_social_links(self, request, pk=None):
+        # لینک‌ها همراه خود تماس prefetch شده‌اند
         contact = self.get_object()
-        social_links = SocialLink.objects.filter(contact=contact)
-        serializer = SocialLinkSerializer(social_links, many=True)
+        serializer = SocialLinkSerializer(contact.social_links.all(), many=True)
         return Response(serializer.data)
 
 
@@ -44,8 +71,44 @@ class LocationViewSet(viewsets.ModelViewSet):
     queryset = Location.objects.all()
     serializer_class = LocationSerializer
 
+    @Action(detail=False, methods=['get'])
+    def nearest(self, request):
+        """
+        نزدیک‌ترین شعبه‌ها به مختصات داده شده: ?lat=&lng=&k=5 و در صورت نیاز &radius= (کیلومتر، پیش‌فرض ۵۰)
+        """
+        params = geo.NearbyQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        locations = geo.nearest(
+            self.get_queryset(), params.validated_data['lat'], params.validated_data['lng'],
+            k=params.validated_data['k'], radius_km=params.validated_data.get('radius'),
+        )
+        serializer = NearestLocationSerializer(locations, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
+
 class CommunicationWithUsViewSet(viewsets.ModelViewSet):
-    queryset = CommunicationWithUs.objects.all()
+    queryset = CommunicationWithUs.objects.order_by('-created_at')
     serializer_class = CommunicationWithUsSerializer
+    permission_classes = [IsAdminUser]
+    filterset_class = CommunicationWithUsFilter
+
+    def get_permissions(self):
+        # ارسال پیام برای همه آزاد است؛ خواندن و حذف پیام‌ها فقط برای ادمین
+        if self.action == 'create':
+            return [AllowAny()]
+        return super().get_permissions()
+
+    def get_throttles(self):
+        # فقط ارسال پیام محدود می‌شود
+        if self.action == 'create':
+            return [ContactThrottle()]
+        return super().get_throttles()
+
+    def create(self, request, *args, **kwargs):
+        serializer = CommunicationWithUsCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # پیام در صف درج دسته‌ای قرار می‌گیرد؛ پیام تکراری دوباره ذخیره نمی‌شود
+        ingest.submit(serializer.validated_data)
+        return Response({"message": "پیام شما دریافت شد"}, status=status.HTTP_202_ACCEPTED)
 
 
@@ -0,0 +1,23 @@
+# django files
+from django.contrib import admin
+
+
+def is_autocomplete(request):
+    """درخواست از ویجت autocomplete ادمین (admin:autocomplete) آمده است"""
+    match = getattr(request, 'resolver_match', None)
+    return match is not None and match.url_name == 'autocomplete' and match.namespace == admin.site.name
+
+
+class PrefixAutocompleteMixin:
+    """
+    ModelAdmin mixin: autocomplete widgets pointing at this model search only
+    `autocomplete_search_fields` (prefix lookups backed by an index, see
+    core.operations.AddPrefixSearchIndex), so a lookup stays cheap however
+    large the table grows. The changelist keeps the usual `search_fields`.
+    """
+    autocomplete_search_fields = ()
+
+    def get_search_fields(self, request):
+        if self.autocomplete_search_fields and is_autocomplete(request):
+            return self.autocomplete_search_fields
+        return super().get_search_fields(request)
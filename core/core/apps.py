@@ -0,0 +1,32 @@
+from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+# cache alias هایی که بین worker ها مشترک فرض شده‌اند
+SHARED_CACHE_SETTINGS = ('SITE_CONTENT_CACHE', 'USER_INVALIDATION_CACHE', 'THROTTLE_CACHE')
+
+
+def check_shared_caches():
+    """Refuses per-process caches for shared state unless DEBUG is on."""
+    if settings.DEBUG:
+        return
+    aliases = {'default'} | {getattr(settings, name, None) or 'default' for name in SHARED_CACHE_SETTINGS}
+    for alias in sorted(aliases):
+        backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+        if backend.endswith(('LocMemCache', 'DummyCache')):
+            raise ImproperlyConfigured(
+                f"CACHES[{alias!r}] uses {backend.rsplit('.', 1)[-1]}, which is not shared between workers; "
+                "set REDIS_URL or configure a shared cache backend."
+            )
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+
+    def ready(self):
+        check_shared_caches()
+
+        from . import metrics
+        metrics.prune_dead_snapshots()
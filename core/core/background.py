@@ -0,0 +1,52 @@
+# django files
+from django.conf import settings
+from django.db import connections, transaction
+
+# package files
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BACKGROUND_WORKERS', 2),
+                    thread_name_prefix='background',
+                )
+    return _executor
+
+
+def _run(fn, args, kwargs):
+    try:
+        fn(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(fn, '__name__', fn))
+    finally:
+        # هر thread اتصال دیتابیس خودش را باز می‌کند
+        connections.close_all()
+
+
+def submit(fn, *args, **kwargs):
+    """
+    Runs `fn` on the shared worker pool, outside the request. With
+    BACKGROUND_TASKS_EAGER (tests) it runs inline instead.
+    """
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        fn(*args, **kwargs)
+        return
+    get_executor().submit(_run, fn, args, kwargs)
+
+
+def submit_on_commit(fn, *args, **kwargs):
+    """فقط بعد از commit شدن تراکنش؛ worker باید ردیف ذخیره‌شده را ببیند"""
+    transaction.on_commit(lambda: submit(fn, *args, **kwargs))
@@ -0,0 +1,128 @@
+# django files
+from django.conf import settings
+from django.db import connections, transaction
+
+# package files
+from collections import deque
+import atexit
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class BulkCreateBuffer:
+    """
+    Collects unsaved model instances and inserts them with bulk_create,
+    either when `max_size` are waiting or every `interval` seconds, from one
+    daemon thread per process. Pending rows are flushed at exit. `on_flush`,
+    if given, is called with each inserted batch in the same transaction as
+    the insert.
+
+    A batch whose insert fails goes back to the front of the queue and is
+    retried on the next flush. After `max_retries` failed attempts its rows
+    are inserted one by one, so a single bad row cannot hold back the
+    others; only rows that still fail are logged and passed to `on_drop`.
+
+    With BACKGROUND_TASKS_EAGER (tests) every add() is inserted immediately.
+    """
+
+    def __init__(self, model, max_size=200, interval=1.0, on_flush=None, max_retries=5, on_drop=None):
+        self.model = model
+        self.on_flush = on_flush
+        self.on_drop = on_drop
+        self.max_retries = max_retries
+        self.max_size = max_size
+        self.interval = interval
+        self._pending = deque()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def add(self, obj):
+        if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+            self._insert([obj])
+            return
+
+        # (شیء، تعداد تلاش‌های ناموفق)
+        self._pending.append((obj, 0))
+        self._ensure_thread()
+        if len(self._pending) >= self.max_size:
+            self._wakeup.set()
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f'bulk-create-{self.model._meta.label}', daemon=True
+                )
+                self._thread.start()
+                atexit.register(self.drain)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                connections.close_all()
+
+    def flush(self):
+        """ردیف‌های در صف را درج می‌کند و تعداد ردیف‌های درج شده را برمی‌گرداند"""
+        entries = []
+        while self._pending:
+            entries.append(self._pending.popleft())
+        if not entries:
+            return 0
+
+        batch = [obj for obj, attempts in entries]
+        try:
+            self._insert(batch)
+            return len(batch)
+        except Exception:
+            logger.exception("bulk_create of %d %s rows failed", len(batch), self.model._meta.label)
+            self._reset(batch)
+
+        retry = [(obj, attempts + 1) for obj, attempts in entries if attempts < self.max_retries]
+        # ترتیب ردیف‌ها حفظ می‌شود و دسته در تلاش بعدی اول درج می‌شود
+        self._pending.extendleft(reversed(retry))
+        if len(retry) == len(entries):
+            return 0
+        return self._insert_each([obj for obj, attempts in entries if attempts >= self.max_retries])
+
+    def drain(self):
+        """در خروج فرایند؛ تا خالی شدن صف یا تمام شدن تلاش‌ها"""
+        for _ in range(self.max_retries + 1):
+            self.flush()
+            if not self._pending:
+                return
+
+    def _insert_each(self, batch):
+        inserted = 0
+        for obj in batch:
+            try:
+                self._insert([obj])
+                inserted += 1
+            except Exception:
+                logger.exception("dropping %s row after %d failed attempts", self.model._meta.label, self.max_retries + 1)
+                self._reset([obj])
+                if self.on_drop is not None:
+                    self.on_drop(obj)
+        return inserted
+
+    def _reset(self, batch):
+        # bulk_create ممکن است پیش از rollback کلید اصلی را روی اشیا گذاشته باشد
+        if self.model._meta.auto_field is not None:
+            for obj in batch:
+                obj.pk = None
+                obj._state.adding = True
+
+    def _insert(self, batch):
+        with transaction.atomic():
+            self.model.objects.bulk_create(batch, batch_size=self.max_size)
+            if self.on_flush is not None:
+                self.on_flush(batch)
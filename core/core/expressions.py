@@ -0,0 +1,15 @@
+# django files
+from django.db.models import IntegerField, Subquery
+
+
+class SubqueryCount(Subquery):
+    """
+    COUNT(*) of a correlated queryset (filtered with OuterRef) as a scalar
+    subquery. Unlike Count() over a join, several of these can be annotated
+    on one queryset without multiplying rows, and no GROUP BY is needed.
+    """
+    template = '(SELECT COUNT(*) FROM (%(subquery)s) _count)'
+    output_field = IntegerField()
+
+    def __init__(self, queryset, **extra):
+        super().__init__(queryset.order_by().values('pk'), **extra)
@@ -0,0 +1,36 @@
+# rest files
+from rest_framework import serializers
+
+# django files
+from django.core.files.storage import default_storage
+
+
+class ImageVariantsField(serializers.Field):
+    """
+    Read-only representation of an `image_variants` value (core.images):
+    every derivative with its URL and size, plus a ready `srcset` string per
+    format so the frontend can pick the image that fits the viewport.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_url(self, name):
+        url = default_storage.url(name)
+        request = self.context.get('request')
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+    def to_representation(self, value):
+        variants = []
+        srcset = {}
+        for item in (value or {}).get('items', ()):
+            url = self.get_url(item['name'])
+            variants.append({'url': url, 'width': item['width'], 'height': item['height'], 'format': item['format']})
+            srcset.setdefault(item['format'], []).append(f"{url} {item['width']}w")
+        return {
+            'variants': variants,
+            'srcset': {fmt: ', '.join(entries) for fmt, entries in srcset.items()},
+        }
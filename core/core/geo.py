@@ -0,0 +1,82 @@
+# django files
+from django.db.models import Q
+
+# rest files
+from rest_framework import serializers
+
+# package files
+import math
+
+
+EARTH_RADIUS_KM = 6371.0088
+# نصف محیط زمین؛ دورترین نقطه ممکن
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+# شعاع جستجوی k نزدیک‌ترین وقتی شعاع داده نشده
+DEFAULT_RADIUS_KM = 50
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """فاصله دایره عظیمه بین دو نقطه به کیلومتر"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lon, radius_km, lat_field='latitude', lon_field='longitude'):
+    """
+    Q for the latitude/longitude box containing every point within
+    `radius_km` of (lat, lon), so a (latitude, longitude) index can narrow
+    the rows before exact distances are computed. Boxes crossing the
+    antimeridian become two longitude ranges; boxes reaching a pole keep
+    every longitude.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    d_lat = math.degrees(angular)
+    min_lat, max_lat = lat - d_lat, lat + d_lat
+    condition = Q(**{f'{lat_field}__gte': max(min_lat, -90), f'{lat_field}__lte': min(max_lat, 90)})
+    if min_lat <= -90 or max_lat >= 90:
+        return condition
+
+    d_lon = math.degrees(math.asin(min(1.0, math.sin(angular) / math.cos(math.radians(lat)))))
+    min_lon, max_lon = lon - d_lon, lon + d_lon
+    if min_lon < -180:
+        return condition & (Q(**{f'{lon_field}__gte': min_lon + 360}) | Q(**{f'{lon_field}__lte': max_lon}))
+    if max_lon > 180:
+        return condition & (Q(**{f'{lon_field}__gte': min_lon}) | Q(**{f'{lon_field}__lte': max_lon - 360}))
+    return condition & Q(**{f'{lon_field}__gte': min_lon, f'{lon_field}__lte': max_lon})
+
+
+def within(queryset, lat, lon, radius_km, lat_field='latitude', lon_field='longitude'):
+    """
+    Rows of `queryset` within `radius_km`, nearest first, each with a
+    `distance` attribute (km). Only rows inside the bounding box are
+    loaded; the exact distance is computed for those candidates only.
+    """
+    results = []
+    for obj in queryset.filter(bounding_box(lat, lon, radius_km, lat_field, lon_field)):
+        obj.distance = haversine(lat, lon, getattr(obj, lat_field), getattr(obj, lon_field))
+        if obj.distance <= radius_km:
+            results.append(obj)
+    results.sort(key=lambda obj: obj.distance)
+    return results
+
+
+def nearest(queryset, lat, lon, k, radius_km=None, lat_field='latitude', lon_field='longitude'):
+    """
+    The `k` rows nearest to (lat, lon) within `radius_km` (DEFAULT_RADIUS_KM
+    when not given), in a single query. Rows further away are not returned
+    even when fewer than k are found; callers wanting a wider search pass a
+    larger radius explicitly.
+    """
+    if radius_km is None:
+        radius_km = DEFAULT_RADIUS_KM
+    return within(queryset, lat, lon, radius_km, lat_field, lon_field)[:k]
+
+
+class NearbyQuerySerializer(serializers.Serializer):
+    """پارامترهای جستجوی مکانی: ?lat=&lng=&radius=&k="""
+    lat = serializers.FloatField(min_value=-90, max_value=90)
+    lng = serializers.FloatField(min_value=-180, max_value=180)
+    # کیلومتر؛ پیش‌فرض DEFAULT_RADIUS_KM
+    radius = serializers.FloatField(min_value=0, max_value=MAX_DISTANCE_KM, required=False)
+    k = serializers.IntegerField(min_value=1, max_value=50, default=5)
@@ -0,0 +1,222 @@
+# django files
+from django.apps import apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import models
+from django.dispatch import Signal
+
+# your files
+from core.background import submit_on_commit
+
+# package files
+from PIL import ExifTags, Image, ImageOps, features
+from io import BytesIO
+import hashlib
+import math
+import os
+
+
+# sender: کلاس مدل، instance_pk و variants
+derivatives_ready = Signal()
+
+PIL_FORMATS = {'jpeg': 'JPEG', 'png': 'PNG', 'webp': 'WEBP', 'avif': 'AVIF'}
+EXTENSIONS = {'jpeg': 'jpg', 'png': 'png', 'webp': 'webp', 'avif': 'avif'}
+
+
+class DerivativeSpec:
+    """
+    Which derivatives to build for one model.
+
+    `widths` are target widths; widths larger than the source are skipped
+    (the source width is used instead if none fit). With `aspect` (w / h)
+    every derivative is center-cropped to that ratio, otherwise the source
+    ratio is kept. Each width is written in the source format plus every
+    entry of `formats` the installed Pillow can encode.
+    """
+
+    def __init__(self, widths, aspect=None, formats=('webp', 'avif'), quality=82):
+        self.widths = tuple(sorted(widths))
+        self.aspect = aspect
+        self.formats = formats
+        self.quality = quality
+
+    def get_formats(self, source_format):
+        source = 'png' if source_format == 'PNG' else 'jpeg'
+        return [source, *(fmt for fmt in self.formats if features.check(fmt))]
+
+    def get_widths(self, source_width):
+        widths = [width for width in self.widths if width <= source_width]
+        return widths or [source_width]
+
+
+def oriented_size(img):
+    """اندازه تصویر بعد از اعمال چرخش EXIF"""
+    if img.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+        return img.height, img.width
+    return img.size
+
+
+def load_reduced(img, width, height=None):
+    """
+    Loads `img` no larger than a `width` x `height` output needs. JPEG is
+    decoded directly at 1/2, 1/4 or 1/8 scale (draft mode), so a phone
+    photo is never fully decoded; other formats are box-reduced by an
+    integer factor, keeping at least twice the target for the final
+    LANCZOS pass. Sizes are in display (EXIF-rotated) orientation.
+    """
+    source_width, source_height = oriented_size(img)
+    scale = width / source_width
+    if height:
+        scale = max(scale, height / source_height)
+    if scale >= 1:
+        img.load()
+        return img
+
+    if img.format == 'JPEG':
+        target = (math.ceil(img.width * scale), math.ceil(img.height * scale))
+        img.draft(img.mode, target)
+        img.load()
+        return img
+
+    img.load()
+    factor = int(1 / (scale * 2))
+    if factor >= 2:
+        return img.reduce(factor)
+    return img
+
+
+def render(img, width, aspect):
+    if aspect:
+        return ImageOps.fit(img, (width, max(round(width / aspect), 1)), Image.LANCZOS)
+    resized = img.copy()
+    resized.thumbnail((width, img.height), Image.LANCZOS)
+    return resized
+
+
+def encode(img, fmt, quality):
+    if fmt == 'jpeg' and img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    buffer = BytesIO()
+    options = {'quality': quality}
+    if fmt in ('jpeg', 'png'):
+        options['optimize'] = True
+    img.save(buffer, format=PIL_FORMATS[fmt], **options)
+    return buffer.getvalue()
+
+
+def build_derivatives(source_name, spec):
+    """
+    Writes the derivatives of `source_name` under content-hashed names in
+    `derivatives/` and returns the `image_variants` value describing them.
+    """
+    with default_storage.open(source_name, 'rb') as fh, Image.open(fh) as img:
+        source_format = img.format
+        widths = spec.get_widths(oriented_size(img)[0])
+        img = load_reduced(img, widths[-1], widths[-1] / spec.aspect if spec.aspect else None)
+        img = ImageOps.exif_transpose(img)
+
+    directory, filename = os.path.split(source_name)
+    stem = os.path.splitext(filename)[0]
+    items = []
+    for width in widths:
+        resized = render(img, width, spec.aspect)
+        for fmt in spec.get_formats(source_format):
+            content = encode(resized, fmt, spec.quality)
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            name = default_storage.save(
+                f'derivatives/{directory}/{stem}.{width}w.{digest}.{EXTENSIONS[fmt]}', ContentFile(content)
+            )
+            items.append({'name': name, 'width': resized.width, 'height': resized.height, 'format': fmt})
+    return {'source': source_name, 'items': items}
+
+
+def generate_derivatives(model_label, pk, field_name, source_name):
+    """
+    Background task. The row is only updated while it still points at
+    `source_name`, so a newer upload is never overwritten by an older one.
+    """
+    model = apps.get_model(model_label)
+    # همین فایل (content-addressed) قبلاً برای ردیف دیگری پردازش شده است
+    variants = (
+        model.objects.filter(image_variants__source=source_name).exclude(pk=pk)
+        .values_list('image_variants', flat=True).first()
+    )
+    if variants is None:
+        variants = build_derivatives(source_name, model.derivative_spec)
+
+    # مشتق‌های قبلی یا مشتق‌هایی که استفاده نشدند را gc_media_blobs پاک می‌کند (blob ها مشترک هستند)
+    updated = model.objects.filter(pk=pk, **{field_name: source_name}).update(image_variants=variants)
+    if not updated:
+        return None
+
+    derivatives_ready.send(sender=model, instance_pk=pk, variants=variants)
+    return variants
+
+
+class ImageDerivativesModel(models.Model):
+    """
+    Builds resized / WebP / AVIF derivatives of `derivative_field` in the
+    background after the upload is committed, and only when the file
+    actually changed. Subclasses set `derivative_spec`.
+    """
+    derivative_field = 'image'
+    derivative_spec = None
+
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_derivative_source = instance.__dict__.get(cls.derivative_field)
+        instance._loaded_pk = instance.pk
+        return instance
+
+    def _update_fields_without_variants(self, kwargs):
+        """
+        update_fields for a plain save() of a row this instance loaded or
+        saved, under the same pk: every loaded field except image_variants,
+        which only the worker writes, so a stale copy in the instance cannot
+        overwrite it. None (a normal save) for new rows, copies whose pk was
+        cleared or changed, and when the caller chose update_fields or
+        force_insert. A row deleted by someone else in between fails like
+        any update_fields save.
+        """
+        if (
+            self._state.adding or kwargs.get('update_fields') is not None or kwargs.get('force_insert')
+            or self.pk is None or self.pk != getattr(self, '_loaded_pk', None)
+        ):
+            return None
+        deferred = self.get_deferred_fields()
+        return [
+            f.name for f in self._meta.concrete_fields
+            if not f.primary_key and f.name != 'image_variants' and f.attname not in deferred
+        ]
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        update_fields = self._update_fields_without_variants(kwargs)
+        if update_fields is not None:
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+        self._loaded_pk = self.pk
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.derivative_field not in update_fields:
+            return
+        if self.derivative_field in self.get_deferred_fields():
+            return
+
+        file = getattr(self, self.derivative_field)
+        name = file.name if file else None
+        previous = None if adding else getattr(self, '_loaded_derivative_source', None)
+        if name != previous:
+            if name:
+                submit_on_commit(generate_derivatives, self._meta.label, self.pk, self.derivative_field, name)
+            elif self.image_variants:
+                # تصویر حذف شده است؛ فایل‌های مشتق بدون ارجاع را gc_media_blobs پاک می‌کند
+                self.image_variants = {}
+                type(self).objects.filter(pk=self.pk).update(image_variants={})
+        self._loaded_derivative_source = name
@@ -0,0 +1,29 @@
+# django files
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+# your files
+from core.images import ImageDerivativesModel, generate_derivatives
+
+
+class Command(BaseCommand):
+    help = "Build image derivatives for rows that have an image but no image_variants yet (or all rows with --all)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help="rebuild rows that already have derivatives")
+
+    def handle(self, *args, **options):
+        for model in apps.get_models():
+            if not issubclass(model, ImageDerivativesModel):
+                continue
+
+            field = model.derivative_field
+            queryset = model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+            if not options['all']:
+                queryset = queryset.filter(image_variants={})
+
+            built = 0
+            for pk, name in queryset.values_list('pk', field).iterator():
+                if generate_derivatives(model._meta.label, pk, field, name) is not None:
+                    built += 1
+            self.stdout.write(f"{model._meta.label}: {built} built")
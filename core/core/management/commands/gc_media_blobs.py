@@ -0,0 +1,45 @@
+# django files
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+# your files
+from core.storage import BLOB_DIR, TMP_DIR, iter_referenced_names
+
+# package files
+from pathlib import Path
+import time
+
+
+class Command(BaseCommand):
+    help = "Delete content-addressed media blobs that no row references any more"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help="seconds; younger files are kept so uploads whose row is not committed yet survive",
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        root = Path(default_storage.location)
+        cutoff = time.time() - options['min_age']
+        referenced = {name for name in iter_referenced_names() if name.startswith(f'{BLOB_DIR}/')}
+
+        removed = freed = 0
+        for directory in (root / BLOB_DIR, root / TMP_DIR):
+            if not directory.is_dir():
+                continue
+            for path in directory.rglob('*'):
+                if not path.is_file():
+                    continue
+                name = path.relative_to(root).as_posix()
+                stat = path.stat()
+                if name in referenced or stat.st_mtime > cutoff:
+                    continue
+                removed += 1
+                freed += stat.st_size
+                if not options['dry_run']:
+                    path.unlink(missing_ok=True)
+
+        action = "would remove" if options['dry_run'] else "removed"
+        self.stdout.write(self.style.SUCCESS(f"{action} {removed} files ({freed / 1_000_000:.1f} MB)"))
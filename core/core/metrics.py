@@ -0,0 +1,449 @@
+# django files
+from django.conf import settings
+
+# package files
+from bisect import bisect_left
+import atexit
+import json
+import os
+import threading
+import time
+
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+MINUTE_BUCKETS = (15, 30, 60, 120, 240, 480, 1440)
+
+INF = float('inf')
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Duplicate metric: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def collect(self):
+        return list(self._metrics.values())
+
+    def snapshot(self):
+        return {metric.name: metric.dump() for metric in self.collect()}
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def clear(self):
+        with self._lock:
+            self._children = {}
+
+    def dump(self):
+        """Serializable state used for the multi-process snapshot files."""
+        return {
+            'type': self.type,
+            'help': self.documentation,
+            'labelnames': self.labelnames,
+            'samples': [[list(key), child.dump()] for key, child in list(self._children.items())],
+        }
+
+
+class _ValueChild:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value):
+        with self._lock:
+            self._value = float(value)
+
+    def get(self):
+        return self._value
+
+    def dump(self):
+        return self._value
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    """
+    `multiprocess_mode` decides how values from several worker processes
+    are combined: 'sum' (e.g. in-flight work) or 'max' (e.g. a last rate).
+    """
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY, multiprocess_mode='sum'):
+        self.multiprocess_mode = multiprocess_mode
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _ValueChild()
+
+    def set(self, value):
+        self.labels().set(value)
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def dec(self, amount=1):
+        self.labels().dec(amount)
+
+    def dump(self):
+        data = super().dump()
+        data['mode'] = self.multiprocess_mode
+        return data
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self._buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    def dump(self):
+        with self._lock:
+            return {'counts': list(self._counts), 'sum': self._sum, 'max': self._max}
+
+    def snapshot(self):
+        return _histogram_summary(self._buckets, self.dump())
+
+
+def _histogram_summary(buckets, state):
+    cumulative = []
+    running = 0
+    for bound, count in zip(tuple(buckets) + (INF,), state['counts']):
+        running += count
+        cumulative.append(['+Inf' if bound == INF else bound, running])
+    return {'count': running, 'sum': state['sum'], 'max': state['max'], 'buckets': cumulative}
+
+
+class Histogram(_Metric):
+    """
+    Observations are bucketed on write, so reads are cheap and memory does
+    not grow with traffic.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=TIME_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def snapshot(self):
+        return [
+            (dict(zip(self.labelnames, key)), child.snapshot())
+            for key, child in list(self._children.items())
+        ]
+
+    def dump(self):
+        data = super().dump()
+        data['buckets'] = self.buckets
+        return data
+
+
+# ---------------------------------------------------------------------------
+# multi-process support
+#
+# هر worker گانیکورن وضعیت متریک‌های خودش را حداکثر هر METRICS_FLUSH_INTERVAL
+# ثانیه یک بار در METRICS_MULTIPROC_DIR می‌نویسد و /metrics فایل‌ها را با هم جمع می‌کند.
+# ---------------------------------------------------------------------------
+
+_last_flush = 0.0
+_flush_lock = threading.Lock()
+
+
+def _multiproc_dir():
+    return getattr(settings, 'METRICS_MULTIPROC_DIR', None)
+
+
+def flush(registry=REGISTRY):
+    directory = _multiproc_dir()
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f'{os.getpid()}.json')
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as fh:
+        json.dump(registry.snapshot(), fh)
+    os.replace(tmp_path, path)
+
+
+def maybe_flush(registry=REGISTRY):
+    """Called at the end of every request; writes at most once per interval."""
+    global _last_flush
+    if not _multiproc_dir():
+        return
+    now = time.monotonic()
+    if now - _last_flush < getattr(settings, 'METRICS_FLUSH_INTERVAL', 5):
+        return
+    if not _flush_lock.acquire(blocking=False):
+        return
+    try:
+        _last_flush = now
+        flush(registry)
+    finally:
+        _flush_lock.release()
+
+
+atexit.register(lambda: _multiproc_dir() and flush())
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def prune_dead_snapshots():
+    """
+    Removes snapshot files of workers that no longer run, so totals of
+    restarted workers are not reported forever. Called at startup; the
+    directory must belong to one host, since PIDs are checked locally.
+    """
+    directory = _multiproc_dir()
+    if not directory or not os.path.isdir(directory):
+        return 0
+    removed = 0
+    for filename in os.listdir(directory):
+        pid, _, ext = filename.partition('.')
+        if ext not in ('json', 'json.tmp') or not pid.isdigit() or _pid_alive(int(pid)):
+            continue
+        try:
+            os.unlink(os.path.join(directory, filename))
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def collect_snapshots(registry=REGISTRY):
+    """
+    Returns {name: dump} for all processes. Without a multi-process directory
+    only this process is reported.
+    """
+    directory = _multiproc_dir()
+    if not directory:
+        return registry.snapshot()
+
+    flush(registry)
+    merged = {}
+    for filename in os.listdir(directory):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as fh:
+                snapshot = json.load(fh)
+        except (OSError, ValueError):
+            continue
+        for name, data in snapshot.items():
+            current = merged.get(name)
+            if current is None:
+                merged[name] = data
+                continue
+            samples = {tuple(key): value for key, value in current['samples']}
+            for key, value in data['samples']:
+                key = tuple(key)
+                if key not in samples:
+                    samples[key] = value
+                elif data['type'] == 'histogram':
+                    samples[key] = {
+                        'counts': [a + b for a, b in zip(samples[key]['counts'], value['counts'])],
+                        'sum': samples[key]['sum'] + value['sum'],
+                        'max': max(samples[key]['max'], value['max']),
+                    }
+                elif data['type'] == 'gauge' and data.get('mode') == 'max':
+                    samples[key] = max(samples[key], value)
+                else:
+                    samples[key] = samples[key] + value
+            current['samples'] = [[list(key), value] for key, value in samples.items()]
+    return merged
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (
+        '{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == INF:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def generate_latest(registry=REGISTRY):
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for name, data in sorted(collect_snapshots(registry).items()):
+        lines.append(f"# HELP {name} {data['help']}")
+        lines.append(f"# TYPE {name} {data['type']}")
+        labelnames = data['labelnames']
+        for key, value in data['samples']:
+            if data['type'] != 'histogram':
+                lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+                continue
+            summary = _histogram_summary(data['buckets'], value)
+            for bound, count in summary['buckets']:
+                le = bound if bound == '+Inf' else _format_value(bound)
+                lines.append(f"{name}_bucket{_format_labels(labelnames, key, [('le', le)])} {count}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_value(summary['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labelnames, key)} {summary['count']}")
+    return '\n'.join(lines) + '\n'
+
+
+def record_cache(cache, hit):
+    cache_requests.labels(cache=cache, result='hit' if hit else 'miss').inc()
+
+
+# ---------------------------------------------------------------------------
+# endpoint metrics (RequestMetricsMiddleware)
+# ---------------------------------------------------------------------------
+
+endpoint_queries = Histogram(
+    'http_request_queries', 'Number of SQL queries per request', ('endpoint',), QUERY_BUCKETS
+)
+endpoint_db_seconds = Histogram(
+    'http_request_db_seconds', 'Time spent in the database per request', ('endpoint',)
+)
+endpoint_serialize_seconds = Histogram(
+    'http_response_serialize_seconds', 'Time spent serializing the response data', ('endpoint',)
+)
+endpoint_render_seconds = Histogram(
+    'http_response_render_seconds', 'Time spent rendering the response', ('endpoint',)
+)
+endpoint_duration_seconds = Histogram(
+    'http_request_duration_seconds', 'Total request time', ('endpoint',)
+)
+endpoint_response_bytes = Histogram(
+    'http_response_size_bytes', 'Response body size', ('endpoint',), SIZE_BUCKETS
+)
+
+ENDPOINT_HISTOGRAMS = {
+    'queries': endpoint_queries,
+    'db_seconds': endpoint_db_seconds,
+    'serialize_seconds': endpoint_serialize_seconds,
+    'render_seconds': endpoint_render_seconds,
+    'duration_seconds': endpoint_duration_seconds,
+    'response_bytes': endpoint_response_bytes,
+}
+
+
+def endpoint_snapshot():
+    """Group the endpoint histograms by endpoint name for the admin endpoint."""
+    result = {}
+    for key, histogram in ENDPOINT_HISTOGRAMS.items():
+        for labels, data in histogram.snapshot():
+            result.setdefault(labels['endpoint'], {})[key] = data
+    return result
+
+
+# ---------------------------------------------------------------------------
+# domain metrics
+# ---------------------------------------------------------------------------
+
+bookings_attempted = Counter(
+    'appointment_bookings_attempted_total', 'Appointment bookings that reached validation'
+)
+bookings_succeeded = Counter(
+    'appointment_bookings_succeeded_total', 'Appointments created'
+)
+bookings_rejected = Counter(
+    'appointment_bookings_rejected_total', 'Rejected bookings by reason', ('reason',)
+)
+appointment_cancellations = Counter(
+    'appointment_cancellations_total', 'Appointments cancelled through the API'
+)
+time_slots_generated = Counter(
+    'time_slots_generated_total', 'Time slots created or refreshed by generate_time_slots'
+)
+time_slot_generation_seconds = Histogram(
+    'time_slot_generation_seconds', 'Duration of a generate_time_slots run'
+)
+time_slot_generation_rate = Gauge(
+    'time_slot_generation_rate', 'Slots per second of the last generate_time_slots run',
+    multiprocess_mode='max'
+)
+blocked_range_slots = Histogram(
+    'blocked_range_slots', 'Time slots deactivated by one block_time_range call', buckets=COUNT_BUCKETS
+)
+blocked_range_minutes = Histogram(
+    'blocked_range_minutes', 'Length of ranges passed to block_time_range', buckets=MINUTE_BUCKETS
+)
+cache_requests = Counter(
+    'cache_requests_total', 'Application cache lookups by cache and result', ('cache', 'result')
+)
+throttle_rejections = Counter(
+    'throttle_rejections_total', 'Requests rejected by a token bucket throttle', ('scope',)
+)
@@ -0,0 +1,210 @@
+# django files
+from django.conf import settings
+from django.db import connection
+
+# your files
+from . import metrics
+from . import profiling
+
+# package files
+from contextlib import contextmanager
+import logging
+import random
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def resolve_endpoint(request):
+    """
+    Returns a stable name such as `AppointmentViewSet.list` for the view that
+    handled the request, together with the view class (or None).
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None, None
+
+    func = match.func
+    view_class = getattr(func, 'cls', None) or getattr(func, 'view_class', None)
+    if view_class is None:
+        return match.view_name or match._func_path, None
+
+    actions = getattr(func, 'actions', None)
+    if actions:
+        action = actions.get(request.method.lower(), request.method.lower())
+    else:
+        action = request.method.lower()
+    return f"{view_class.__name__}.{action}", view_class
+
+
+def get_query_budget(endpoint, view_class):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    if endpoint in budgets:
+        return budgets[endpoint]
+    view_budgets = getattr(view_class, 'query_budgets', None) or {}
+    return view_budgets.get(endpoint.rsplit('.', 1)[-1])
+
+
+class _QueryCollector:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+@contextmanager
+def measure_serialization(request):
+    """
+    Adds the time spent in the block, less the DB time of queries it ran, to
+    the serialization time RequestMetricsMiddleware records for `request`.
+    """
+    request = getattr(request, '_request', request)
+    collector = getattr(request, '_query_collector', None)
+    db_before = collector.duration if collector is not None else 0.0
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        if collector is not None:
+            elapsed -= collector.duration - db_before
+        request._serialize_seconds = getattr(request, '_serialize_seconds', 0.0) + elapsed
+
+
+class RequestMetricsMiddleware:
+    """
+    Records query count, DB time, serialization and render time, total time
+    and response size per endpoint into the histograms in `core.metrics`.
+
+    For streaming responses the queries and serialization happen while the
+    body is consumed, so the measurement is closed once the stream is
+    exhausted rather than when the view returns.
+
+    Views may declare `query_budgets = {'list': 3}`; `QUERY_BUDGETS` in
+    settings overrides them by endpoint name. Exceeding a budget logs a
+    warning, or raises QueryBudgetExceeded when `QUERY_BUDGET_ENFORCE` is on
+    (used by the test suite).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = request._query_collector = _QueryCollector()
+        started = time.perf_counter()
+        with connection.execute_wrapper(collector):
+            response = self.get_response(request)
+
+        endpoint, view_class = resolve_endpoint(request)
+        if endpoint is None:
+            metrics.maybe_flush()
+            return response
+
+        if response.streaming:
+            if not response.is_async:
+                response.streaming_content = self.measure_stream(
+                    request, response.streaming_content, endpoint, view_class, started
+                )
+            return response
+
+        self.record(request, endpoint, started, len(response.content))
+        self.check_budget(endpoint, view_class, collector.count)
+        return response
+
+    def measure_stream(self, request, content, endpoint, view_class, started):
+        # کوئری‌ها فقط هنگام ساختن هر chunk شمرده می‌شوند، نه در فاصله‌ی بین yield ها
+        collector = request._query_collector
+        size = 0
+        try:
+            while True:
+                with connection.execute_wrapper(collector):
+                    chunk = next(content, None)
+                if chunk is None:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            self.record(request, endpoint, started, size)
+        self.check_budget(endpoint, view_class, collector.count)
+
+    def record(self, request, endpoint, started, size):
+        collector = request._query_collector
+        metrics.endpoint_queries.labels(endpoint=endpoint).observe(collector.count)
+        metrics.endpoint_db_seconds.labels(endpoint=endpoint).observe(collector.duration)
+        metrics.endpoint_duration_seconds.labels(endpoint=endpoint).observe(time.perf_counter() - started)
+        serialize_seconds = getattr(request, '_serialize_seconds', None)
+        if serialize_seconds is not None:
+            metrics.endpoint_serialize_seconds.labels(endpoint=endpoint).observe(serialize_seconds)
+        render_seconds = getattr(request, '_render_seconds', None)
+        if render_seconds is not None:
+            metrics.endpoint_render_seconds.labels(endpoint=endpoint).observe(render_seconds)
+        metrics.endpoint_response_bytes.labels(endpoint=endpoint).observe(size)
+        metrics.maybe_flush()
+
+    def check_budget(self, endpoint, view_class, count):
+        budget = get_query_budget(endpoint, view_class)
+        if budget is not None and count > budget:
+            message = f"{endpoint} ran {count} queries, budget is {budget}"
+            if getattr(settings, 'QUERY_BUDGET_ENFORCE', False):
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+    def process_template_response(self, request, response):
+        # DRF Response ها پس از این hook رندر می‌شوند؛ زمان رندر را همین‌جا اندازه می‌گیریم
+        started = time.perf_counter()
+
+        def record_render(rendered):
+            request._render_seconds = time.perf_counter() - started
+
+        response.add_post_render_callback(record_render)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profiles whole requests with cProfile, including serializer, DB and
+    render time. A request is profiled when it carries a valid signed
+    `X-Profile` header (see profiling.make_profile_token) or when it is
+    picked by `PROFILING_SAMPLE_RATE` (0 disables sampling).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def should_profile(self, request):
+        token = request.META.get('HTTP_X_PROFILE')
+        if token:
+            return profiling.is_valid_token(token)
+        rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        return rate > 0 and random.random() < rate
+
+    def __call__(self, request):
+        profiler = profiling.start_profiler() if self.should_profile(request) else None
+        if profiler is None:
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = time.perf_counter() - started
+
+        endpoint, _ = resolve_endpoint(request)
+        try:
+            response['X-Profile-Id'] = profiling.save_profile(profiler, endpoint or request.path, duration)
+        except OSError:
+            logger.exception("Could not write request profile")
+        return response
@@ -0,0 +1,61 @@
+# django files
+from django.db.migrations.operations.base import Operation
+
+
+class AddPrefixSearchIndex(Operation):
+    """
+    Index serving case-insensitive prefix search (`istartswith`, the
+    admin's `^field` search_fields) on one column.
+
+    PostgreSQL compares UPPER(col::text) with LIKE, which only an
+    expression index with text_pattern_ops can serve; SQLite's LIKE uses an
+    index with NOCASE collation. Neither is expressible in Meta.indexes
+    for both backends, hence a migration operation. Other backends are
+    left alone.
+    """
+    reduces_to_sql = True
+    reversible = True
+
+    def __init__(self, model_name, field_name, name):
+        self.model_name = model_name
+        self.field_name = field_name
+        self.name = name
+
+    def deconstruct(self):
+        return (
+            self.__class__.__qualname__, [],
+            {'model_name': self.model_name, 'field_name': self.field_name, 'name': self.name},
+        )
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        quote = schema_editor.quote_name
+        table = quote(model._meta.db_table)
+        column = quote(model._meta.get_field(self.field_name).column)
+        vendor = schema_editor.connection.vendor
+        if vendor == 'postgresql':
+            schema_editor.execute(
+                f'CREATE INDEX {quote(self.name)} ON {table} ((UPPER({column}::text)) text_pattern_ops)'
+            )
+        elif vendor == 'sqlite':
+            schema_editor.execute(f'CREATE INDEX {quote(self.name)} ON {table} ({column} COLLATE NOCASE)')
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+        if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+            schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(self.name)}')
+
+    def describe(self):
+        return f'Create prefix search index {self.name} on {self.model_name}.{self.field_name}'
+
+    @property
+    def migration_name_fragment(self):
+        return self.name.lower()
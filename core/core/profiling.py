@@ -0,0 +1,111 @@
+# django files
+from django.conf import settings
+from django.core import signing
+
+# package files
+from pathlib import Path
+import cProfile
+import gzip
+import marshal
+import os
+import time
+
+
+SIGNING_SALT = 'core.profiling'
+FILE_SUFFIX = '.prof.gz'
+
+
+def get_profile_dir():
+    return Path(getattr(settings, 'PROFILING_DIR', Path(settings.BASE_DIR) / 'profiles'))
+
+
+def make_profile_token():
+    """توکن امضاشده برای هدر X-Profile؛ تا PROFILING_TOKEN_MAX_AGE ثانیه معتبر است"""
+    return signing.dumps('profile', salt=SIGNING_SALT)
+
+
+def is_valid_token(value):
+    try:
+        signing.loads(value, salt=SIGNING_SALT, max_age=getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600))
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def start_profiler():
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # پروفایلر دیگری در همین پروسه فعال است (درخواست همزمان)
+        return None
+    return profiler
+
+
+def save_profile(profiler, endpoint, duration):
+    """
+    Writes the stats in pstats (marshal) format, gzip-compressed, and prunes
+    the directory down to PROFILING_MAX_FILES. Returns the file name.
+
+    The file name carries everything the listing needs:
+    `<unix ms>__<duration ms>__<endpoint>.prof.gz`.
+    """
+    profiler.create_stats()
+    directory = get_profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    safe_endpoint = ''.join(c if c.isalnum() or c in '._-' else '-' for c in endpoint)
+    name = f"{int(time.time() * 1000)}__{int(duration * 1000)}__{safe_endpoint}{FILE_SUFFIX}"
+    tmp_path = directory / f'.{name}.tmp'
+    with gzip.open(tmp_path, 'wb', compresslevel=6) as fh:
+        fh.write(marshal.dumps(profiler.stats))
+    os.replace(tmp_path, directory / name)
+
+    rotate(directory)
+    return name
+
+
+def rotate(directory):
+    max_files = getattr(settings, 'PROFILING_MAX_FILES', 200)
+    files = sorted(p for p in directory.iterdir() if p.name.endswith(FILE_SUFFIX))
+    for path in files[:max(len(files) - max_files, 0)]:
+        path.unlink(missing_ok=True)
+
+
+def list_profiles():
+    directory = get_profile_dir()
+    if not directory.is_dir():
+        return []
+
+    profiles = []
+    for path in directory.iterdir():
+        if not path.name.endswith(FILE_SUFFIX):
+            continue
+        try:
+            timestamp, duration, endpoint = path.name[:-len(FILE_SUFFIX)].split('__', 2)
+            profiles.append({
+                'file': path.name,
+                'endpoint': endpoint,
+                'duration_ms': int(duration),
+                'captured_at': int(timestamp) / 1000,
+                'size': path.stat().st_size,
+            })
+        except (ValueError, OSError):
+            continue
+    return profiles
+
+
+def slowest_by_endpoint(limit=5):
+    grouped = {}
+    for profile in sorted(list_profiles(), key=lambda p: p['duration_ms'], reverse=True):
+        entries = grouped.setdefault(profile['endpoint'], [])
+        if len(entries) < limit:
+            entries.append(profile)
+    return dict(sorted(grouped.items(), key=lambda item: item[1][0]['duration_ms'], reverse=True))
+
+
+def get_profile_path(name):
+    path = get_profile_dir() / os.path.basename(name)
+    if not path.name.endswith(FILE_SUFFIX) or not path.is_file():
+        return None
+    return path
@@ -0,0 +1,77 @@
+# django files
+from django.core.exceptions import ImproperlyConfigured
+
+# rest files
+from rest_framework.renderers import JSONRenderer, BaseRenderer
+from rest_framework.utils import encoders
+
+# package files
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+_encoder = encoders.JSONEncoder()
+
+
+def encode_default(obj):
+    """
+    Fallback for types the fast encoders do not handle natively.
+
+    Delegates to DRF's JSONEncoder so dates, times, timedeltas and decimals
+    come out exactly as they do with the stock JSONRenderer.
+    """
+    return _encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for JSONRenderer backed by orjson.
+
+    Falls back to the stock renderer when orjson is not installed, when an
+    indent is requested, or when orjson cannot encode the payload.
+    """
+    options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=encode_default, option=self.options)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # JSONRenderer always escapes \u2028 and \u2029, so we do the same.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders data as MessagePack. Selected with `Accept: application/msgpack`
+    or `?format=msgpack`; settings only register it when msgpack is installed.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if msgpack is None:
+            raise ImproperlyConfigured('MessagePackRenderer requires the msgpack package to be installed')
+
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=encode_default, use_bin_type=True)
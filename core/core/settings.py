@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 from datetime import timedelta
+from importlib.util import find_spec
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,6 +49,7 @@ INSTALLED_APPS = [
     'corsheaders',
 
     #your apps
+    'core.apps.CoreConfig',
     'accounts.apps.AccountsConfig',
     'salons.apps.SalonsConfig',
     'appointments.apps.AppointmentsConfig',
@@ -56,6 +58,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -100,6 +104,22 @@ DATABASES = {
 }
 
 
+# Cache
+# site content, user invalidation, duplicate-message markers and (optionally) throttle buckets
+# must be shared between workers: set REDIS_URL in production. LocMemCache is per process and
+# is refused at startup when DEBUG is off (core.apps.CoreConfig).
+
+REDIS_URL = os.environ.get('REDIS_URL')
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -151,16 +171,73 @@ AUTH_USER_MODEL = 'accounts.User'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# uploads: core.uploads.ImageUploadHandler checks size and the image header while the body streams in
+FILE_UPLOAD_HANDLERS = [
+    'core.uploads.ImageUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+MAX_IMAGE_PIXELS = 40_000_000
+
+# uploads are stored once per content hash (blobs/<hh>/<sha256>.<ext>); see `manage.py gc_media_blobs`
+STORAGES = {
+    'default': {
+        'BACKEND': 'core.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 # rest_framework setting
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend'
-    ]
+    ],
+    # orjson / msgpack are optional; FastJSONRenderer falls back to the stock encoder
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        # only offered when msgpack is importable, so content negotiation never picks a broken renderer
+        *(['core.renderers.MessagePackRenderer'] if find_spec('msgpack') else []),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # token buckets (core.throttling) on the unauthenticated endpoints that hash passwords or write
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '10/min',
+        'register': '5/hour',
+        'contact': '5/hour',
+    },
+    # reverse proxies in front of the app; 0 keys throttles on REMOTE_ADDR and ignores a
+    # client-supplied X-Forwarded-For. Set to the number of trusted proxies when deployed behind them.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
 }
 
+# cache alias for throttle buckets shared between workers; None keeps them in process memory
+THROTTLE_CACHE = None
+
+# query budgets declared on views (query_budgets) can be overridden here by endpoint name,
+# e.g. {'AppointmentViewSet.list': 3}. With QUERY_BUDGET_ENFORCE a violation raises instead of logging.
+QUERY_BUDGETS = {}
+QUERY_BUDGET_ENFORCE = False
+
+# prometheus metrics; set METRICS_MULTIPROC_DIR when running several gunicorn workers
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+METRICS_FLUSH_INTERVAL = 5
+# /metrics is served to staff users and to scrapers sending "Authorization: Bearer <METRICS_TOKEN>".
+# METRICS_ALLOWED_IPS is opt-in: behind a local reverse proxy every request comes from 127.0.0.1
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+METRICS_ALLOWED_IPS = []
+
+# request profiling: signed X-Profile header or random sampling, compressed pstats files
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_MAX_FILES = 200
+PROFILING_TOKEN_MAX_AGE = 3600
+
 # jwt setting
 
 
@@ -169,8 +246,41 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),    # default 1 day
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    # role / salon_ids claims so authenticated requests do not load the user row
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.serializers.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.ClaimsTokenRefreshSerializer',
 }
 
+# refresh token blacklist (accounts.revocation); expired rows are removed by `manage.py purge_revoked_tokens`
+REVOKED_TOKEN_SYNC_INTERVAL = 1         # seconds between bloom filter top-ups from the table
+REVOKED_TOKEN_REBUILD_INTERVAL = 3600   # seconds between full rebuilds (drops expired jtis)
+REVOKED_TOKEN_BLOOM_CAPACITY = 100_000
+
+# core.background worker pool (image processing etc.); eager runs tasks inline, for tests
+BACKGROUND_WORKERS = 2
+BACKGROUND_TASKS_EAGER = False
+
+# contactUs site content bundle; rebuilt after any change, the timeout only bounds staleness
+SITE_CONTENT_CACHE = 'default'
+SITE_CONTENT_CACHE_TIMEOUT = 3600
+SITE_CONTENT_MAX_AGE = 60
+
+# contact form ingestion (contactUs.ingest): buffered bulk inserts and duplicate window (seconds)
+CONTACT_BUFFER_SIZE = 200
+CONTACT_FLUSH_INTERVAL = 1.0
+CONTACT_DEDUP_WINDOW = 600
+# admin exports with more rows are built in the background into EXPORT_DIR (not public media)
+CONTACT_EXPORT_ASYNC_THRESHOLD = 5000
+EXPORT_DIR = BASE_DIR / 'exports'
+# exports contain personal data; older files are deleted (seconds), see `manage.py purge_exports`
+CONTACT_EXPORT_MAX_AGE = 24 * 3600
+
+# per-process user cache used by CachedJWTAuthentication for tokens without claims (seconds, users)
+USER_CACHE_TTL = 60
+USER_CACHE_MAX_SIZE = 10_000
+# cache alias holding user invalidation times; must be shared between workers in production
+USER_INVALIDATION_CACHE = 'default'
+
 # cors_headers
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -0,0 +1,92 @@
+# django files
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+
+# package files
+import hashlib
+import os
+import re
+import tempfile
+
+
+BLOB_DIR = 'blobs'
+TMP_DIR = '.tmp-uploads'
+
+_EXTENSION = re.compile(r'^\.[a-z0-9]{1,10}$')
+
+
+def iter_file_fields():
+    """(model, field name) for every FileField / ImageField in the project"""
+    for model in apps.get_models():
+        for field in model._meta.concrete_fields:
+            if isinstance(field, models.FileField):
+                yield model, field.name
+
+
+def iter_referenced_names():
+    """همه نام‌های فایل که در دیتابیس ذخیره شده‌اند، شامل مشتق‌های image_variants"""
+    for model, field_name in iter_file_fields():
+        yield from model.objects.exclude(**{field_name: ''}).values_list(field_name, flat=True).iterator()
+    for model in apps.get_models():
+        if any(field.name == 'image_variants' for field in model._meta.concrete_fields):
+            for variants in model.objects.exclude(image_variants={}).values_list('image_variants', flat=True).iterator():
+                for item in (variants or {}).get('items', ()):
+                    yield item['name']
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every upload once, at `blobs/<hh>/<sha256><ext>`.
+
+    The file is hashed while it is streamed to a temporary file next to
+    MEDIA_ROOT and then moved into place; if the blob already exists the
+    copy is dropped and the existing name returned, so identical logos,
+    icons or service images share one file and one set of derivatives.
+    Because blobs are shared, `delete()` never removes one: checking for
+    other references first would race a concurrent upload of the same
+    content. Unreferenced blobs are removed in bulk by
+    `manage.py gc_media_blobs`, and reusing a blob refreshes its mtime so
+    the command's --min-age keeps it until the new row is committed.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # نام نهایی در _save از روی محتوا ساخته می‌شود
+        return name
+
+    def _save(self, name, content):
+        ext = os.path.splitext(name)[1].lower()
+        if not _EXTENSION.match(ext):
+            ext = ''
+
+        tmp_dir = self.path(TMP_DIR)
+        os.makedirs(tmp_dir, exist_ok=True)
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    fh.write(chunk)
+
+            hex_digest = digest.hexdigest()
+            blob_name = f'{BLOB_DIR}/{hex_digest[:2]}/{hex_digest}{ext}'
+            blob_path = self.path(blob_name)
+            if os.path.exists(blob_path):
+                os.unlink(tmp_path)
+                os.utime(blob_path)
+            else:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                if self.file_permissions_mode is not None:
+                    os.chmod(tmp_path, self.file_permissions_mode)
+                os.replace(tmp_path, blob_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return blob_name
+
+    def delete(self, name):
+        if name and name.startswith(f'{BLOB_DIR}/'):
+            return
+        super().delete(name)
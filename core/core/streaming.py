@@ -0,0 +1,71 @@
+# django files
+from django.http import StreamingHttpResponse
+
+# rest files
+from rest_framework.response import Response
+
+# your files
+from .middleware import measure_serialization
+from .renderers import FastJSONRenderer
+
+# package files
+from itertools import islice
+
+
+class StreamingListMixin:
+    """
+    Adds a streaming mode to `list`-style actions of a ModelViewSet.
+
+    With `?stream=true` the filtered queryset is read with
+    `iterator(chunk_size=...)`, every row goes through a single bound
+    serializer and the JSON array is yielded piece by piece, so memory use
+    does not grow with the size of the result.
+
+    Both modes report their serialization time to RequestMetricsMiddleware;
+    actions that build their own response should go through
+    `serialize_data`.
+    """
+    stream_chunk_size = 500
+    stream_query_param = 'stream'
+
+    def wants_stream(self, request):
+        return request.query_params.get(self.stream_query_param, '').lower() in ('1', 'true', 'yes')
+
+    def serialize_data(self, serializer):
+        with measure_serialization(self.request):
+            return serializer.data
+
+    def stream_queryset(self, queryset):
+        serializer = self.get_serializer()
+        renderer = FastJSONRenderer()
+        rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+
+        def generate():
+            # ردیف‌ها به اندازه یک chunk جمع و یکجا ارسال می‌شوند تا تعداد write ها کم بماند
+            yield b'['
+            separator = b''
+            while True:
+                with measure_serialization(self.request):
+                    buffer = [
+                        renderer.render(serializer.to_representation(obj))
+                        for obj in islice(rows, self.stream_chunk_size)
+                    ]
+                if not buffer:
+                    break
+                yield separator + b','.join(buffer)
+                separator = b','
+            yield b']'
+
+        return StreamingHttpResponse(generate(), content_type=renderer.media_type)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.wants_stream(request):
+            return self.stream_queryset(queryset)
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(self.serialize_data(serializer))
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(self.serialize_data(serializer))
@@ -0,0 +1,302 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .apps import check_shared_caches
+from .renderers import FastJSONRenderer, MessagePackRenderer, msgpack
+from .metrics import Registry, Counter, Histogram, generate_latest, throttle_rejections
+from .throttling import LocalBucketStore, local_store
+from . import geo, images, metrics
+from .images import load_reduced
+from accounts.models import User
+from contactUs.models import Honors, SocialLink, ContactInfo
+
+from datetime import date, time, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from PIL import Image
+from unittest import mock
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+
+class RendererTests(SimpleTestCase):
+    data = [{
+        'price': Decimal('350000.00'),
+        'duration': timedelta(minutes=45),
+        'date': date(2025, 1, 1),
+        'start_time': time(9, 30),
+        'created_at': timezone.now(),
+        'name': 'آرایشگاه گلچین',
+    }]
+
+    def test_fast_json_matches_stock_renderer(self):
+        self.assertEqual(
+            FastJSONRenderer().render(self.data),
+            JSONRenderer().render(self.data),
+        )
+
+    @unittest.skipIf(msgpack is None, 'msgpack is not installed')
+    def test_msgpack_round_trip(self):
+        payload = MessagePackRenderer().render(self.data)
+        decoded = msgpack.unpackb(payload)
+        self.assertEqual(decoded[0]['duration'], '2700.0')
+        self.assertEqual(decoded[0]['date'], '2025-01-01')
+        self.assertEqual(decoded[0]['start_time'], '09:30:00')
+
+    def test_msgpack_missing_is_a_configuration_error(self):
+        with mock.patch('core.renderers.msgpack', None):
+            with self.assertRaises(ImproperlyConfigured):
+                MessagePackRenderer().render(self.data)
+
+
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        self.registry = Registry()
+        self.requests = Counter('test_requests_total', 'Requests', ('result',), registry=self.registry)
+        self.latency = Histogram('test_latency_seconds', 'Latency', buckets=(0.1, 1), registry=self.registry)
+
+    def test_text_exposition(self):
+        self.requests.labels(result='ok').inc(2)
+        self.latency.observe(0.5)
+        text = generate_latest(self.registry)
+
+        self.assertIn('# TYPE test_requests_total counter', text)
+        self.assertIn('test_requests_total{result="ok"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 0', text)
+        self.assertIn('test_latency_seconds_bucket{le="1"} 1', text)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 1', text)
+        self.assertIn('test_latency_seconds_count 1', text)
+
+    def test_multiprocess_snapshots_are_summed(self):
+        self.requests.labels(result='ok').inc()
+        with tempfile.TemporaryDirectory() as directory, self.settings(METRICS_MULTIPROC_DIR=directory):
+            other_worker = self.registry.snapshot()
+            other_worker['test_requests_total']['samples'] = [[['ok'], 4.0]]
+            with open(os.path.join(directory, '99999.json'), 'w') as fh:
+                json.dump(other_worker, fh)
+
+            self.assertIn('test_requests_total{result="ok"} 5', generate_latest(self.registry))
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    locmem = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    redis = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost:6379'}
+
+    def test_local_memory_cache_is_refused_in_production(self):
+        with self.settings(DEBUG=False, CACHES={'default': self.locmem}):
+            with self.assertRaises(ImproperlyConfigured):
+                check_shared_caches()
+        with self.settings(DEBUG=True, CACHES={'default': self.locmem}):
+            check_shared_caches()
+
+    def test_every_shared_alias_is_checked(self):
+        with self.settings(DEBUG=False, CACHES={'default': self.redis, 'local': self.locmem}):
+            check_shared_caches()
+            with self.settings(SITE_CONTENT_CACHE='local'), self.assertRaises(ImproperlyConfigured):
+                check_shared_caches()
+
+
+class MetricsViewTests(TestCase):
+    def test_local_address_alone_is_not_enough(self):
+        # پشت پراکسی محلی همه درخواست‌ها از 127.0.0.1 می‌آیند
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='127.0.0.1').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_token_or_staff_is_required(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+
+        self.client.force_login(User.objects.create_user('ops', 'ops@example.com', 'pass', is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_snapshots_of_dead_workers_are_pruned(self):
+        with tempfile.TemporaryDirectory() as directory, self.settings(METRICS_MULTIPROC_DIR=directory):
+            metrics.flush()
+            dead = subprocess.Popen([sys.executable, '-c', ''])
+            dead.wait()
+            open(os.path.join(directory, f'{dead.pid}.json'), 'w').close()
+
+            self.assertEqual(metrics.prune_dead_snapshots(), 1)
+            self.assertEqual(os.listdir(directory), [f'{os.getpid()}.json'])
+
+
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        local_store.clear()
+        self.client = APIClient()
+
+    def register(self, username, ip='10.0.0.1', **extra):
+        # پسورد ناقص؛ درخواست قبل از هش کردن رد می‌شود
+        return self.client.post(
+            reverse('accounts:users-register'), {'username': username}, format='json', REMOTE_ADDR=ip, **extra
+        )
+
+    def test_bucket_refills_over_time(self):
+        store = LocalBucketStore()
+        self.assertEqual([store.consume('k', 2, 1.0, 0)[0] for _ in range(3)], [True, True, False])
+        self.assertTrue(store.consume('k', 2, 1.0, 1.0)[0])
+
+    def test_ip_bucket_rejects_burst_without_queries(self):
+        for i in range(5):
+            self.assertEqual(self.register(f'user{i}').status_code, 400)
+
+        rejected = throttle_rejections.labels(scope='register').get()
+        with self.assertNumQueries(0):
+            response = self.register('user5')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
+        self.assertEqual(throttle_rejections.labels(scope='register').get(), rejected + 1)
+
+    def test_forged_forwarded_for_does_not_reset_ip_bucket(self):
+        for i in range(5):
+            self.register(f'user{i}', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}')
+        self.assertEqual(self.register('user5', HTTP_X_FORWARDED_FOR='203.0.113.99').status_code, 429)
+
+    def test_trusted_proxy_forwards_client_ip(self):
+        with self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            for i in range(5):
+                self.register(f'user{i}', HTTP_X_FORWARDED_FOR='198.51.100.7, 203.0.113.1')
+            # اولین هاپ توسط کاربر قابل جعل است؛ آدرسی که پراکسی اضافه کرده ملاک است
+            self.assertEqual(self.register('user5', HTTP_X_FORWARDED_FOR='203.0.113.1').status_code, 429)
+            self.assertEqual(self.register('user6', HTTP_X_FORWARDED_FOR='203.0.113.2').status_code, 400)
+
+    def test_username_bucket_spans_ips(self):
+        for i in range(5):
+            self.register('target', ip=f'10.0.1.{i}')
+        self.assertEqual(self.register('Target', ip='10.0.2.1').status_code, 429)
+        self.assertEqual(self.register('other', ip='10.0.2.1').status_code, 400)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), BACKGROUND_TASKS_EAGER=True)
+class ContentAddressedStorageTests(TestCase):
+    def upload(self, color='green'):
+        buffer = BytesIO()
+        Image.new('RGB', (500, 250), color).save(buffer, format='JPEG')
+        return SimpleUploadedFile('upload.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_duplicate_upload_is_stored_and_processed_once(self):
+        with mock.patch.object(images, 'build_derivatives', wraps=images.build_derivatives) as build:
+            with self.captureOnCommitCallbacks(execute=True):
+                first = Honors.objects.create(name='یک', image=self.upload())
+            with self.captureOnCommitCallbacks(execute=True):
+                second = Honors.objects.create(name='دو', image=self.upload())
+
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(first.image.name, r'^blobs/[0-9a-f]{2}/[0-9a-f]{64}\.jpg$')
+        self.assertEqual(build.call_count, 1)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.image_variants, second.image_variants)
+
+    def test_delete_leaves_blobs_to_gc(self):
+        contact = ContactInfo.objects.create()
+        icon = SocialLink.objects.create(contact=contact, name='a', url='https://a.example', icon=self.upload())
+        icon.delete()
+
+        with self.assertNumQueries(0):
+            default_storage.delete(icon.icon.name)
+        self.assertTrue(default_storage.exists(icon.icon.name))
+
+        call_command('gc_media_blobs', min_age=0, stdout=StringIO())
+        self.assertFalse(default_storage.exists(icon.icon.name))
+
+    def test_reused_blob_survives_gc_min_age(self):
+        name = SocialLink.objects.create(
+            contact=ContactInfo.objects.create(), name='a', url='https://a.example', icon=self.upload('red')
+        ).icon.name
+        SocialLink.objects.all().delete()
+        os.utime(default_storage.path(name), (0, 0))
+
+        # آپلود دوباره همان محتوا قبل از commit ردیف جدید
+        self.assertEqual(default_storage.save('again.jpg', self.upload('red')), name)
+        call_command('gc_media_blobs', min_age=3600, stdout=StringIO())
+        self.assertTrue(default_storage.exists(name))
+
+    def test_gc_removes_unreferenced_blobs(self):
+        contact = ContactInfo.objects.create()
+        kept = SocialLink.objects.create(contact=contact, name='a', url='https://a.example', icon=self.upload()).icon.name
+        orphan = default_storage.save('orphan.txt', ContentFile(b'orphan'))
+
+        call_command('gc_media_blobs', min_age=0, stdout=StringIO())
+
+        self.assertTrue(default_storage.exists(kept))
+        self.assertFalse(default_storage.exists(orphan))
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), BACKGROUND_TASKS_EAGER=True)
+class ImageUploadHandlerTests(TestCase):
+    def post(self, content, name='home.png', content_type='image/png'):
+        upload = SimpleUploadedFile(name, content, content_type=content_type)
+        return APIClient().post(reverse('accounts:home_images-list'), {'name': 'خانه', 'image': upload})
+
+    def png(self, size):
+        buffer = BytesIO()
+        Image.new('RGB', size, 'white').save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    def test_valid_image_is_accepted(self):
+        self.assertEqual(self.post(self.png((40, 30))).status_code, 201)
+
+    def test_bogus_header_is_rejected(self):
+        response = self.post(b'not an image' * 100)
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(MAX_IMAGE_PIXELS=1000)
+    def test_pixel_limit_is_checked_from_header(self):
+        self.assertEqual(self.post(self.png((40, 30))).status_code, 400)
+
+    @override_settings(MAX_UPLOAD_SIZE=100)
+    def test_size_limit(self):
+        self.assertEqual(self.post(self.png((40, 30)) + b'0' * 200).status_code, 400)
+
+    def test_jpeg_is_decoded_in_draft_mode(self):
+        buffer = BytesIO()
+        Image.new('RGB', (4000, 3000), 'white').save(buffer, format='JPEG')
+        with Image.open(buffer) as img:
+            reduced = load_reduced(img, 500)
+            # 1/8 scale; still at least the requested width
+            self.assertEqual(reduced.size, (500, 375))
+
+
+class GeoTests(SimpleTestCase):
+    def test_haversine(self):
+        # تهران تا اصفهان
+        self.assertAlmostEqual(geo.haversine(35.6892, 51.3890, 32.6546, 51.6680), 338, delta=3)
+        self.assertEqual(geo.haversine(10, 20, 10, 20), 0)
+
+    def test_bounding_box_contains_circle(self):
+        box = geo.bounding_box(35.7, 51.4, 100)
+        bounds = dict(child for child in box.children if isinstance(child, tuple))
+        # هر نقطه روی مرز دایره داخل جعبه است
+        for bearing in range(0, 360, 15):
+            angular = 100 / geo.EARTH_RADIUS_KM
+            lat1, lon1, theta = math.radians(35.7), math.radians(51.4), math.radians(bearing)
+            lat2 = math.asin(math.sin(lat1) * math.cos(angular) + math.cos(lat1) * math.sin(angular) * math.cos(theta))
+            lon2 = lon1 + math.atan2(math.sin(theta) * math.sin(angular) * math.cos(lat1),
+                                     math.cos(angular) - math.sin(lat1) * math.sin(lat2))
+            self.assertTrue(bounds['latitude__gte'] - 1e-9 <= math.degrees(lat2) <= bounds['latitude__lte'] + 1e-9)
+            self.assertTrue(bounds['longitude__gte'] - 1e-9 <= math.degrees(lon2) <= bounds['longitude__lte'] + 1e-9)
+
+    def test_bounding_box_across_antimeridian_and_pole(self):
+        box = geo.bounding_box(0, 179.9, 50)
+        longitudes = [child for child in box.children if not isinstance(child, tuple)][0]
+        self.assertEqual(longitudes.connector, 'OR')
+
+        polar = geo.bounding_box(89.9, 0, 50)
+        self.assertEqual({key for key, value in polar.children}, {'latitude__gte', 'latitude__lte'})
@@ -0,0 +1,31 @@
+# package files
+import re
+
+
+# عربی ← فارسی، ارقام فارسی و عربی ← لاتین
+_TRANSLATION = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'ٱ': 'ا',
+    'ؤ': 'و',
+    **{chr(0x06F0 + i): str(i) for i in range(10)},
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+})
+
+# اعراب، تطویل، نیم‌فاصله و نویسه‌های جهت متن
+_REMOVED = re.compile('[\u064b-\u065f\u0670\u0640\u200c\u200d\u200e\u200f]')
+_NON_WORD = re.compile(r'[^\w@.+-]+')
+
+
+def normalize_persian(text):
+    """
+    Folds the spellings users mix when typing Persian: Arabic ي/ك and
+    friends to Persian letters, Persian/Arabic digits to ASCII, and drops
+    diacritics, tatweel and ZWNJ (so «می‌خواهم» and «میخواهم» match).
+    Also lowercases and collapses punctuation and whitespace.
+    """
+    if not text:
+        return ''
+    text = _REMOVED.sub('', text.translate(_TRANSLATION)).lower()
+    return ' '.join(_NON_WORD.sub(' ', text).split())
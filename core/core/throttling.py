@@ -0,0 +1,150 @@
+# django files
+from django.conf import settings
+from django.core.cache import caches
+
+# rest files
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+# your files
+from core import metrics
+
+# package files
+from collections import OrderedDict
+import threading
+import time
+
+
+class LocalBucketStore:
+    """
+    Token buckets in process memory. Least recently used keys are dropped
+    past `max_keys`; a dropped bucket simply starts full again.
+    """
+
+    def __init__(self, max_keys=10_000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, refill_rate, now):
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, tokens
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class CacheBucketStore:
+    """
+    Token buckets in a shared Django cache so several workers share one
+    limit. The read-modify-write is not atomic; under a race a client can
+    get a request or two more than the rate, never fewer.
+    """
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def consume(self, key, capacity, refill_rate, now):
+        tokens, updated_at = self.cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        # تا پر شدن دوباره سطل نگه داشته می‌شود
+        self.cache.set(key, (tokens, now), timeout=int((capacity - tokens) / refill_rate) + 1)
+        return allowed, tokens
+
+    def clear(self):
+        self.cache.clear()
+
+
+local_store = LocalBucketStore()
+
+
+def get_bucket_store():
+    alias = getattr(settings, 'THROTTLE_CACHE', None)
+    if alias:
+        return CacheBucketStore(alias)
+    return local_store
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Token bucket version of DRF's scoped throttle.
+
+    The rate `N/period` is a bucket of N tokens refilled evenly over the
+    period, so bursts up to N are allowed and the sustained rate is N per
+    period. One bucket is kept for the client IP and one for each value of
+    `key_fields` found in the request body (e.g. the username), so rotating
+    IPs against one account is limited as well. Checks run in the view's
+    `initial()`, before the serializer hashes a password or touches the DB.
+    """
+    key_fields = ()
+
+    def __init__(self):
+        super().__init__()
+        self.store = get_bucket_store()
+        self.tokens = None
+
+    def get_rate(self):
+        # api_settings خوانده می‌شود تا override_settings در تست‌ها اعمال شود
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            return super().get_rate()
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': f'ip:{self.get_ident(request)}'}
+
+    def get_keys(self, request, view):
+        keys = [self.get_cache_key(request, view)]
+        for field in self.key_fields:
+            value = request.data.get(field) if hasattr(request.data, 'get') else None
+            if isinstance(value, str) and value.strip():
+                ident = f'{field}:{value.strip().lower()}'
+                keys.append(self.cache_format % {'scope': self.scope, 'ident': ident})
+        return keys
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        capacity = self.num_requests
+        refill_rate = self.num_requests / self.duration
+        now = time.monotonic() if self.store is local_store else time.time()
+
+        for key in self.get_keys(request, view):
+            allowed, self.tokens = self.store.consume(key, capacity, refill_rate, now)
+            if not allowed:
+                metrics.throttle_rejections.labels(scope=self.scope).inc()
+                return False
+        return True
+
+    def wait(self):
+        if self.tokens is None:
+            return None
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class RegisterThrottle(TokenBucketThrottle):
+    scope = 'register'
+    key_fields = ('username', 'email')
+
+
+class LoginThrottle(TokenBucketThrottle):
+    scope = 'login'
+    key_fields = ('username',)
+
+
+class ContactThrottle(TokenBucketThrottle):
+    scope = 'contact'
+    key_fields = ('email',)
@@ -0,0 +1,90 @@
+# django files
+from django.conf import settings
+from django.core.exceptions import SuspiciousOperation
+from django.core.files.uploadhandler import FileUploadHandler
+
+# rest files
+from rest_framework.exceptions import ParseError
+
+# package files
+from PIL import Image, ImageFile
+import os
+
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.bmp', '.tif', '.tiff', '.avif'}
+
+# اگر تا این مقدار داده هدر تصویر شناسایی نشود فایل رد می‌شود
+HEADER_LIMIT = 256 * 1024
+
+
+def get_max_image_pixels():
+    return getattr(settings, 'MAX_IMAGE_PIXELS', 40_000_000)
+
+
+class UploadRejected(ParseError, SuspiciousOperation):
+    """
+    DRF views answer it as a JSON 400 (ParseError); plain Django views such
+    as the admin as a 400 (SuspiciousOperation) instead of a 500.
+    """
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """
+    First handler in FILE_UPLOAD_HANDLERS. It passes every chunk through to
+    the memory / temporary file handlers after it, but
+
+    - rejects a file as soon as it grows past MAX_UPLOAD_SIZE, and
+    - for image uploads, feeds the first chunks to PIL's incremental parser
+      and rejects the file once the header shows an unknown format or more
+      than MAX_IMAGE_PIXELS pixels,
+
+    so an oversized or bogus image is refused before the rest of the body
+    is read or written anywhere.
+    """
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self.max_size = getattr(settings, 'MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+        self.received = 0
+        is_image = (content_type or '').startswith('image/') or os.path.splitext(file_name)[1].lower() in IMAGE_EXTENSIONS
+        self.parser = ImageFile.Parser() if is_image else None
+
+        if content_length is not None and content_length > self.max_size:
+            self.reject(f"فایل {file_name} بزرگتر از حد مجاز است")
+
+    def reject(self, message):
+        self.parser = None
+        raise UploadRejected(message)
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            self.reject(f"فایل {self.file_name} بزرگتر از حد مجاز است")
+
+        if self.parser is not None:
+            self.check_header(raw_data)
+        return raw_data
+
+    def check_header(self, raw_data):
+        try:
+            self.parser.feed(raw_data)
+        except (OSError, SyntaxError, Image.DecompressionBombError):
+            self.reject(f"فایل {self.file_name} یک تصویر معتبر نیست")
+
+        image = self.parser.image
+        if image is None:
+            if self.received > HEADER_LIMIT:
+                self.reject(f"فایل {self.file_name} یک تصویر معتبر نیست")
+            return
+
+        width, height = image.size
+        if width * height > get_max_image_pixels():
+            self.reject(f"ابعاد تصویر {self.file_name} بیش از حد مجاز است")
+        # هدر بررسی شد؛ بقیه فایل دیکد نمی‌شود
+        self.parser = None
+
+    def file_complete(self, file_size):
+        if self.parser is not None and self.parser.image is None:
+            self.reject(f"فایل {self.file_name} یک تصویر معتبر نیست")
+        self.parser = None
+        return None
@@ -22,14 +22,21 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from .throttling import LoginThrottle
+from .views import EndpointMetricsView, metrics_view, ProfileListView, ProfileDownloadView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/v1/accounts/', include('accounts.urls', namespace='accounts')),
     path('api/v1/salons/', include('salons.urls', namespace='salons')),
     path('api/v1/appointments/', include('appointments.urls', namespace='appointments')),
     path('api/v1/contactUs/', include('contactUs.urls', namespace='contactUs')),
-    path('api/v1/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/v1/token/', TokenObtainPairView.as_view(throttle_classes=[LoginThrottle]), name='token_obtain_pair'),
     path('api/v1/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/v1/metrics/endpoints/', EndpointMetricsView.as_view(), name='endpoint_metrics'),
+    path('metrics', metrics_view, name='metrics'),
+    path('api/v1/profiles/', ProfileListView.as_view(), name='profiles'),
+    path('api/v1/profiles/<str:name>/', ProfileDownloadView.as_view(), name='profile_download'),
 ]
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -0,0 +1,65 @@
+# django files
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, FileResponse, Http404
+from django.utils.crypto import constant_time_compare
+
+# rest files
+from rest_framework import serializers
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+
+# your files
+from .metrics import endpoint_snapshot, generate_latest
+from . import profiling
+
+
+class EndpointMetricsView(APIView):
+    """آمار کوئری و زمان پاسخ هر endpoint در همین پروسه"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(endpoint_snapshot())
+
+
+def has_metrics_token(request):
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    scheme, _, value = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    return bool(token) and scheme.lower() == 'bearer' and constant_time_compare(value.strip(), token)
+
+
+def metrics_view(request):
+    """متریک‌ها با فرمت متنی Prometheus؛ برای کاربران staff، توکن METRICS_TOKEN یا IP های صریحاً مجاز"""
+    allowed_ips = getattr(settings, 'METRICS_ALLOWED_IPS', ())
+    if not (request.user.is_staff or has_metrics_token(request) or request.META.get('REMOTE_ADDR') in allowed_ips):
+        return HttpResponseForbidden()
+    return HttpResponse(generate_latest(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class ProfileListQuerySerializer(serializers.Serializer):
+    """?limit= تعداد پروفایل برای هر endpoint"""
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=5)
+
+
+class ProfileListView(APIView):
+    """کندترین درخواست‌های پروفایل‌شده به تفکیک endpoint"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        params = ProfileListQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return Response(profiling.slowest_by_endpoint(params.validated_data['limit']))
+
+    def post(self, request):
+        # توکن برای ارسال در هدر X-Profile
+        return Response({'token': profiling.make_profile_token()})
+
+
+class ProfileDownloadView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, name):
+        path = profiling.get_profile_path(name)
+        if path is None:
+            raise Http404
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=path.name)
@@ -1,9 +1,20 @@
 from django.contrib import admin
+from django.db.models import Count, OuterRef
+from django.db.models.functions import TruncDate, TruncTime
+from django.utils import timezone
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 import jdatetime
-from .models import Salon, WorkingHours, TimeSlotConfig, TimeSlot, BlockedTime, TimeSlotBlock
+from datetime import date, timezone as dt_timezone
+import re
+from .models import Salon, SalonMembership, WorkingHours, TimeSlotConfig, TimeSlot, BlockedTime, TimeSlotBlock
+from core.admin import is_autocomplete
+from core.expressions import SubqueryCount
+from core.text import normalize_persian
+
+
+SEARCH_DATE = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})$')
 
 
 @admin.register(Salon)
@@ -12,6 +23,15 @@ class SalonAdmin(admin.ModelAdmin):
     list_filter = ('manager',)
     search_fields = ('name', 'address')
     readonly_fields = ('view_time_slots_link', 'view_blocked_times_link')
+    list_select_related = ('manager',)
+    autocomplete_fields = ('manager',)
+
+    def get_queryset(self, request):
+        # شمارش‌ها در همان کوئری لیست؛ دو Count روی join ردیف‌ها را ضرب می‌کرد
+        return super().get_queryset(request).annotate(
+            time_slots_total=SubqueryCount(TimeSlot.objects.filter(salon=OuterRef('pk'))),
+            blocked_times_total=SubqueryCount(BlockedTime.objects.filter(salon=OuterRef('pk'))),
+        )
 
     def address_preview(self, obj):
         return obj.address[:50] + '...' if len(obj.address) > 50 else obj.address
@@ -19,18 +39,35 @@ class SalonAdmin(admin.ModelAdmin):
     address_preview.short_description = "آدرس"
 
     def view_time_slots_link(self, obj):
-        count = obj.time_slots.count()
+        count = obj.time_slots_total
         url = reverse('admin:salons_timeslot_changelist') + f'?salon__id__exact={obj.id}'
         return format_html('<a href="{}">مشاهده تایم اسلات‌ها ({})</a>', url, count)
 
     view_time_slots_link.short_description = "تایم اسلات‌ها"
+    view_time_slots_link.admin_order_field = 'time_slots_total'
 
     def view_blocked_times_link(self, obj):
-        count = obj.blocked_times.count()
+        count = obj.blocked_times_total
         url = reverse('admin:salons_blockedtime_changelist') + f'?salon__id__exact={obj.id}'
         return format_html('<a href="{}">مشاهده زمان‌های مسدود ({})</a>', url, count)
 
     view_blocked_times_link.short_description = "زمان‌های مسدود"
+    view_blocked_times_link.admin_order_field = 'blocked_times_total'
+
+
+@admin.register(SalonMembership)
+class SalonMembershipAdmin(admin.ModelAdmin):
+    list_display = ('user', 'salon', 'role', 'is_active', 'created_at')
+    list_filter = ('role', 'is_active', 'salon')
+    search_fields = ('user__username', 'salon__name')
+    list_select_related = ('user', 'salon')
+    raw_id_fields = ('user',)
+
+
+class SalonMembershipInline(admin.TabularInline):
+    model = SalonMembership
+    extra = 1
+    raw_id_fields = ('user',)
 
 
 class WorkingHoursInline(admin.TabularInline):
@@ -47,7 +84,7 @@ class TimeSlotConfigInline(admin.StackedInline):
 
 
 class SalonAdminWithInlines(SalonAdmin):
-    inlines = [WorkingHoursInline, TimeSlotConfigInline]
+    inlines = [WorkingHoursInline, TimeSlotConfigInline, SalonMembershipInline]
 
 
 @admin.register(WorkingHours)
@@ -56,6 +93,7 @@ class WorkingHoursAdmin(admin.ModelAdmin):
     list_filter = ('salon', 'day_of_week', 'is_active')
     search_fields = ('salon__name',)
     list_editable = ('start_time', 'end_time', 'is_active')
+    list_select_related = ('salon',)
 
     def day_jalali(self, obj):
         return obj.get_day_of_week_jalali()
@@ -68,6 +106,21 @@ class TimeSlotConfigAdmin(admin.ModelAdmin):
     list_display = ('salon', 'interval_minutes', 'capacity_per_slot')
     list_filter = ('salon',)
     search_fields = ('salon__name',)
+    list_select_related = ('salon',)
+
+
+def parse_search_date(value):
+    """تاریخ میلادی یا شمسی (2025-01-01، 1403/10/12، با ارقام فارسی) یا None"""
+    match = SEARCH_DATE.match(normalize_persian(value))
+    if not match:
+        return None
+    year, month, day = map(int, match.groups())
+    try:
+        if year < 1700:
+            return jdatetime.date(year, month, day).togregorian()
+        return date(year, month, day)
+    except ValueError:
+        return None
 
 
 @admin.register(TimeSlot)
@@ -76,9 +129,37 @@ class TimeSlotAdmin(admin.ModelAdmin):
     'salon', 'date_jalali', 'day_of_week_jalali', 'start_time', 'end_time', 'max_capacity', 'booked_count',
     'available_capacity', 'is_active', 'view_appointments_link')
     list_filter = ('salon', 'date', 'is_active')
-    search_fields = ('salon__name', 'date')
+    # جستجو: پیشوند نام آرایشگاه و/یا تاریخ، مثل «گلچین 1403/10/12» (get_search_results)
+    search_fields = ('^salon__name',)
     readonly_fields = ('available_capacity', 'view_appointments_link', 'date_jalali', 'day_of_week_jalali')
     date_hierarchy = 'date'
+    list_select_related = ('salon',)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        if is_autocomplete(request):
+            # __str__ نام آرایشگاه را می‌خواند؛ ترتیب با ایندکس (date, start_time)
+            return queryset.select_related('salon').order_by('date', 'start_time')
+        return queryset.annotate(appointments_total=Count('appointments'))
+
+    def get_search_results(self, request, queryset, search_term):
+        words = []
+        searched_date = False
+        for word in search_term.replace('/', '-').split():
+            day = parse_search_date(word)
+            if day is not None:
+                # ایندکس (salon, date, start_time)
+                queryset = queryset.filter(date=day)
+                searched_date = True
+            else:
+                words.append(word)
+        if words:
+            queryset = queryset.filter(salon__name__istartswith=' '.join(words))
+        if is_autocomplete(request) and not searched_date:
+            # بدون تاریخ فقط تایم اسلات‌های آینده؛ صفحه اول از ایندکس (date, start_time) خوانده می‌شود
+            # و کل جدول مرتب نمی‌شود. تایم اسلات گذشته با جستجوی تاریخ پیدا می‌شود.
+            queryset = queryset.filter(date__gte=timezone.localdate())
+        return queryset, False
 
     def date_jalali(self, obj):
         return obj.get_date_jalali()
@@ -96,13 +177,14 @@ class TimeSlotAdmin(admin.ModelAdmin):
     available_capacity.short_description = "ظرفیت باقی‌مانده"
 
     def view_appointments_link(self, obj):
-        count = obj.appointments.count()
+        count = obj.appointments_total
         if count == 0:
             return "بدون رزرو"
         url = reverse('admin:appointments_appointment_changelist') + f'?time_slot__id__exact={obj.id}'
         return format_html('<a href="{}">مشاهده رزروها ({})</a>', url, count)
 
     view_appointments_link.short_description = "رزروها"
+    view_appointments_link.admin_order_field = 'appointments_total'
 
     actions = ['block_selected_slots', 'unblock_selected_slots']
 
@@ -136,6 +218,21 @@ class BlockedTimeAdmin(admin.ModelAdmin):
     readonly_fields = (
     'created_at', 'view_affected_slots_link', 'start_datetime_jalali', 'end_datetime_jalali', 'created_at_jalali')
     date_hierarchy = 'start_datetime'
+    list_select_related = ('salon',)
+
+    def get_queryset(self, request):
+        # همان شرط view_affected_slots_link (تاریخ و ساعت به UTC، مثل datetime.date())
+        affected = TimeSlot.objects.filter(
+            salon=OuterRef('salon'),
+            date=OuterRef('start_date_utc'),
+            start_time__gte=OuterRef('start_time_utc'),
+            start_time__lt=OuterRef('end_time_utc'),
+        )
+        return super().get_queryset(request).annotate(
+            start_date_utc=TruncDate('start_datetime', tzinfo=dt_timezone.utc),
+            start_time_utc=TruncTime('start_datetime', tzinfo=dt_timezone.utc),
+            end_time_utc=TruncTime('end_datetime', tzinfo=dt_timezone.utc),
+        ).annotate(affected_slots_total=SubqueryCount(affected))
 
     def start_datetime_jalali(self, obj):
         return obj.get_start_datetime_jalali()
@@ -153,16 +250,11 @@ class BlockedTimeAdmin(admin.ModelAdmin):
     created_at_jalali.short_description = "تاریخ ایجاد (شمسی)"
 
     def view_affected_slots_link(self, obj):
-        count = TimeSlot.objects.filter(
-            salon=obj.salon,
-            date=obj.start_datetime.date(),
-            start_time__gte=obj.start_datetime.time(),
-            start_time__lt=obj.end_datetime.time()
-        ).count()
+        count = obj.affected_slots_total
         if count == 0:
             return "بدون تایم اسلات تحت تأثیر"
         url = reverse(
-            'admin:salons_timeslot_changelist') + f'?salon__id__exact={obj.salon.id}&date__exact={obj.start_datetime.date()}'
+            'admin:salons_timeslot_changelist') + f'?salon__id__exact={obj.salon_id}&date__exact={obj.start_datetime.date()}'
         return format_html('<a href="{}">مشاهده تایم اسلات‌ها ({})</a>', url, count)
 
     view_affected_slots_link.short_description = "تایم اسلات‌های تحت تأثیر"
@@ -188,6 +280,8 @@ class TimeSlotBlockAdmin(admin.ModelAdmin):
     search_fields = ('time_slot__salon__name', 'reason')
     readonly_fields = ('time_slot_info', 'created_at_jalali')
     date_hierarchy = 'created_at'
+    list_select_related = ('time_slot__salon',)
+    autocomplete_fields = ('time_slot',)
 
     def time_slot_info(self, obj):
         return f"{obj.time_slot.salon.name} - {obj.time_slot.get_date_jalali()} {obj.time_slot.start_time}"
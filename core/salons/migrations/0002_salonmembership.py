@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salons', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalonMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('STAFF', 'آرایشگر'), ('MANAGER', 'مدیر')], default='STAFF', max_length=20, verbose_name='نقش')),
+                ('is_active', models.BooleanField(default=True, verbose_name='فعال')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('salon', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='salons.salon')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='salon_memberships', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'عضویت در آرایشگاه',
+                'verbose_name_plural': 'عضویت\u200cهای آرایشگاه',
+                'unique_together': {('user', 'salon')},
+            },
+        ),
+    ]
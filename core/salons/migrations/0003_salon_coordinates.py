@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salons', '0002_salonmembership'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salon',
+            name='latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='عرض جغرافیایی'),
+        ),
+        migrations.AddField(
+            model_name='salon',
+            name='longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True, verbose_name='طول جغرافیایی'),
+        ),
+        migrations.AddIndex(
+            model_name='salon',
+            index=models.Index(fields=['latitude', 'longitude'], name='salon_lat_lng_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:10
+
+from django.db import migrations
+
+from core.operations import AddPrefixSearchIndex
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salons', '0003_salon_coordinates'),
+    ]
+
+    operations = [
+        # جستجوی پیشوندی ویجت‌های autocomplete ادمین
+        AddPrefixSearchIndex(model_name='salon', field_name='name', name='salons_salon_name_prefix'),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salons', '0004_salon_name_prefix_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='timeslot',
+            index=models.Index(fields=['date', 'start_time'], name='timeslot_date_start_idx'),
+        ),
+    ]
@@ -1,11 +1,14 @@
 from django.db import models
+from django.db.models import Q
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 # your files
 from accounts.models import User
+from core import metrics
 # package files
 from datetime import datetime, timedelta
 import jdatetime
+import time
 
 
 class Salon(models.Model):
@@ -18,10 +21,63 @@ class Salon(models.Model):
         limit_choices_to={'role': 'MANAGER'}
     )
     description = models.TextField(blank=True, verbose_name="توضیحات")
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, verbose_name="عرض جغرافیایی")
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True, verbose_name="طول جغرافیایی")
+
+    class Meta:
+        indexes = [
+            # پیش‌فیلتر جعبه محدوده در جستجوی آرایشگاه‌های نزدیک (core.geo)
+            models.Index(fields=['latitude', 'longitude'], name='salon_lat_lng_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def with_free_slots(cls, date, start_time, end_time):
+        """
+        آرایشگاه‌هایی که در تاریخ و بازه ساعت داده شده تایم اسلات آزاد دارند، همراه با
+        earliest_opening (اولین ساعت آزاد) و free_slots؛ با یک join و GROUP BY، بدون حلقه روی آرایشگاه‌ها
+        """
+        free = Q(
+            time_slots__date=date,
+            time_slots__is_active=True,
+            time_slots__booked_count__lt=models.F('time_slots__max_capacity'),
+            time_slots__start_time__gte=start_time,
+            time_slots__start_time__lt=end_time,
+        )
+        return cls.objects.filter(free).annotate(
+            earliest_opening=models.Min('time_slots__start_time'),
+            free_slots=models.Count('time_slots'),
+        )
+
+    @classmethod
+    def access_for_user(cls, user):
+        """
+        (همه آرایشگاه‌های کاربر، آرایشگاه‌هایی که کاربر مدیر آن‌هاست) در یک کوئری؛
+        مدیر یعنی Salon.manager یا عضویت فعال با نقش MANAGER. عضویت STAFF دسترسی مدیریتی نمی‌دهد.
+        (هر دو بخش union از ایندکس استفاده می‌کنند)
+        """
+        managed = cls.objects.filter(manager=user).annotate(
+            is_manager=models.Value(True, output_field=models.BooleanField())
+        ).values_list('id', 'is_manager')
+        member_of = SalonMembership.objects.filter(user=user, is_active=True).annotate(
+            is_manager=models.ExpressionWrapper(Q(role='MANAGER'), output_field=models.BooleanField())
+        ).values_list('salon_id', 'is_manager')
+
+        salon_ids, managed_ids = set(), set()
+        for salon_id, is_manager in managed.union(member_of, all=True):
+            salon_ids.add(salon_id)
+            if is_manager:
+                managed_ids.add(salon_id)
+        return frozenset(salon_ids), frozenset(managed_ids)
+
+    @classmethod
+    def ids_for_user(cls, user, managed=False):
+        """شناسه آرایشگاه‌هایی که کاربر عضو آن‌هاست، یا با managed=True فقط آن‌هایی که مدیرشان است"""
+        salon_ids, managed_ids = cls.access_for_user(user)
+        return set(managed_ids if managed else salon_ids)
+
     # متدهای کمکی برای تبدیل تاریخ به شمسی
     def get_created_at_jalali(self):
         if hasattr(self, 'created_at') and self.created_at:
@@ -33,6 +89,8 @@ class Salon(models.Model):
         """
         ایجاد بازه‌های زمانی برای یک بازه تاریخ مشخص
         """
+        started = time.perf_counter()
+        generated = 0
         config = self.time_slot_config
         working_hours = {wh.day_of_week: wh for wh in self.working_hours.filter(is_active=True)}
         blocked_times = self.blocked_times.filter(
@@ -66,9 +124,16 @@ class Salon(models.Model):
                             'is_active': not is_blocked
                         }
                     )
+                    generated += 1
                     current_slot_start = current_slot_end
             current_date += timedelta(days=1)
 
+        elapsed = time.perf_counter() - started
+        metrics.time_slots_generated.inc(generated)
+        metrics.time_slot_generation_seconds.observe(elapsed)
+        if elapsed > 0:
+            metrics.time_slot_generation_rate.set(generated / elapsed)
+
     def block_time_range(self, start_datetime, end_datetime, reason=""):
         """
         مسدود کردن یک بازه زمانی خاص
@@ -86,10 +151,14 @@ class Salon(models.Model):
             start_time__lt=end_datetime.time(),
             is_active=True
         )
+        blocked = 0
         for slot in affected_slots:
             slot.is_active = False
             slot.save()
             TimeSlotBlock.objects.create(time_slot=slot, reason=reason)
+            blocked += 1
+        metrics.blocked_range_slots.observe(blocked)
+        metrics.blocked_range_minutes.observe((end_datetime - start_datetime).total_seconds() / 60)
 
     def unblock_time_range(self, start_datetime, end_datetime):
         """
@@ -114,6 +183,35 @@ class Salon(models.Model):
             slot.save()
 
 
+class SalonMembership(models.Model):
+    ROLE_CHOICES = [
+        ('STAFF', 'آرایشگر'),
+        ('MANAGER', 'مدیر'),
+    ]
+    salon = models.ForeignKey(
+        Salon,
+        on_delete=models.CASCADE,
+        related_name='memberships'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='salon_memberships'
+    )
+    role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='STAFF', verbose_name="نقش")
+    is_active = models.BooleanField(default=True, verbose_name="فعال")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # ستون user اول است تا جستجوی آرایشگاه‌های یک کاربر از همین ایندکس استفاده کند
+        unique_together = ('user', 'salon')
+        verbose_name = "عضویت در آرایشگاه"
+        verbose_name_plural = "عضویت‌های آرایشگاه"
+
+    def __str__(self):
+        return f"{self.user.username} - {self.salon.name}"
+
+
 # salons/models.py
 
 class WorkingHours(models.Model):
@@ -184,6 +282,27 @@ class TimeSlot(models.Model):
 
     class Meta:
         unique_together = ('salon', 'date', 'start_time')
+        indexes = [
+            # autocomplete ادمین بدون فیلتر آرایشگاه به ترتیب زمان
+            models.Index(fields=['date', 'start_time'], name='timeslot_date_start_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_schedule = instance._schedule()
+        return instance
+
+    def _schedule(self):
+        return self.__dict__.get('salon_id'), self.__dict__.get('date'), self.__dict__.get('start_time')
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # رزروها salon/date/start_time را کپی دارند؛ فقط وقتی تغییر کرده‌اند به‌روزرسانی می‌شوند
+        schedule = self._schedule()
+        if getattr(self, '_loaded_schedule', schedule) != schedule:
+            self.appointments.update(salon_id=self.salon_id, date=self.date, start_time=self.start_time)
+        self._loaded_schedule = schedule
 
     def clean(self):
         super().clean()
@@ -1,5 +1,62 @@
 # salons/permissions.py
 from rest_framework import permissions
+from rest_framework.exceptions import NotFound, ValidationError
+
+# your files
+from .models import Salon
+from core import metrics
+
+
+def get_salon_ids(request, managed=False):
+    """
+    شناسه آرایشگاه‌های کاربر فعلی؛ فقط یک بار در هر درخواست از دیتابیس خوانده می‌شود
+    و برای فیلتر viewset ها و بررسی دسترسی اشیا استفاده می‌شود.
+    با managed=True فقط آرایشگاه‌هایی که کاربر مدیر آن‌هاست (برای IsSalonManager)؛
+    عضویت STAFF در آرایشگاه دیگر دسترسی مدیریتی نمی‌دهد حتی اگر نقش کلی کاربر MANAGER باشد.
+    """
+    # روی HttpRequest اصلی ذخیره می‌شود تا بین Request های DRF و میدلورها مشترک باشد
+    http_request = getattr(request, '_request', request)
+    access = getattr(http_request, '_salon_access', None)
+    metrics.record_cache('salon_ids', access is not None)
+    if access is None:
+        user = request.user
+        if not user.is_authenticated or user.role not in ('MANAGER', 'STAFF'):
+            access = (frozenset(), frozenset())
+        elif getattr(user, 'claimed_salon_ids', None) is not None and getattr(user, 'claimed_managed_salon_ids', None) is not None:
+            # از claim های توکن (CachedJWTAuthentication)؛ بدون کوئری
+            access = (user.claimed_salon_ids, user.claimed_managed_salon_ids)
+        else:
+            access = Salon.access_for_user(user)
+        http_request._salon_access = access
+    return access[1] if managed else access[0]
+
+
+def get_managed_salon(request, salon_id=None):
+    """
+    آرایشگاه مقصد عملیات مدیریتی (ایجاد یا مسدود کردن تایم اسلات‌ها).
+    پارامتر salon فقط وقتی کاربر یک آرایشگاه را مدیریت می‌کند اختیاری است؛
+    آرایشگاهی که کاربر مدیر آن نیست مثل viewset ها 404 برمی‌گرداند.
+    """
+    managed = get_salon_ids(request, managed=True)
+    if not managed:
+        raise ValidationError({"error": "شما آرایشگاهی را مدیریت نمی‌کنید"})
+    if salon_id is None:
+        if len(managed) > 1:
+            raise ValidationError({"salon": "شما چند آرایشگاه را مدیریت می‌کنید؛ آرایشگاه را مشخص کنید"})
+        salon_id = next(iter(managed))
+    elif salon_id not in managed:
+        raise NotFound()
+    return Salon.objects.get(pk=salon_id)
+
+
+def get_object_salon_id(obj):
+    if isinstance(obj, Salon):
+        return obj.pk
+    if hasattr(obj, 'salon_id'):
+        return obj.salon_id
+    if hasattr(obj, 'time_slot'):
+        return obj.time_slot.salon_id
+    return None
 
 
 class IsSalonManager(permissions.BasePermission):
@@ -7,11 +64,7 @@ class IsSalonManager(permissions.BasePermission):
         return request.user.is_authenticated and request.user.role == 'MANAGER'
 
     def has_object_permission(self, request, view, obj):
-        if hasattr(obj, 'manager'):
-            return obj.manager == request.user
-        if hasattr(obj, 'salon'):
-            return obj.salon.manager == request.user
-        return False
+        return get_object_salon_id(obj) in get_salon_ids(request, managed=True)
 
 
 class IsSalonStaff(permissions.BasePermission):
@@ -19,10 +72,4 @@ class IsSalonStaff(permissions.BasePermission):
         return request.user.is_authenticated and request.user.role in ['MANAGER', 'STAFF']
 
     def has_object_permission(self, request, view, obj):
-        if request.user.role == 'MANAGER':
-            return True
-
-        if hasattr(obj, 'salon'):
-            return True
-
-        return False
\ No newline at end of file
+        return get_object_salon_id(obj) in get_salon_ids(request)
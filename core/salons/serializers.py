@@ -1,7 +1,9 @@
+from django.utils import timezone
 from rest_framework import serializers
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 import jdatetime
 from .models import Salon, WorkingHours, TimeSlotConfig, TimeSlot, BlockedTime, TimeSlotBlock
+from core.geo import NearbyQuerySerializer
 
 
 class SalonSerializer(serializers.ModelSerializer):
@@ -9,12 +11,39 @@ class SalonSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Salon
-        fields = ['id', 'name', 'address', 'manager', 'manager_name', 'description']
+        fields = ['id', 'name', 'address', 'manager', 'manager_name', 'description', 'latitude', 'longitude']
         extra_kwargs = {
             'manager': {'write_only': True}
         }
 
 
+class NearbySalonSerializer(SalonSerializer):
+    # از Salon.with_free_slots و core.geo.nearest
+    distance = serializers.FloatField(read_only=True)
+    earliest_opening = serializers.TimeField(read_only=True)
+    free_slots = serializers.IntegerField(read_only=True)
+
+    class Meta(SalonSerializer.Meta):
+        fields = SalonSerializer.Meta.fields + ['distance', 'earliest_opening', 'free_slots']
+
+
+class SalonDiscoverySerializer(NearbyQuerySerializer):
+    """پارامترهای جستجوی آرایشگاه‌های نزدیک با وقت آزاد؛ پیش‌فرض امروز از همین حالا تا آخر روز"""
+    date = serializers.DateField(required=False)
+    start_time = serializers.TimeField(required=False)
+    end_time = serializers.TimeField(required=False)
+
+    def validate(self, data):
+        now = timezone.localtime()
+        data.setdefault('date', now.date())
+        if 'start_time' not in data:
+            data['start_time'] = now.time().replace(microsecond=0) if data['date'] == now.date() else time.min
+        data.setdefault('end_time', time.max)
+        if data['start_time'] >= data['end_time']:
+            raise serializers.ValidationError("ساعت شروع باید قبل از ساعت پایان باشد")
+        return data
+
+
 class WorkingHoursSerializer(serializers.ModelSerializer):
     day_display = serializers.CharField(source='get_day_of_week_display', read_only=True)
     day_jalali = serializers.CharField(source='get_day_of_week_jalali', read_only=True)
@@ -115,6 +144,8 @@ class SalonDetailSerializer(serializers.ModelSerializer):
 
 
 class TimeSlotGenerationSerializer(serializers.Serializer):
+    # برای مدیر چند آرایشگاه الزامی است (get_managed_salon)
+    salon = serializers.IntegerField(required=False)
     start_date = serializers.DateField()
     end_date = serializers.DateField()
 
@@ -125,6 +156,8 @@ class TimeSlotGenerationSerializer(serializers.Serializer):
 
 
 class TimeSlotBlockRangeSerializer(serializers.Serializer):
+    # برای مدیر چند آرایشگاه الزامی است (get_managed_salon)
+    salon = serializers.IntegerField(required=False)
     start_datetime = serializers.DateTimeField()
     end_datetime = serializers.DateTimeField()
     reason = serializers.CharField(required=False, allow_blank=True)
@@ -136,6 +169,8 @@ class TimeSlotBlockRangeSerializer(serializers.Serializer):
 
 
 class TimeSlotUnblockRangeSerializer(serializers.Serializer):
+    # برای مدیر چند آرایشگاه الزامی است (get_managed_salon)
+    salon = serializers.IntegerField(required=False)
     start_datetime = serializers.DateTimeField()
     end_datetime = serializers.DateTimeField()
 
@@ -0,0 +1,18 @@
+# django files
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+# your files
+from .models import Salon, SalonMembership
+from accounts.authentication import invalidate_user
+
+
+@receiver([post_save, post_delete], sender=SalonMembership)
+def invalidate_member(sender, instance, **kwargs):
+    # salon_ids داخل توکن کاربر دیگر معتبر نیست
+    invalidate_user(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=Salon)
+def invalidate_manager(sender, instance, **kwargs):
+    invalidate_user(instance.manager_id)
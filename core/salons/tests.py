@@ -1,3 +1,248 @@
-from django.test import TestCase
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
-# Create your tests here.
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts import authentication
+from accounts.models import User
+from core.middleware import QueryBudgetExceeded
+from accounts.tokens import ClaimsRefreshToken
+from .models import Salon, SalonMembership, TimeSlot, TimeSlotConfig, BlockedTime, TimeSlotBlock, WorkingHours
+
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+
+class SalonMembershipTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='MANAGER')
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'pass', role='STAFF')
+        cls.salon = Salon.objects.create(name='گلچین', address='تهران', manager=cls.manager)
+        cls.other_salon = Salon.objects.create(name='دیگر', address='شیراز', manager=cls.manager)
+        SalonMembership.objects.create(salon=cls.salon, user=cls.staff)
+        cls.slot = TimeSlot.objects.create(
+            salon=cls.salon, date=date(2025, 1, 1), start_time=time(10), end_time=time(11), max_capacity=3
+        )
+        cls.other_slot = TimeSlot.objects.create(
+            salon=cls.other_salon, date=date(2025, 1, 1), start_time=time(10), end_time=time(11), max_capacity=3
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_ids_for_user(self):
+        self.assertEqual(Salon.ids_for_user(self.manager), {self.salon.pk, self.other_salon.pk})
+        self.assertEqual(Salon.ids_for_user(self.staff), {self.salon.pk})
+
+    def test_staff_membership_does_not_grant_manager_access(self):
+        # مدیر آرایشگاه خودش است اما در آرایشگاه دیگری فقط آرایشگر
+        other_manager = User.objects.create_user('other', 'other@example.com', 'pass', role='MANAGER')
+        SalonMembership.objects.create(salon=self.salon, user=other_manager, role='STAFF')
+        hours = WorkingHours.objects.create(salon=self.salon, day_of_week=0, start_time=time(9), end_time=time(17))
+
+        self.assertEqual(Salon.ids_for_user(other_manager), {self.salon.pk})
+        self.assertEqual(Salon.ids_for_user(other_manager, managed=True), set())
+
+        url = reverse('salons:workinghours-detail', args=[hours.pk])
+        for token_user in (False, True):
+            client = APIClient()
+            if token_user:
+                # مسیر claim های توکن
+                client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(other_manager).access_token}')
+            else:
+                client.force_authenticate(other_manager)
+            response = client.patch(url, {'end_time': '23:00'}, format='json')
+            self.assertEqual(response.status_code, 404)
+        hours.refresh_from_db()
+        self.assertEqual(hours.end_time, time(17))
+
+        # کارمند همچنان تایم اسلات‌های آرایشگاه را می‌بیند
+        self.client.force_authenticate(other_manager)
+        response = self.client.get(reverse('salons:timeslot-list'))
+        self.assertEqual([slot['id'] for slot in response.json()], [self.slot.pk])
+
+    def test_membership_with_manager_role_grants_manager_access(self):
+        other_manager = User.objects.create_user('other', 'other@example.com', 'pass', role='MANAGER')
+        SalonMembership.objects.create(salon=self.salon, user=other_manager, role='MANAGER')
+        hours = WorkingHours.objects.create(salon=self.salon, day_of_week=0, start_time=time(9), end_time=time(17))
+
+        self.client.force_authenticate(other_manager)
+        response = self.client.patch(reverse('salons:workinghours-detail', args=[hours.pk]), {'end_time': '20:00'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_range_actions_target_a_managed_salon(self):
+        url = reverse('salons:timeslot-generate-slots')
+        data = {'start_date': '2025-02-01', 'end_date': '2025-02-01'}
+        TimeSlotConfig.objects.create(salon=self.other_salon)
+        self.client.force_authenticate(self.manager)
+        # دو آرایشگاه؛ آرایشگاه باید مشخص شود
+        self.assertEqual(self.client.post(url, data, format='json').status_code, 400)
+        self.assertEqual(self.client.post(url, dict(data, salon=self.other_salon.pk), format='json').status_code, 200)
+
+        other_manager = User.objects.create_user('other', 'other@example.com', 'pass', role='MANAGER')
+        Salon.objects.create(name='سوم', address='یزد', manager=other_manager)
+        SalonMembership.objects.create(salon=self.salon, user=other_manager, role='STAFF')
+        self.client.force_authenticate(other_manager)
+        block = {'salon': self.salon.pk, 'start_datetime': '2025-01-01T09:00:00Z', 'end_datetime': '2025-01-01T12:00:00Z'}
+        for name in ('blockedtime-block-time-range', 'blockedtime-unblock-time-range'):
+            self.assertEqual(self.client.post(reverse(f'salons:{name}'), block, format='json').status_code, 404)
+        self.assertFalse(BlockedTime.objects.filter(salon=self.salon).exists())
+
+        SalonMembership.objects.filter(user=other_manager).update(role='MANAGER')
+        self.client.force_authenticate(other_manager)
+        response = self.client.post(reverse('salons:blockedtime-block-time-range'), block, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(BlockedTime.objects.filter(salon=self.salon).exists())
+
+    def test_staff_sees_only_member_salons(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(reverse('salons:timeslot-list'))
+        self.assertEqual([slot['id'] for slot in response.json()], [self.slot.pk])
+
+    def test_object_checks_reuse_request_cache(self):
+        self.client.force_authenticate(self.staff)
+        # یک کوئری برای شناسه آرایشگاه‌ها و یک کوئری برای خود تایم اسلات
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('salons:timeslot-detail', args=[self.slot.pk]))
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(reverse('salons:timeslot-detail', args=[self.other_slot.pk]))
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(QUERY_BUDGET_ENFORCE=True)
+class TimeSlotQueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='MANAGER')
+        cls.staff = User.objects.create_user('staff', 'staff@example.com', 'pass', role='STAFF')
+        cls.salon = Salon.objects.create(name='گلچین', address='تهران', manager=cls.manager)
+        SalonMembership.objects.create(salon=cls.salon, user=cls.staff)
+
+    def setUp(self):
+        authentication._user_cache.clear()
+        authentication.invalidation_cache().clear()
+
+    def get_list(self, user):
+        # بدترین حالت: توکن بدون claim و کش کاربر سرد
+        authentication._user_cache.clear()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client.get(reverse('salons:timeslot-list'))
+
+    def test_list_stays_within_budget_as_rows_grow(self):
+        for count in (2, 20):
+            for day in range(TimeSlot.objects.count(), count):
+                TimeSlot.objects.create(
+                    salon=self.salon, date=date(2025, 1, 1) + timedelta(days=day),
+                    start_time=time(10), end_time=time(11), max_capacity=3
+                )
+            for user in (self.manager, self.staff):
+                self.assertEqual(len(self.get_list(user).json()), count)
+
+    @override_settings(QUERY_BUDGETS={'TimeSlotViewSet.list': 2})
+    def test_exceeding_budget_fails(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.get_list(self.staff)
+
+
+class SalonDiscoveryTests(TestCase):
+    day = date(2025, 1, 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.manager = User.objects.create_user('manager', 'manager@example.com', 'pass', role='MANAGER')
+        cls.near = cls.create_salon('نزدیک', '35.7010', '51.4010', [(time(16), 0), (time(11), 0)])
+        cls.late = cls.create_salon('هم‌فاصله دیرتر', '35.7010', '51.3990', [(time(18), 0)])
+        cls.full = cls.create_salon('پر', '35.7001', '51.4001', [(time(15), 2)])
+        cls.far = cls.create_salon('دور', '35.8400', '50.9391', [(time(15), 0)])
+        cls.create_salon('بدون مختصات', None, None, [(time(15), 0)])
+
+    @classmethod
+    def create_salon(cls, name, lat, lng, slots):
+        salon = Salon.objects.create(name=name, address='تهران', manager=cls.manager, latitude=lat, longitude=lng)
+        for start, booked in slots:
+            TimeSlot.objects.create(
+                salon=salon, date=cls.day, start_time=start, end_time=time(start.hour + 1),
+                max_capacity=2, booked_count=booked,
+            )
+        return salon
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+        self.url = reverse('salons:salon-discover')
+
+    def discover(self, **params):
+        return self.client.get(self.url, {'lat': 35.7, 'lng': 51.4, 'date': self.day, **params}).json()
+
+    def test_ranked_by_distance_then_earliest_opening(self):
+        data = self.discover(k=3)
+        self.assertEqual([item['name'] for item in data], ['نزدیک', 'هم‌فاصله دیرتر', 'دور'])
+        self.assertEqual(data[0]['earliest_opening'], '11:00:00')
+        self.assertEqual(data[0]['free_slots'], 2)
+
+    def test_time_window_and_radius(self):
+        data = self.discover(start_time='12:00', end_time='17:00', radius=5)
+        self.assertEqual([(item['name'], item['earliest_opening']) for item in data], [('نزدیک', '16:00:00')])
+
+    def test_single_query_per_search_ring(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.discover(k=2)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_invalid_window(self):
+        response = self.client.get(self.url, {'lat': 35.7, 'lng': 51.4, 'start_time': '18:00', 'end_time': '10:00'})
+        self.assertEqual(response.status_code, 400)
+
+
+class SalonAdminQueryTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'pass')
+        cls.add_salons(2)
+
+    @classmethod
+    def add_salons(cls, count):
+        for i in range(count):
+            username = f'manager{Salon.objects.count()}'
+            manager = User.objects.create_user(username, f'{username}@example.com', 'pass', role='MANAGER')
+            salon = Salon.objects.create(name=f'آرایشگاه {i}', address='تهران', manager=manager)
+            for hour in (10, 11, 12):
+                slot = TimeSlot.objects.create(
+                    salon=salon, date=date(2025, 1, 1), start_time=time(hour), end_time=time(hour + 1), max_capacity=2
+                )
+            TimeSlotBlock.objects.create(time_slot=slot, reason='تعمیرات')
+            BlockedTime.objects.create(
+                salon=salon, reason='تعمیرات',
+                start_datetime=datetime(2025, 1, 1, 10, tzinfo=dt_timezone.utc),
+                end_datetime=datetime(2025, 1, 1, 12, tzinfo=dt_timezone.utc),
+            )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        urls = [reverse(f'admin:salons_{name}_changelist') for name in ('salon', 'timeslot', 'blockedtime', 'timeslotblock')]
+        counts = []
+        for url in urls:
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            counts.append(len(ctx.captured_queries))
+
+        self.add_salons(10)
+        for url, count in zip(urls, counts):
+            with self.assertNumQueries(count):
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_annotated_counts(self):
+        response = self.client.get(reverse('admin:salons_salon_changelist'))
+        self.assertContains(response, 'مشاهده تایم اسلات‌ها (3)', count=2)
+        self.assertContains(response, 'مشاهده زمان‌های مسدود (1)', count=2)
+
+        # اسلات‌های ساعت ۱۰ و ۱۱ در بازه مسدودی هستند
+        response = self.client.get(reverse('admin:salons_blockedtime_changelist'))
+        self.assertContains(response, 'مشاهده تایم اسلات‌ها (2)', count=2)
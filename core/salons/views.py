@@ -9,9 +9,12 @@ from .serializers import (
     SalonSerializer, SalonDetailSerializer, WorkingHoursSerializer,
     TimeSlotConfigSerializer, TimeSlotSerializer, BlockedTimeSerializer,
     TimeSlotBlockSerializer, TimeSlotGenerationSerializer,
-    TimeSlotBlockRangeSerializer, TimeSlotUnblockRangeSerializer
+    TimeSlotBlockRangeSerializer, TimeSlotUnblockRangeSerializer,
+    NearbySalonSerializer, SalonDiscoverySerializer
 )
-from .permissions import IsSalonManager, IsSalonStaff
+from .permissions import IsSalonManager, IsSalonStaff, get_managed_salon, get_salon_ids
+from core import geo
+from core.streaming import StreamingListMixin
 
 
 class SalonViewSet(viewsets.ModelViewSet):
@@ -33,6 +36,23 @@ class SalonViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(manager=self.request.user)
 
+    @action(detail=False, methods=['get'])
+    def discover(self, request):
+        """
+        نزدیک‌ترین آرایشگاه‌هایی که در بازه زمانی خواسته شده وقت آزاد دارند:
+        ?lat=&lng=&k=&radius=&date=&start_time=&end_time=
+        مرتب بر اساس فاصله (با دقت ۱۰۰ متر) و سپس اولین ساعت آزاد
+        """
+        params = SalonDiscoverySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        data = params.validated_data
+
+        # یک کوئری: جعبه محدوده + join تایم اسلات‌های آزاد
+        candidates = Salon.with_free_slots(data['date'], data['start_time'], data['end_time']).select_related('manager')
+        salons = geo.nearest(candidates, data['lat'], data['lng'], k=data['k'], radius_km=data.get('radius'))
+        salons.sort(key=lambda salon: (round(salon.distance, 1), salon.earliest_opening))
+        return Response(NearbySalonSerializer(salons, many=True).data)
+
 
 class WorkingHoursViewSet(viewsets.ModelViewSet):
     queryset = WorkingHours.objects.all()
@@ -44,7 +64,7 @@ class WorkingHoursViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # مدیر فقط ساعات کاری آرایشگاه خود را می‌بیند
-        return WorkingHours.objects.filter(salon__manager=self.request.user)
+        return WorkingHours.objects.filter(salon_id__in=get_salon_ids(self.request, managed=True))
 
 
 class TimeSlotConfigViewSet(viewsets.ModelViewSet):
@@ -54,11 +74,11 @@ class TimeSlotConfigViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # مدیر فقط تنظیمات آرایشگاه خود را می‌بیند
-        return TimeSlotConfig.objects.filter(salon__manager=self.request.user)
+        return TimeSlotConfig.objects.filter(salon_id__in=get_salon_ids(self.request, managed=True))
 
 
-class TimeSlotViewSet(viewsets.ModelViewSet):
-    queryset = TimeSlot.objects.all()
+class TimeSlotViewSet(StreamingListMixin, viewsets.ModelViewSet):
+    queryset = TimeSlot.objects.select_related('salon')
     serializer_class = TimeSlotSerializer
     permission_classes = [IsAuthenticated, IsSalonStaff]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -66,20 +86,16 @@ class TimeSlotViewSet(viewsets.ModelViewSet):
     search_fields = ['salon__name']
     ordering_fields = ['date', 'start_time']
     ordering = ['date', 'start_time']
+    # بدترین حالت توکن بدون claim با کش سرد: کاربر + شناسه آرایشگاه‌ها + لیست
+    query_budgets = {'list': 3}
 
     def get_queryset(self):
         user = self.request.user
         queryset = super().get_queryset()
 
-        # مدیر همه تایم اسلات‌های آرایشگاه خود را می‌بیند
-        if user.role == 'MANAGER':
-            return queryset.filter(salon__manager=user)
-
-        # کارمندان تایم اسلات‌های آرایشگاه خود را می‌بینند
-        elif user.role == 'STAFF':
-            # فرض می‌کنیم کارمند در یک آرایشگاه کار می‌کند
-            # در عمل نیاز به مدل ارتباطی بین کارمند و آرایشگاه دارید
-            return queryset.filter(salon__staff=user)
+        # مدیر و کارمندان تایم اسلات‌های آرایشگاه‌های خود را می‌بینند (SalonMembership)
+        if user.role in ['MANAGER', 'STAFF']:
+            return queryset.filter(salon_id__in=get_salon_ids(self.request))
 
         return queryset.none()
 
@@ -91,14 +107,8 @@ class TimeSlotViewSet(viewsets.ModelViewSet):
             start_date = serializer.validated_data['start_date']
             end_date = serializer.validated_data['end_date']
 
-            # دریافت آرایشگاه کاربر
-            try:
-                salon = request.user.managed_salons.get()
-            except Salon.DoesNotExist:
-                return Response(
-                    {"error": "شما آرایشگاهی را مدیریت نمی‌کنید"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            # آرایشگاهی که کاربر مدیر آن است (مالک یا عضویت MANAGER)
+            salon = get_managed_salon(request, serializer.validated_data.get('salon'))
 
             # ایجاد تایم اسلات‌ها
             salon.generate_time_slots(start_date, end_date)
@@ -156,7 +166,7 @@ class BlockedTimeViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # مدیر فقط زمان‌های مسدود شده آرایشگاه خود را می‌بیند
-        return BlockedTime.objects.filter(salon__manager=self.request.user)
+        return BlockedTime.objects.filter(salon_id__in=get_salon_ids(self.request, managed=True))
 
     @action(detail=False, methods=['post'])
     def block_time_range(self, request):
@@ -167,14 +177,8 @@ class BlockedTimeViewSet(viewsets.ModelViewSet):
             end_datetime = serializer.validated_data['end_datetime']
             reason = serializer.validated_data.get('reason', '')
 
-            # دریافت آرایشگاه کاربر
-            try:
-                salon = request.user.managed_salons.get()
-            except Salon.DoesNotExist:
-                return Response(
-                    {"error": "شما آرایشگاهی را مدیریت نمی‌کنید"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            # آرایشگاهی که کاربر مدیر آن است (مالک یا عضویت MANAGER)
+            salon = get_managed_salon(request, serializer.validated_data.get('salon'))
 
             # مسدود کردن بازه زمانی
             salon.block_time_range(start_datetime, end_datetime, reason)
@@ -194,14 +198,8 @@ class BlockedTimeViewSet(viewsets.ModelViewSet):
             start_datetime = serializer.validated_data['start_datetime']
             end_datetime = serializer.validated_data['end_datetime']
 
-            # دریافت آرایشگاه کاربر
-            try:
-                salon = request.user.managed_salons.get()
-            except Salon.DoesNotExist:
-                return Response(
-                    {"error": "شما آرایشگاهی را مدیریت نمی‌کنید"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            # آرایشگاهی که کاربر مدیر آن است (مالک یا عضویت MANAGER)
+            salon = get_managed_salon(request, serializer.validated_data.get('salon'))
 
             # رفع مسدودی بازه زمانی
             salon.unblock_time_range(start_datetime, end_datetime)
@@ -215,7 +213,7 @@ class BlockedTimeViewSet(viewsets.ModelViewSet):
 
 
 class TimeSlotBlockViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = TimeSlotBlock.objects.all()
+    queryset = TimeSlotBlock.objects.select_related('time_slot__salon')
     serializer_class = TimeSlotBlockSerializer
     permission_classes = [IsAuthenticated, IsSalonStaff]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -228,13 +226,8 @@ class TimeSlotBlockViewSet(viewsets.ReadOnlyModelViewSet):
         user = self.request.user
         queryset = super().get_queryset()
 
-        # مدیر همه مسدودی‌های آرایشگاه خود را می‌بیند
-        if user.role == 'MANAGER':
-            return queryset.filter(time_slot__salon__manager=user)
-
-        # کارمندان مسدودی‌های آرایشگاه خود را می‌بینند
-        elif user.role == 'STAFF':
-            # فرض می‌کنیم کارمند در یک آرایشگاه کار می‌کند
-            return queryset.filter(time_slot__salon__staff=user)
+        # مدیر و کارمندان مسدودی‌های آرایشگاه‌های خود را می‌بینند
+        if user.role in ['MANAGER', 'STAFF']:
+            return queryset.filter(time_slot__salon_id__in=get_salon_ids(self.request))
 
         return queryset.none()
\ No newline at end of file